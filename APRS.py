@@ -1,14 +1,361 @@
 import requests
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog
 from datetime import datetime, time, timedelta
 import threading
 import time as time_module
 import os
 import json
 import webbrowser
-from tkintermapview import TkinterMapView
 import random
+import re
+import math
+import argparse
+import socket
+import select
+import multiprocessing
+import zlib
+import heapq
+import itertools
+import csv
+import sqlite3
+import tempfile
+import queue
+import cProfile
+import pstats
+import sys
+import stat
+import subprocess
+import socketserver
+from array import array
+from collections import OrderedDict, namedtuple, deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from xml.sax.saxutils import escape as xml_escape
+from requests.adapters import HTTPAdapter
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+try:
+    import termios
+except ImportError:  # Windows
+    termios = None
+
+try:
+    import ctypes
+    from ctypes import wintypes
+except ImportError:
+    ctypes = None
+
+class PacketDedupeCache:
+    """
+    重复数据包抑制缓存
+
+    APRS-IS 会在约30秒窗口内丢弃重复数据包，这里在发送前就把它们拦下，
+    省去一次完整的HTTP往返。键为去掉时间戳后的数据包内容。
+    """
+
+    def __init__(self, window=30):
+        self.window = window      # 去重窗口 (秒)，0 表示关闭
+        self.hits = 0             # 命中次数 (被跳过的重复包)
+        self.misses = 0           # 未命中次数 (正常发送)
+        self._entries = OrderedDict()  # 键 -> 记录时间，按时间先后排列
+        self._lock = threading.Lock()
+
+    def _prune(self, now):
+        """清除窗口外的旧记录"""
+        while self._entries:
+            key, stamp = next(iter(self._entries.items()))
+            if now - stamp < self.window:
+                break
+            self._entries.popitem(last=False)
+
+    def check_and_add(self, key):
+        """
+        检查数据包是否重复，未重复则记录下来
+
+        返回:
+        bool - True 表示窗口内已发送过 (应跳过)
+        """
+        with self._lock:
+            if self.window <= 0:
+                self.misses += 1
+                return False
+            now = time_module.monotonic()
+            self._prune(now)
+            if key in self._entries:
+                self.hits += 1
+                return True
+            self._entries[key] = now
+            self.misses += 1
+            return False
+
+    def discard(self, key):
+        """移除记录（发送失败时调用，允许立即重试）"""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def set_window(self, window):
+        """设置去重窗口 (秒)"""
+        with self._lock:
+            self.window = max(0, window)
+            self._prune(time_module.monotonic())
+
+    def stats(self):
+        """返回命中/未命中统计"""
+        with self._lock:
+            return {
+                "window": self.window,
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._entries)
+            }
+
+# 全局去重缓存（发送路径共用）
+packet_dedupe_cache = PacketDedupeCache()
+
+# 符号表数据文件（随程序分发，只读）
+SYMBOL_DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "aprs_symbols.tsv")
+
+# 叠加字符（可替换副符号表的 "\\"，覆盖在可叠加符号上显示）
+SYMBOL_OVERLAY_CHARS = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+def is_overlay_table(symbol_table):
+    """符号表是否为单个叠加字符 (0-9, A-Z)"""
+    return isinstance(symbol_table, str) and len(symbol_table) == 1 and symbol_table in SYMBOL_OVERLAY_CHARS
+
+class SymbolIndex:
+    """
+    APRS 完整符号表索引（主表 / 副表 / 叠加）
+
+    数据文件在首次访问时才读取，且只读不写；
+    建立 (符号表, 符号代码) 和名称两个查找索引。
+    """
+
+    def __init__(self, path=SYMBOL_DATA_PATH):
+        self.path = path
+        self._by_key = None     # (符号表, 符号代码) -> 符号信息
+        self._by_table = None   # 符号表 -> [(符号代码, 符号信息), ...]
+        self._names = None      # [(小写名称, 符号信息), ...]
+        self._lock = threading.Lock()
+
+    def _ensure_loaded(self):
+        """首次使用时加载数据文件"""
+        if self._by_key is not None:
+            return
+        with self._lock:
+            if self._by_key is not None:
+                return
+            by_key = {}
+            by_table = {"/": [], "\\": []}
+            names = []
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    line = line.rstrip("\n")
+                    if not line or line.startswith("#"):
+                        continue
+                    table, code, overlay, color, name = line.split("\t", 4)
+                    info = {
+                        "table": table,
+                        "code": code,
+                        "name": name,
+                        "color": color,
+                        "overlay": overlay == "1"
+                    }
+                    by_key[(table, code)] = info
+                    by_table[table].append((code, info))
+                    names.append((name.lower(), info))
+            self._by_table = by_table
+            self._names = names
+            self._by_key = by_key
+
+    def get(self, symbol_table, symbol_code):
+        """
+        按符号表和符号代码查找
+
+        叠加字符 (0-9, A-Z) 作为符号表时，查找副表中可叠加的同代码符号。
+
+        返回:
+        dict - 符号信息，未找到返回 None
+        """
+        self._ensure_loaded()
+        if is_overlay_table(symbol_table):
+            info = self._by_key.get(("\\", symbol_code))
+            if info is None or not info["overlay"]:
+                return None
+            return self._with_overlay(info, symbol_table)
+        return self._by_key.get((symbol_table, symbol_code))
+
+    @staticmethod
+    def _with_overlay(info, overlay):
+        """返回带叠加字符的符号信息副本"""
+        return dict(info, table=overlay, name=f"{info['name']} [{overlay}]")
+
+    def table_items(self, symbol_table):
+        """
+        返回某个符号表的全部符号 [(符号代码, 符号信息), ...]
+
+        叠加字符作为符号表时，返回副表中全部可叠加符号 (已带上该叠加字符)。
+        """
+        self._ensure_loaded()
+        if is_overlay_table(symbol_table):
+            return [
+                (code, self._with_overlay(info, symbol_table))
+                for code, info in self._by_table["\\"] if info["overlay"]
+            ]
+        return self._by_table.get(symbol_table, [])
+
+    def search(self, text, overlay=None):
+        """
+        按名称或代码搜索符号
+
+        参数:
+        text - 搜索内容；单个字符按代码精确匹配，其余按名称子串匹配 (不区分大小写)；
+               "叠加字符+代码" (如 "A#") 额外匹配对应的叠加符号
+        overlay - 叠加字符；指定时只在可叠加符号中搜索，结果带上该叠加字符
+
+        返回:
+        list - 匹配的符号信息
+        """
+        self._ensure_loaded()
+        text = text.strip()
+        if overlay is not None:
+            if not is_overlay_table(overlay):
+                raise ValueError(f"叠加字符无效: {overlay}")
+            names = [
+                (name, self._with_overlay(info, overlay))
+                for name, info in self._names if info["table"] == "\\" and info["overlay"]
+            ]
+        else:
+            names = self._names
+        if not text:
+            return [info for _, info in names]
+        if len(text) == 1:
+            return [info for _, info in names if info["code"] == text]
+        matches = []
+        if overlay is None and len(text) == 2:
+            info = self.get(text[0].upper(), text[1])
+            if info is not None:
+                matches.append(info)
+        text = text.lower()
+        return matches + [info for name, info in names if text in name]
+
+    def __len__(self):
+        self._ensure_loaded()
+        return len(self._by_key)
+
+# 全局符号表索引（惰性加载）
+symbol_index = SymbolIndex()
+
+# 图标选择器单元格尺寸 (像素)
+ICON_CELL_WIDTH = 170
+ICON_CELL_HEIGHT = 30
+ICON_SPRITE_SIZE = 24
+
+# 符号雪碧图目录 (aprs-symbols-24-0.png 为主表，aprs-symbols-24-1.png 为副表)
+SYMBOL_SPRITE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "aprs_icons")
+
+class SymbolSpriteSheet:
+    """
+    APRS 符号雪碧图
+
+    每个符号表一张图，16列 x 6行，按符号代码从 "!" 开始依次排列。
+    整张图只加载一次，单个符号在首次使用时裁剪并缓存。
+    雪碧图文件不存在时 available 为 False，由调用方自行绘制。
+    """
+
+    COLUMNS = 16
+
+    def __init__(self, master, directory=SYMBOL_SPRITE_DIR, size=24):
+        self.master = master
+        self.directory = directory
+        self.size = size
+        self._sheets = {}   # 符号表 -> 整张雪碧图 (None 表示不可用)
+        self._tiles = {}    # (符号表, 符号代码) -> 裁剪后的图标
+
+    def _sheet(self, symbol_table):
+        """加载某个符号表的整张雪碧图（叠加符号使用副表图标）"""
+        if symbol_table != "/":
+            symbol_table = "\\"
+        if symbol_table not in self._sheets:
+            index = 0 if symbol_table == "/" else 1
+            path = os.path.join(self.directory, f"aprs-symbols-{self.size}-{index}.png")
+            sheet = None
+            if os.path.exists(path):
+                try:
+                    sheet = tk.PhotoImage(master=self.master, file=path)
+                except tk.TclError:
+                    sheet = None
+            self._sheets[symbol_table] = sheet
+        return self._sheets[symbol_table]
+
+    @property
+    def available(self):
+        return self._sheet("/") is not None and self._sheet("\\") is not None
+
+    def get(self, symbol_table, symbol_code):
+        """
+        获取单个符号图标
+
+        返回:
+        tk.PhotoImage - 图标，雪碧图不可用时返回 None
+        """
+        key = (symbol_table, symbol_code)
+        if key in self._tiles:
+            return self._tiles[key]
+        sheet = self._sheet(symbol_table)
+        if sheet is None:
+            return None
+        index = ord(symbol_code) - ord("!")
+        x = (index % self.COLUMNS) * self.size
+        y = (index // self.COLUMNS) * self.size
+        tile = tk.PhotoImage(master=self.master, width=self.size, height=self.size)
+        tile.tk.call(tile.name, "copy", sheet.name, "-from", x, y, x + self.size, y + self.size)
+        self._tiles[key] = tile
+        return tile
+
+# aprs.tv 数据包提交地址
+APRS_SUBMIT_URL = "https://aprs.tv/makeaprs"
+
+# 提交请求头 (模拟浏览器请求)
+APRS_POST_HEADERS = {
+    "authority": "aprs.tv",
+    "accept": "application/json, text/javascript, */*; q=0.01",
+    "accept-encoding": "gzip, deflate, br, zstd",
+    "accept-language": "zh-CN,zh;q=0.9,en;q=0.8,en-GB;q=0.7,en-US;q=0.6",
+    "content-type": "application/x-www-form-urlencoded; charset=UTF-8",
+    "dnt": "1",
+    "origin": "https://aprs.tv",
+    "priority": "u=1, i",
+    "referer": "https://aprs.tv/makeaprs",
+    "sec-ch-ua": '"Not)A;Brand";v="8", "Chromium";v="138", "Microsoft Edge";v="138"',
+    "sec-ch-ua-mobile": "?0",
+    "sec-ch-ua-platform": '"Windows"',
+    "sec-fetch-dest": "empty",
+    "sec-fetch-mode": "cors",
+    "sec-fetch-site": "same-origin",
+    "sec-gpc": "1",
+    "user-agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/138.0.0.0 Safari/537.36 Edg/138.0.0.0",
+    "x-requested-with": "XMLHttpRequest"
+}
+
+def decimal_to_aprs_lat(decimal):
+    """将十进制纬度转换为APRS格式 (ddmm.mmN/S)"""
+    direction = 'N' if decimal >= 0 else 'S'
+    decimal = abs(decimal)
+    degrees = int(decimal)
+    minutes = round((decimal - degrees) * 60, 2)
+    if minutes >= 60:
+        degrees, minutes = degrees + 1, 0.0
+    return f"{degrees:02d}{minutes:05.2f}{direction}"
+
+def decimal_to_aprs_lon(decimal):
+    """将十进制经度转换为APRS格式 (dddmm.mmE/W)"""
+    direction = 'E' if decimal >= 0 else 'W'
+    decimal = abs(decimal)
+    degrees = int(decimal)
+    minutes = round((decimal - degrees) * 60, 2)
+    if minutes >= 60:
+        degrees, minutes = degrees + 1, 0.0
+    return f"{degrees:03d}{minutes:05.2f}{direction}"
 
 def calculate_aprs_verification_code(callsign):
     """
@@ -35,13 +382,208 @@ def calculate_aprs_verification_code(callsign):
     verification_code = code & 0x7fff 
     return verification_code
 
+def encode_phg(power=None, antenna_height=None, gain=None, directivity=0):
+    """
+    编码标准 PHG 数据扩展 (PHGphgd)
+
+    参数:
+    power          - 功率 (W)，编码为 p = √功率
+    antenna_height - 天线高度 (m)，换算为英尺后编码为 h = log2(高度/10)
+    gain           - 增益 (dB)
+    directivity    - 方向 (°)，0 表示全向，其余按45°量化
+
+    返回:
+    str - 7字符的 PHG 字符串，如 PHG5132
+    """
+    p = round(math.sqrt(max(float(power), 0))) if power is not None else 0
+    
+    h = 0
+    if antenna_height is not None:
+        height_ft = float(antenna_height) * 3.28084
+        if height_ft > 10:
+            h = round(math.log2(height_ft / 10))
+    
+    g = round(float(gain)) if gain is not None else 0
+    
+    d = 0
+    if directivity:
+        d = round(float(directivity) / 45) % 8 or 8  # 360° 记为 8
+    
+    p, h, g = (min(max(value, 0), 9) for value in (p, h, g))
+    return f"PHG{p}{h}{g}{d}"
+
+def truncate_utf8(text, max_bytes):
+    """
+    按 UTF-8 字节数截断文本（不会截断半个字符）
+
+    参数:
+    text      - 文本
+    max_bytes - 最大字节数
+
+    返回:
+    str - 截断后的文本
+    """
+    encoded = text.encode("utf-8")
+    if len(encoded) <= max_bytes:
+        return text
+    return encoded[:max(max_bytes, 0)].decode("utf-8", errors="ignore").rstrip()
+
+class PacketTemplate:
+    """
+    单个台站的预编译数据包模板
+
+    呼号、路径、符号表、PHG 和中文台站信息/注释等常量部分在创建时拼好，
+    每次发送只格式化变化的字段（时间戳、位置、速度/方向、海拔），
+    并记住上一次的格式化结果，值不变时直接复用。
+    """
+
+    def __init__(self, callsign, path, symbol_table="/", symbol_code="L", comment="",
+                 power=None, antenna_height=None, gain=None, device_info=None, software_info=None,
+                 phg=False, text_budget=None):
+        """参数含义同 send_aprs_packet"""
+        self.callsign = callsign
+        self.header = f"{callsign}>APRSTV,{path}:/"
+        self.symbol_table = symbol_table
+        self.symbol_code = symbol_code or "e"   # 未选择图标时沿用原来的默认符号
+        self._aprs_word = None
+        
+        # 标准PHG编码（至少提供一项时才添加）
+        self.phg = ""
+        if phg and any(value is not None for value in (power, antenna_height, gain)):
+            self.phg = encode_phg(power, antenna_height, gain)
+        
+        # 构建状态信息部分（功率、天线高度、增益等）
+        status_info = []
+        
+        # 使用PHG编码时不再添加文本形式的台站信息
+        if not phg:
+            if power is not None:
+                status_info.append(f"功率{power}W")
+            if antenna_height is not None:
+                status_info.append(f"天线高度{antenna_height}m")
+            if gain is not None:
+                status_info.append(f"增益{gain}dB")
+        
+        # 设备信息和软件信息（如果提供），可限制总字节数
+        extra_info = " ".join(info for info in (device_info, software_info) if info)
+        if extra_info and text_budget is not None:
+            extra_info = truncate_utf8(extra_info, text_budget)
+        if extra_info:
+            status_info.append(extra_info)
+        
+        # 添加注释和附加信息
+        status_str = " ".join(status_info)
+        self.tail = f" {status_str} {comment}" if status_str else f" {comment}"
+        
+        # 上一次的格式化结果 (输入, 输出)
+        self._timestamp = (None, "")
+        self._position = (None, "")
+        self._motion = (None, "")
+        self._altitude = (None, "")
+
+    def verification_code(self):
+        """APRS验证码（只计算一次）"""
+        if self._aprs_word is None:
+            self._aprs_word = str(calculate_aprs_verification_code(self.callsign))
+        return self._aprs_word
+
+    def build(self, latitude, longitude, speed=None, course=None, altitude=None, weather=None, now=None):
+        """
+        构建数据包
+
+        格式: 呼号>APRSTV,路径:/HHMMSSh纬度表经度符号[速度/方向|PHG|气象][/A=海拔] [PHG] 注释
+
+        一个数据包只能有一个数据扩展：有速度/方向时 PHG 以空格隔开放在注释开头。
+
+        返回:
+        (aprs_data, dedupe_key) - 数据包和去掉时间戳后的去重键
+        """
+        # 模板可能被多个发送线程共用：每个缓存项只读取一次到局部变量，
+        # 需要更新时整体替换，不会读到其他线程写入的结果
+        
+        # 时间戳按秒缓存
+        second = int(now if now is not None else time_module.time())
+        cached = self._timestamp
+        if cached[0] != second:
+            cached = (second, time_module.strftime("%H%M%S", time_module.gmtime(second)))
+            self._timestamp = cached
+        timestamp = cached[1]
+        
+        # 位置 + 符号（气象报告使用气象站符号 _）
+        position_key = (latitude, longitude, bool(weather))
+        cached = self._position
+        if cached[0] != position_key:
+            symbol = "_" if weather else self.symbol_code
+            cached = (position_key, f"{latitude}{self.symbol_table}{longitude}{symbol}")
+            self._position = cached
+        body = cached[1]
+        
+        # 气象报告: 气象站符号后紧跟气象数据（风向风速占用速度/方向位置）
+        comment_phg = ""
+        if weather:
+            body += weather
+        # 添加速度和方向（如果提供），数据扩展只能有一个，PHG 放在注释开头
+        elif speed is not None and course is not None:
+            cached = self._motion
+            if cached[0] != (speed, course):
+                cached = ((speed, course), f"{int(float(speed)):03d}/{int(float(course)):03d}")
+                self._motion = cached
+            body += cached[1]
+            if self.phg:
+                comment_phg = " " + self.phg
+        elif self.phg:
+            body += self.phg  # PHG 作为数据扩展
+        else:
+            body += "   /   "  # 空值
+        
+        # 添加海拔（转换为英尺并格式化为六位数字）
+        if altitude is not None:
+            cached = self._altitude
+            if cached[0] != altitude:
+                cached = (altitude, f"/A={int(float(altitude) * 3.28084):06d}")
+                self._altitude = cached
+            body += cached[1]
+        
+        body += comment_phg + self.tail
+        return f"{self.header}{timestamp}h{body}", self.header + body
+
+class PacketTemplateCache:
+    """
+    按台站常量参数索引的模板缓存（LRU）
+
+    键包含全部常量参数，表单修改后键随之变化，旧模板自然失效并被淘汰。
+    """
+
+    def __init__(self, size=1024):
+        self.size = size
+        self._templates = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, *static):
+        """获取 (或创建) 常量参数对应的模板（参数顺序同 PacketTemplate）"""
+        with self._lock:
+            template = self._templates.get(static)
+            if template is not None:
+                self._templates.move_to_end(static)
+                return template
+            template = PacketTemplate(*static)
+            self._templates[static] = template
+            if len(self._templates) > self.size:
+                self._templates.popitem(last=False)
+            return template
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._templates.clear()
+
 def send_aprs_packet(
     callsign="N0CALL-1",
     path="WIDE1-1",
     latitude="2947.76N",
     longitude="11941.12E",
     symbol_table="/",  # 主符号表
-    symbol_code="L",   # 符号代码 (L = 天气站)
+    symbol_code="L",   # 符号代码 (L = PC 用户)
     comment="TEST APRS.TV",
     aprs_word=None,    # 可选: 自定义APRS验证码
     speed=None,        # 速度 (km/h)
@@ -51,209 +593,3765 @@ def send_aprs_packet(
     antenna_height=None, # 天线高度 (m)
     gain=None,          # 增益 (dB)
     device_info=None,   # 设备信息
-    software_info=None  # 软件信息
+    software_info=None, # 软件信息
+    dedupe_cache=packet_dedupe_cache,  # 去重缓存 (None 表示不去重)
+    session=None,       # 可选: 复用连接的 requests.Session
+    url=APRS_SUBMIT_URL, # 提交地址
+    phg=False,          # 使用标准 PHG 编码功率/天线高度/增益
+    text_budget=None,   # 设备/软件信息的字节上限 (UTF-8)
+    weather=None,       # 气象数据字段 (WeatherStation.report 生成)
+    pool=None,          # 多服务器提交池 (EndpointPool)
+    template_cache=None # 数据包模板缓存 (PacketTemplateCache)
 ):
     """
-    发送自定义APRS数据包到aprs.tv
-    
-    参数:
-    callsign     - 呼号 (默认: N0CALL-1)
-    path         - 转发路径 (默认: WIDE1-1)
-    latitude     - 纬度 (格式: ddmm.mmN/S, 默认: 2947.76N)
-    longitude    - 经度 (格式: dddmm.mmE/W, 默认: 11941.12E)
-    symbol_table - 符号表 (默认: / = 主表)
-    symbol_code  - 符号代码 (默认: L = 天气站)
-    comment      - 注释信息 (默认: TEST APRS.TV)
-    aprs_word    - 可选: 自定义APRS验证码 (如果不提供则自动计算)
-    speed        - 可选: 速度 (km/h)
-    course       - 可选: 方向 (°)
-    altitude     - 可选: 海拔 (m)
-    power        - 可选: 功率 (W)
-    antenna_height - 可选: 天线高度 (m)
-    gain         - 可选: 增益 (dB)
-    device_info   - 可选: 设备信息
-    software_info - 可选: 软件信息
-    
-    返回:
-    dict - 服务器响应结果
+    发送自定义APRS数据包到aprs.tv
+    
+    参数:
+    callsign     - 呼号 (默认: N0CALL-1)
+    path         - 转发路径 (默认: WIDE1-1)
+    latitude     - 纬度 (格式: ddmm.mmN/S, 默认: 2947.76N)
+    longitude    - 经度 (格式: dddmm.mmE/W, 默认: 11941.12E)
+    symbol_table - 符号表 (默认: / = 主表)
+    symbol_code  - 符号代码 (默认: L = PC 用户)
+    comment      - 注释信息 (默认: TEST APRS.TV)
+    aprs_word    - 可选: 自定义APRS验证码 (如果不提供则自动计算)
+    speed        - 可选: 速度 (km/h)
+    course       - 可选: 方向 (°)
+    altitude     - 可选: 海拔 (m)
+    power        - 可选: 功率 (W)
+    antenna_height - 可选: 天线高度 (m)
+    gain         - 可选: 增益 (dB)
+    device_info   - 可选: 设备信息
+    software_info - 可选: 软件信息
+    dedupe_cache  - 可选: 去重缓存，窗口内重复的数据包直接跳过 (rs = "dup")
+    session       - 可选: requests.Session，批量发送时复用连接池
+    url           - 可选: 提交地址 (默认: https://aprs.tv/makeaprs)
+    phg           - 可选: 为True时功率、天线高度、增益编码为标准 PHGphgd 扩展，而不是中文文本
+    text_budget   - 可选: 设备信息和软件信息合计的最大字节数，超出部分按字符截断
+    weather       - 可选: 气象数据字段 (DDD/SSSg...)，提供时以气象站符号 _ 发送，
+                    风向风速占用速度/方向位置，忽略 speed/course/phg
+    pool          - 可选: EndpointPool，提供时忽略 url/session，自动选择最快的可用服务器
+    template_cache - 可选: PacketTemplateCache，复用同一台站的预编译模板 (批量/定时发送)
+
+    返回:
+    dict - 服务器响应结果
+    """
+    # 预编译模板（常量部分只拼接一次，每次只格式化变化的字段）
+    static = (callsign, path, symbol_table, symbol_code, comment, power, antenna_height, gain,
+              device_info, software_info, phg, text_budget)
+    template = template_cache.get(*static) if template_cache is not None else PacketTemplate(*static)
+    
+    # 自动计算APRS验证码（如果未提供）
+    if aprs_word is None:
+        try:
+            aprs_word = template.verification_code()
+        except Exception as e:
+            aprs_word = "13023"  # 默认值
+            return {"rs": "err", "message": f"验证码计算错误: {str(e)}", "aprs_word": aprs_word}
+    
+    # 构建APRS数据包内容
+    aprs_data, dedupe_key = template.build(latitude, longitude, speed, course, altitude, weather)
+    
+    # 去重检查：键为去掉 HHMMSSh 时间戳后的数据包内容
+    if dedupe_cache is not None and dedupe_cache.check_and_add(dedupe_key):
+        return {
+            "rs": "dup",
+            "message": f"{dedupe_cache.window}秒内已发送过相同数据包，已跳过",
+            "aprs_word": aprs_word,
+            "aprs_data": aprs_data
+        }
+    
+    return post_aprs_data(
+        aprs_data,
+        aprs_word,
+        session=session,
+        url=url,
+        dedupe_cache=dedupe_cache,
+        dedupe_key=dedupe_key,
+        pool=pool
+    )
+
+def post_aprs_data(aprs_data, aprs_word, session=None, url=APRS_SUBMIT_URL, dedupe_cache=None, dedupe_key=None,
+                   pool=None):
+    """
+    把构建好的APRS数据包提交到aprs.tv
+
+    参数:
+    aprs_data    - TNC2 格式数据包 (呼号>目的,路径:信息)
+    aprs_word    - APRS验证码
+    session      - 可选: requests.Session
+    url          - 可选: 提交地址
+    dedupe_cache - 可选: 去重缓存，请求失败或服务器未返回 ok 时移除 dedupe_key 对应的记录
+    dedupe_key   - 可选: 去重键
+    pool         - 可选: EndpointPool，提供时忽略 url/session，自动选择最快的可用服务器
+
+    返回:
+    dict - 服务器响应结果
+    """
+    try:
+        if pool is not None:
+            result = pool.submit(aprs_data, aprs_word)
+        else:
+            _, result = http_submit(url, aprs_data, aprs_word, session=session)
+        
+        # 服务器拒绝（如限流）时数据包没有发出，同样允许窗口内重试
+        if result.get("rs") != "ok" and dedupe_cache is not None and dedupe_key is not None:
+            dedupe_cache.discard(dedupe_key)
+        
+        # 添加验证码信息
+        result["aprs_word"] = aprs_word
+        result["aprs_data"] = aprs_data  # 添加构建的数据包内容
+        return result
+    except Exception as e:
+        # 请求未到达服务器，移除去重记录以便重试
+        if dedupe_cache is not None and dedupe_key is not None:
+            dedupe_cache.discard(dedupe_key)
+        return {
+            "rs": "err",
+            "message": f"请求失败: {str(e)}",
+            "aprs_word": aprs_word,
+            "aprs_data": aprs_data  # 添加构建的数据包内容
+        }
+
+def http_submit(url, aprs_data, aprs_word, session=None, timeout=10):
+    """
+    以 HTTP POST 提交一个数据包（网络错误时抛出异常）
+
+    返回:
+    (状态码, 结果字典)
+    """
+    # 准备POST数据
+    post_data = {
+        "aprs": aprs_data,
+        "isword": aprs_word
+    }
+    
+    # 发送POST请求
+    poster = session.post if session is not None else requests.post
+    response = poster(
+        url,
+        data=post_data,
+        headers=APRS_POST_HEADERS,
+        timeout=timeout
+    )
+    
+    # 尝试解析JSON响应
+    try:
+        result = response.json()
+    except:
+        result = {
+            "rs": "err",
+            "message": f"非JSON响应: {response.status_code} {response.text[:100]}",
+            "raw_response": response.text
+        }
+    return response.status_code, result
+
+def create_http_session(pool_size=10):
+    """
+    创建带连接池的 requests.Session
+
+    参数:
+    pool_size - 每个主机保持的连接数
+
+    返回:
+    requests.Session
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+def station_shard(callsign, shards):
+    """
+    按呼号哈希分配分片（跨进程稳定，同一呼号总在同一分片）
+
+    参数:
+    callsign - 呼号
+    shards   - 分片数
+
+    返回:
+    int - 分片编号 (0 ~ shards-1)
+    """
+    return zlib.crc32(callsign.upper().strip().encode("utf-8")) % shards
+
+def _send_shard(args):
+    """
+    分片工作进程：按顺序发送本分片的全部数据包
+
+    每个进程使用独立的连接池和去重缓存，保证同一台站的发送顺序。
+    指定分析模式时在本进程内分析，结果随统计返回父进程合并。
+    """
+    shard_id, items, url, dedupe_window, endpoints, profile_mode = args
+    profiler = ProfilerHooks()
+    if profile_mode:
+        try:
+            profiler.start(profile_mode)
+        except ValueError:
+            pass  # 解释器不允许再启动分析器时只发送
+    session = create_http_session()
+    pool = EndpointPool(endpoints, probe_interval=0) if endpoints else None
+    cache = PacketDedupeCache(dedupe_window)
+    templates = PacketTemplateCache()
+    results = []
+    metrics = {"shard": shard_id, "pid": os.getpid(), "sent": 0, "ok": 0, "err": 0, "dup": 0, "busy": 0.0}
+    
+    start = time_module.perf_counter()
+    try:
+        for index, spec in items:
+            try:
+                result = send_aprs_packet(session=session, dedupe_cache=cache, url=url, pool=pool,
+                                          template_cache=templates, **spec)
+            except Exception as e:
+                result = {"rs": "err", "message": f"数据包构建失败: {str(e)}"}
+            results.append((index, result))
+            metrics["sent"] += 1
+            status = result.get("rs")
+            metrics[status if status in ("ok", "dup") else "err"] += 1
+    finally:
+        session.close()
+        if pool is not None:
+            pool.stop()
+    metrics["busy"] = time_module.perf_counter() - start
+    metrics["profile"] = profiler.export()
+    return results, metrics
+
+def send_packets_sharded(station_specs, processes=None, url=APRS_SUBMIT_URL, dedupe_window=30, endpoints=None,
+                         profiler=None):
+    """
+    多进程分片批量发送（大规模模拟车队）
+
+    按呼号哈希把数据包分配到多个工作进程，同一呼号的数据包在同一进程内按原顺序发送；
+    每个进程复用自己的连接池，结果和统计在父进程汇总。
+
+    参数:
+    station_specs - 数据包参数列表，每项为 send_aprs_packet 的关键字参数 (必须包含 callsign)
+    processes     - 工作进程数 (默认: CPU 核心数)
+    url           - 提交地址
+    dedupe_window - 每个进程的去重窗口 (秒)
+    endpoints     - 可选: 服务器地址列表，每个进程建立自己的 EndpointPool (提供时忽略 url)
+    profiler      - 可选: 运行中的 ProfilerHooks，各工作进程按相同模式分析并合并到其中
+
+    返回:
+    dict - {"results": 与输入顺序一致的结果列表, "metrics": 汇总统计}
+    """
+    station_specs = list(station_specs)
+    processes = max(1, min(processes or os.cpu_count() or 1, len(station_specs) or 1))
+    
+    # 按呼号分片，分片内保持输入顺序
+    shards = [[] for _ in range(processes)]
+    for index, spec in enumerate(station_specs):
+        shards[station_shard(spec["callsign"], processes)].append((index, spec))
+    profile_mode = profiler.mode if profiler is not None else None
+    jobs = [(shard_id, items, url, dedupe_window, endpoints, profile_mode)
+            for shard_id, items in enumerate(shards) if items]
+    
+    start = time_module.perf_counter()
+    if len(jobs) <= 1:
+        # 单个分片在本进程执行，由调用方的分析器直接覆盖
+        outputs = [_send_shard(job[:-1] + (None,)) for job in jobs]
+    else:
+        with multiprocessing.Pool(processes=len(jobs)) as pool:
+            outputs = pool.map(_send_shard, jobs)
+    elapsed = time_module.perf_counter() - start
+    
+    # 汇总结果和统计
+    results = [None] * len(station_specs)
+    shard_metrics = []
+    totals = {"sent": 0, "ok": 0, "err": 0, "dup": 0}
+    for shard_results, metrics in outputs:
+        for index, result in shard_results:
+            results[index] = result
+        exported = metrics.pop("profile")
+        if profiler is not None:
+            profiler.merge(exported, f"shard-{metrics['shard']}")
+        shard_metrics.append(metrics)
+        for key in totals:
+            totals[key] += metrics[key]
+    
+    totals["processes"] = len(jobs)
+    totals["elapsed"] = elapsed
+    totals["rate"] = totals["sent"] / elapsed if elapsed > 0 else 0.0
+    totals["shards"] = shard_metrics
+    return {"results": results, "metrics": totals}
+
+# 车队发送时隙
+class BeaconSlotPlanner:
+    """
+    信标时隙分配：把每个台站的发送相位分散到整个发送间隔内，避免所有台站在同一秒发送
+
+    新台站按呼号哈希得到初始时隙；设置每秒容量时，已满的时隙向后顺延到下一个有空位的秒。
+    已分配的台站保持不变（重启或增加台站时不会整体漂移），需要时调用 rebalance() 重新均匀分配。
+    """
+
+    def __init__(self, interval, capacity=None, slots=None):
+        """
+        参数:
+        interval - 发送间隔 (秒)
+        capacity - 可选: 每秒最多发送的台站数
+        slots    - 可选: 已有的分配 {呼号: 相位秒}
+        """
+        self.interval = max(1, int(interval))
+        self.capacity = capacity
+        self.slots = {callsign.upper(): int(offset) % self.interval for callsign, offset in (slots or {}).items()}
+
+    def load(self):
+        """每秒的台站数列表 (长度为 interval)"""
+        counts = [0] * self.interval
+        for offset in self.slots.values():
+            counts[offset] += 1
+        return counts
+
+    def assign(self, callsigns):
+        """
+        为新台站分配时隙，移除已不在列表中的台站
+
+        返回:
+        dict - {呼号: 相位秒}
+        """
+        callsigns = [callsign.upper() for callsign in callsigns]
+        wanted = set(callsigns)
+        self.slots = {callsign: offset for callsign, offset in self.slots.items() if callsign in wanted}
+        counts = self.load()
+        for callsign in callsigns:
+            if callsign in self.slots:
+                continue
+            offset = station_shard(callsign, self.interval)
+            if self.capacity:
+                # 线性探测下一个未满的时隙，全部已满时选负载最小的
+                for step in range(self.interval):
+                    candidate = (offset + step) % self.interval
+                    if counts[candidate] < self.capacity:
+                        offset = candidate
+                        break
+                else:
+                    offset = min(range(self.interval), key=counts.__getitem__)
+            self.slots[callsign] = offset
+            counts[offset] += 1
+        return dict(self.slots)
+
+    def rebalance(self, callsigns=None):
+        """
+        重新均匀分配全部台站（按哈希顺序等间隔排列，尽量接近原有相位）
+
+        返回:
+        dict - {呼号: 相位秒}
+        """
+        callsigns = [callsign.upper() for callsign in (callsigns if callsigns is not None else self.slots)]
+        ordered = sorted(set(callsigns), key=lambda callsign: (station_shard(callsign, self.interval), callsign))
+        count = len(ordered)
+        self.slots = {callsign: index * self.interval // count for index, callsign in enumerate(ordered)}
+        return dict(self.slots)
+
+    def preview(self, columns=60, height=8):
+        """
+        每秒负载预览（文本直方图，每列为若干秒中的最大负载）
+
+        返回:
+        str - 多行文本
+        """
+        counts = self.load()
+        columns = max(1, min(columns, self.interval))
+        width = self.interval / columns
+        buckets = [max(counts[int(i * width):max(int((i + 1) * width), int(i * width) + 1)]) for i in range(columns)]
+        peak = max(counts) if counts else 0
+        lines = [
+            f"{len(self.slots)} 个台站，间隔 {self.interval} 秒，每秒峰值 {peak}，"
+            f"平均 {len(self.slots) / self.interval:.2f}，空闲秒数 {counts.count(0)}"
+        ]
+        scale = max(peak, 1)
+        for level in range(height, 0, -1):
+            threshold = scale * level / height
+            lines.append(f"{threshold:6.1f} |" + "".join("#" if value >= threshold else " " for value in buckets))
+        lines.append("       +" + "-" * columns)
+        lines.append(f"        0s{' ' * max(0, columns - len(str(self.interval)) - 3)}{self.interval}s")
+        return "\n".join(lines)
+
+    def save(self, path):
+        """保存分配结果 (JSON)"""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"interval": self.interval, "slots": self.slots}, f, ensure_ascii=False, indent=2)
+
+    @classmethod
+    def load_file(cls, path, interval, capacity=None):
+        """读取分配结果，文件不存在或间隔不同时重新开始"""
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return cls(interval, capacity)
+        slots = data.get("slots") if data.get("interval") == int(interval) else None
+        return cls(interval, capacity, slots)
+
+def run_fleet_schedule(station_specs, planner, rounds=None, workers=8, url=APRS_SUBMIT_URL,
+                       endpoints=None, dedupe_window=30, stop_event=None, on_result=None, profiler=None):
+    """
+    按时隙循环发送车队数据包
+
+    每个台站的发送时刻为 间隔起点 + 相位，间隔起点按墙钟对齐，重启后相位不变。
+    到期的台站交给线程池发送，单个慢请求不会推迟其他台站。
+
+    参数:
+    station_specs - 数据包参数列表 (send_aprs_packet 参数，必须包含 callsign)
+    planner       - BeaconSlotPlanner (已分配时隙)
+    rounds        - 可选: 每个台站发送的轮数，None 表示一直运行直到 stop_event
+    workers       - 发送线程数
+    url           - 提交地址
+    endpoints     - 可选: 服务器地址列表 (EndpointPool)
+    dedupe_window - 去重窗口 (秒)
+    stop_event    - 可选: threading.Event，设置后停止
+    on_result     - 可选: on_result(呼号, 结果) 每次发送后回调 (在发送线程中调用)
+    profiler      - 可选: ProfilerHooks，每次发送在发送线程中通过 profiler.call 分析
+
+    返回:
+    dict - 统计 {"sent", "ok", "err", "dup"}
+    """
+    stop_event = stop_event or threading.Event()
+    profiler = profiler or ProfilerHooks()
+    slots = planner.assign([spec["callsign"] for spec in station_specs])
+    session = create_http_session(pool_size=workers)
+    pool = EndpointPool(endpoints).start() if endpoints else None
+    cache = PacketDedupeCache(dedupe_window)
+    templates = PacketTemplateCache(size=max(1024, len(station_specs)))
+    totals = {"sent": 0, "ok": 0, "err": 0, "dup": 0}
+    lock = threading.Lock()
+    
+    def send(spec):
+        try:
+            result = send_aprs_packet(session=session, dedupe_cache=cache, url=url, pool=pool,
+                                      template_cache=templates, **spec)
+        except Exception as e:
+            result = {"rs": "err", "message": f"数据包构建失败: {str(e)}"}
+        status = result.get("rs")
+        with lock:
+            totals["sent"] += 1
+            totals[status if status in ("ok", "dup") else "err"] += 1
+        if on_result is not None:
+            on_result(spec["callsign"], result)
+    
+    # 定时堆: (到期时间, 序号, 已发送轮数)
+    now = time_module.time()
+    base = now - now % planner.interval
+    heap = []
+    for index, spec in enumerate(station_specs):
+        due = base + slots[spec["callsign"].upper()]
+        if due < now:
+            due += planner.interval
+        heap.append((due, index, 0))
+    heapq.heapify(heap)
+    
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="aprs-fleet")
+    try:
+        while heap and not stop_event.is_set():
+            due, index, sent = heap[0]
+            if stop_event.wait(max(0.0, due - time_module.time())):
+                break
+            heapq.heappop(heap)
+            executor.submit(profiler.call, "fleet_send", send, station_specs[index])
+            if rounds is None or sent + 1 < rounds:
+                heapq.heappush(heap, (due + planner.interval, index, sent + 1))
+    finally:
+        executor.shutdown(wait=True)
+        session.close()
+        if pool is not None:
+            pool.stop()
+    return totals
+
+# 多服务器故障切换
+APRS_IS_DEFAULT_PORT = 14580
+
+def aprsis_client_packet(tnc2):
+    """
+    去掉路径中的 q 结构及其后的 IGate 呼号（如 ",qAC,BG2LBF"）
+
+    q 结构由接收数据包的 APRS-IS 服务器添加，客户端端口转发用户路径时不能带上。
+    """
+    header, sep, info = tnc2.partition(":")
+    hops = header.split(",")
+    for index, hop in enumerate(hops[1:], 1):
+        if re.fullmatch(r"qA[A-Za-z]", hop):
+            return ",".join(hops[:index]) + sep + info
+    return tnc2
+
+def _aprsis_readline(sock, buffer):
+    """从 APRS-IS 连接读取一行（超时使用 socket 超时，连接关闭时抛出 ConnectionError）"""
+    while b"\n" not in buffer:
+        if len(buffer) > 4096:
+            raise ValueError("APRS-IS 服务器响应行过长")
+        chunk = sock.recv(512)
+        if not chunk:
+            raise ConnectionError("APRS-IS 服务器关闭了连接")
+        buffer += chunk
+    line, _, rest = bytes(buffer).partition(b"\n")
+    buffer[:] = rest
+    return line.decode("utf-8", errors="replace").strip()
+
+def _aprsis_drain(sock):
+    """
+    读取并丢弃服务器积压的数据（保活注释、转发的数据包）
+
+    返回:
+    bool - 连接仍可用时为 True，服务器已关闭连接时为 False
+    """
+    try:
+        while select.select([sock], [], [], 0)[0]:
+            if not sock.recv(4096):
+                return False
+    except OSError:
+        return False
+    return True
+
+class SubmitEndpoint:
+    """
+    一个提交服务器（HTTP 提交地址或 APRS-IS 服务器）及其延迟/健康状态
+
+    地址格式: https://host/path (HTTP 提交) 或 aprsis://host:port (APRS-IS)
+    """
+
+    def __init__(self, address, timeout=10, min_timeout=2.0, timeout_factor=4.0, alpha=0.3, max_failures=3):
+        """
+        参数:
+        address        - 服务器地址
+        timeout        - 最长超时 (秒)
+        min_timeout    - 自适应超时下限 (秒)
+        timeout_factor - 自适应超时 = EWMA 延迟 × 该系数
+        alpha          - EWMA 平滑系数
+        max_failures   - 连续失败多少次后标记为不可用 (等待健康探测恢复)
+        """
+        self.address = address.strip()
+        self.kind = "aprsis" if self.address.lower().startswith(("aprsis://", "tcp://")) else "http"
+        host_port = self.address.split("://", 1)[-1].split("/", 1)[0]
+        host, _, port = host_port.rpartition(":")
+        if not host or not port.isdigit():
+            host = host_port
+            if self.kind == "aprsis":
+                port = APRS_IS_DEFAULT_PORT
+            else:
+                port = 443 if self.address.lower().startswith("https") else 80
+        self.host = host
+        self.port = int(port)
+        
+        self.max_timeout = timeout
+        self.min_timeout = min_timeout
+        self.timeout_factor = timeout_factor
+        self.alpha = alpha
+        self.max_failures = max_failures
+        
+        self.ewma = None                      # 平均延迟 (秒)，无样本时为 None
+        self.failures = 0                     # 连续失败次数
+        self.healthy = True
+        self.sent = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+        self._session = None
+        self._aprsis = None                   # APRS-IS 长连接 (socket, 登录呼号, 接收缓冲)
+
+    def timeout(self):
+        """根据 EWMA 延迟计算本次请求超时，避免慢服务器每次都等满最长超时"""
+        if self.ewma is None:
+            return self.max_timeout
+        return min(self.max_timeout, max(self.min_timeout, self.ewma * self.timeout_factor))
+
+    def observe(self, latency, ok, probe=False):
+        """
+        记录一次请求或探测结果
+
+        探测也是真实的应用层请求，延迟同样计入 EWMA；但探测成功只恢复可用状态，
+        连续失败次数只在真实提交成功后清零（探测能通过不代表提交能成功）。
+        请求失败时按 max(实际耗时, 本次超时) 计入 EWMA，服务器变慢超过超时上限时
+        超时随失败次数逐步放宽到 max_timeout，而不是每次都在旧的超时处失败。
+        """
+        with self._lock:
+            if ok or self.ewma is not None:
+                if not ok:
+                    latency = max(latency, self.timeout())
+                self.ewma = latency if self.ewma is None else self.alpha * latency + (1 - self.alpha) * self.ewma
+            if ok:
+                if not probe:
+                    self.failures = 0
+                self.healthy = True
+            else:
+                self.failures += 1
+                self.errors += 1
+                if self.failures >= self.max_failures:
+                    self.healthy = False
+
+    def submit(self, aprs_data, aprs_word):
+        """
+        向本服务器提交数据包（失败时抛出异常）
+
+        返回:
+        dict - 服务器响应结果
+        """
+        timeout = self.timeout()
+        start = time_module.perf_counter()
+        try:
+            if self.kind == "aprsis":
+                result = self._submit_aprsis(aprs_data, aprs_word, timeout)
+            else:
+                if self._session is None:
+                    self._session = create_http_session(pool_size=2)
+                status, result = http_submit(self.address, aprs_data, aprs_word, session=self._session, timeout=timeout)
+                if status >= 500:
+                    raise OSError(f"服务器错误: {status}")
+        except Exception:
+            self.observe(time_module.perf_counter() - start, False)
+            raise
+        self.observe(time_module.perf_counter() - start, True)
+        self.sent += 1
+        result["endpoint"] = self.address
+        return result
+
+    def _submit_aprsis(self, aprs_data, aprs_word, timeout):
+        """
+        通过 APRS-IS 长连接发送（呼号变化或连接断开时重新登录）
+
+        APRS-IS 不对单个数据包回复确认，"ok" 表示登录已验证且数据包已写入连接；
+        发送前会读取服务器积压的数据，发现连接已被服务器关闭时重新登录。
+        """
+        callsign = aprs_data.split(">", 1)[0].upper()
+        packet = aprsis_client_packet(aprs_data)
+        with self._lock:
+            sock, login, buffer = self._aprsis or (None, None, None)
+            try:
+                if sock is not None and (login != callsign or not _aprsis_drain(sock)):
+                    sock.close()
+                    sock = None
+                if sock is None:
+                    sock = socket.create_connection((self.host, self.port), timeout=timeout)
+                    buffer = bytearray()
+                    self._aprsis = (sock, callsign, buffer)
+                    sock.settimeout(timeout)
+                    sock.sendall(f"user {callsign} pass {aprs_word} vers APRSTOOL-BG5FNL 1.0\r\n".encode("utf-8"))
+                    # 跳过欢迎信息等注释行，直到收到登录结果 "# logresp 呼号 verified|unverified, ..."
+                    while True:
+                        line = _aprsis_readline(sock, buffer)
+                        if line.startswith("# logresp"):
+                            break
+                    status = line.split()[3].rstrip(",") if len(line.split()) > 3 else ""
+                    if status != "verified":
+                        raise ValueError(f"APRS-IS 登录未验证: {line}")
+                sock.settimeout(timeout)
+                sock.sendall(packet.encode("utf-8") + b"\r\n")
+            except Exception:
+                if sock is not None:
+                    sock.close()
+                self._aprsis = None
+                raise
+        return {"rs": "ok", "message": f"已写入 APRS-IS {self.host}:{self.port}（服务器不回复单包确认）"}
+
+    def probe(self):
+        """
+        健康探测（不发送数据包）
+
+        HTTP 服务器发送 HEAD 请求，5xx 响应视为失败；APRS-IS 服务器建连后读取欢迎行。
+        使用与提交相同的自适应超时，只接受 TCP 连接但不响应或响应慢的服务器不会被恢复。
+        """
+        timeout = self.timeout()
+        start = time_module.perf_counter()
+        try:
+            if self.kind == "aprsis":
+                with socket.create_connection((self.host, self.port), timeout=timeout) as sock:
+                    sock.settimeout(timeout)
+                    line = _aprsis_readline(sock, bytearray())
+                if not line.startswith("#"):
+                    raise ValueError(f"APRS-IS 欢迎行无效: {line[:40]}")
+            else:
+                if self._session is None:
+                    self._session = create_http_session(pool_size=2)
+                response = self._session.head(self.address, headers=APRS_POST_HEADERS, timeout=timeout)
+                # 501: 服务器不支持 HEAD，但已正常响应
+                if response.status_code >= 500 and response.status_code != 501:
+                    raise OSError(f"服务器错误: {response.status_code}")
+        except Exception:
+            self.observe(time_module.perf_counter() - start, False, probe=True)
+            return False
+        self.observe(time_module.perf_counter() - start, True, probe=True)
+        return True
+
+    def close(self):
+        """关闭连接"""
+        with self._lock:
+            if self._aprsis is not None:
+                self._aprsis[0].close()
+                self._aprsis = None
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+    def stats(self):
+        """状态快照"""
+        return {
+            "address": self.address,
+            "healthy": self.healthy,
+            "ewma_ms": None if self.ewma is None else self.ewma * 1000,
+            "sent": self.sent,
+            "errors": self.errors,
+        }
+
+class EndpointPool:
+    """
+    多服务器提交池：按 EWMA 延迟选择最快的可用服务器，失败自动切换到下一个
+
+    可选对冲请求：首选服务器在 hedge_after 秒内没有返回时，并行向下一个服务器发送，
+    先成功的结果生效（APRS-IS 会丢弃 30 秒内的重复数据包，重复提交不会产生重复位置）。
+    后台健康探测线程定期向各服务器发送探测请求，不可用的服务器在探测成功后恢复。
+    """
+
+    def __init__(self, addresses, timeout=10, hedge_after=None, probe_interval=60):
+        """
+        参数:
+        addresses      - 服务器地址列表（顺序即无延迟数据时的优先级）
+        timeout        - 单个服务器最长超时 (秒)
+        hedge_after    - 可选: 对冲等待时间 (秒)，None 表示只做顺序故障切换
+        probe_interval - 健康探测间隔 (秒)，0 表示不探测
+        """
+        self.endpoints = [SubmitEndpoint(address, timeout=timeout) for address in addresses if address.strip()]
+        if not self.endpoints:
+            raise ValueError("至少需要一个服务器地址")
+        self.hedge_after = hedge_after
+        self.probe_interval = probe_interval
+        self._executor = ThreadPoolExecutor(max_workers=max(2, len(self.endpoints)), thread_name_prefix="aprs-submit")
+        self._stop = threading.Event()
+        self._probe_thread = None
+
+    def ranked(self):
+        """
+        按 (不可用, 最近失败, 延迟, 配置顺序) 排序的服务器列表；全部不可用时仍全部尝试
+
+        还没有延迟数据的服务器按 0 排序，保证每个服务器至少被实际测量一次。
+        """
+        order = {id(endpoint): index for index, endpoint in enumerate(self.endpoints)}
+        return sorted(
+            self.endpoints,
+            key=lambda e: (not e.healthy, e.failures > 0, e.ewma or 0.0, order[id(e)])
+        )
+
+    def best(self):
+        """当前最快的可用服务器"""
+        return self.ranked()[0]
+
+    def submit(self, aprs_data, aprs_word):
+        """
+        提交数据包，依次故障切换（或对冲）直到有服务器成功
+
+        返回:
+        dict - 服务器响应结果（含 endpoint 字段）
+
+        异常:
+        最后一个服务器的异常 - 所有服务器都失败时
+        """
+        if self.hedge_after is None:
+            error = None
+            for endpoint in self.ranked():
+                try:
+                    return endpoint.submit(aprs_data, aprs_word)
+                except Exception as e:
+                    error = e
+            raise error
+        return self._submit_hedged(aprs_data, aprs_word)
+
+    def _submit_hedged(self, aprs_data, aprs_word):
+        """对冲提交：首选服务器超过 hedge_after 秒未返回或失败时启动下一个"""
+        remaining = self.ranked()
+        running = set()
+        error = None
+        while remaining or running:
+            if remaining:
+                running.add(self._executor.submit(remaining.pop(0).submit, aprs_data, aprs_word))
+            done, running = wait(running, timeout=self.hedge_after if remaining else None, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    return future.result()
+                except Exception as e:
+                    error = e
+        raise error
+
+    def start(self):
+        """启动健康探测线程"""
+        if self.probe_interval and self._probe_thread is None:
+            self._probe_thread = threading.Thread(target=self._probe_loop, daemon=True)
+            self._probe_thread.start()
+        return self
+
+    def _probe_loop(self):
+        while not self._stop.is_set():
+            for endpoint in self.endpoints:
+                if self._stop.is_set():
+                    break
+                endpoint.probe()
+            self._stop.wait(self.probe_interval)
+
+    def stop(self):
+        """停止探测并关闭连接"""
+        self._stop.set()
+        self._executor.shutdown(wait=False)
+        for endpoint in self.endpoints:
+            endpoint.close()
+
+    def stats(self):
+        """各服务器状态（按当前优先级排序）"""
+        return [endpoint.stats() for endpoint in self.ranked()]
+
+# KISS 协议特殊字节
+KISS_FEND = 0xC0
+KISS_FESC = 0xDB
+KISS_TFEND = 0xDC
+KISS_TFESC = 0xDD
+
+# APRS-IS 专用路径（q 结构、TCPIP 等），射频发送时从这里截断
+AX25_INTERNET_PATH_PREFIXES = ("TCPIP", "TCPXX", "NOGATE", "RFONLY", "qA")
+
+class AX25Encoder:
+    """
+    AX.25 UI 帧 / KISS 帧编码器
+
+    把 "呼号>目的,路径:信息" 格式 (TNC2) 的数据包编码为 AX.25 UI 帧并加上 KISS 封装。
+    帧数据写入预分配的缓冲区，返回 memoryview，不随每帧重新分配；
+    返回的视图在下一次编码前有效，需要保留时请自行 bytes() 复制。
+    """
+
+    MAX_DIGIPEATERS = 8
+    MAX_INFO = 256
+    # 目的 + 源 + 8个中继地址，各7字节；控制字段、PID 各1字节
+    MAX_FRAME = 7 * (2 + MAX_DIGIPEATERS) + 2 + MAX_INFO
+    # 最坏情况下每字节都需要转义，再加首尾 FEND 和命令字节
+    MAX_KISS = 2 * MAX_FRAME + 3
+
+    def __init__(self):
+        self._frame = bytearray(self.MAX_FRAME)
+        self._frame_view = memoryview(self._frame)
+        self._kiss = bytearray(self.MAX_KISS)
+        self._kiss_view = memoryview(self._kiss)
+
+    @staticmethod
+    def parse_tnc2(tnc2):
+        """
+        拆分 TNC2 格式数据包
+
+        返回:
+        tuple - (源呼号, 目的呼号, 中继路径列表, 信息字段)
+        """
+        header, sep, info = tnc2.partition(":")
+        if not sep:
+            raise ValueError(f"数据包缺少信息字段: {tnc2[:40]}")
+        source, sep, rest = header.partition(">")
+        if not sep:
+            raise ValueError(f"数据包缺少目的地址: {tnc2[:40]}")
+        hops = rest.split(",")
+        destination = hops[0]
+        
+        # 射频路径只保留 APRS-IS 结构之前的中继
+        path = []
+        for hop in hops[1:]:
+            if hop.rstrip("*").startswith(AX25_INTERNET_PATH_PREFIXES):
+                break
+            path.append(hop)
+        return source, destination, path, info
+
+    def _put_address(self, offset, address, ssid_bits):
+        """写入一个7字节地址字段"""
+        repeated = address.endswith("*")
+        address = address.rstrip("*").upper()
+        call, _, ssid = address.partition("-")
+        if not (1 <= len(call) <= 6) or not call.isalnum() or not call.isascii():
+            raise ValueError(f"无效的AX.25呼号: {address}")
+        ssid = int(ssid) if ssid else 0
+        if not 0 <= ssid <= 15:
+            raise ValueError(f"无效的SSID: {address}")
+        
+        frame = self._frame
+        for i in range(6):
+            frame[offset + i] = (ord(call[i]) if i < len(call) else 0x20) << 1
+        frame[offset + 6] = ssid_bits | (ssid << 1) | (0x80 if repeated else 0)
+        return offset + 7
+
+    def encode_ax25(self, tnc2):
+        """
+        编码 AX.25 UI 帧（不含 FCS，由 TNC 计算）
+
+        返回:
+        memoryview - 帧数据
+        """
+        source, destination, path, info = self.parse_tnc2(tnc2)
+        if len(path) > self.MAX_DIGIPEATERS:
+            raise ValueError(f"中继路径超过{self.MAX_DIGIPEATERS}个: {','.join(path)}")
+        info_bytes = info.encode("utf-8")
+        if len(info_bytes) > self.MAX_INFO:
+            raise ValueError(f"信息字段超过{self.MAX_INFO}字节: {len(info_bytes)}")
+        
+        # 目的地址 C 位为1，源地址 C 位为0（AX.25 v2 命令帧）
+        offset = self._put_address(0, destination.rstrip("*"), 0xE0)
+        offset = self._put_address(offset, source.rstrip("*"), 0x60)
+        for hop in path:
+            offset = self._put_address(offset, hop, 0x60)
+        # 最后一个地址的扩展位置1
+        self._frame[offset - 1] |= 0x01
+        
+        self._frame[offset] = 0x03      # 控制字段: UI 帧
+        self._frame[offset + 1] = 0xF0  # PID: 无第三层协议
+        offset += 2
+        self._frame[offset:offset + len(info_bytes)] = info_bytes
+        offset += len(info_bytes)
+        return self._frame_view[:offset]
+
+    def encode_kiss(self, tnc2, port=0):
+        """
+        编码 KISS 数据帧
+
+        参数:
+        tnc2 - TNC2 格式数据包
+        port - KISS 端口号 (0-15)
+
+        返回:
+        memoryview - KISS 帧数据 (含首尾 FEND)
+        """
+        frame = self.encode_ax25(tnc2)
+        kiss = self._kiss
+        kiss[0] = KISS_FEND
+        kiss[1] = (port & 0x0F) << 4  # 数据帧命令
+        offset = 2
+        
+        # 常见情况下没有需要转义的字节，直接整段复制
+        if KISS_FEND not in frame and KISS_FESC not in frame:
+            kiss[offset:offset + len(frame)] = frame
+            offset += len(frame)
+        else:
+            for byte in frame:
+                if byte == KISS_FEND:
+                    kiss[offset] = KISS_FESC
+                    kiss[offset + 1] = KISS_TFEND
+                    offset += 2
+                elif byte == KISS_FESC:
+                    kiss[offset] = KISS_FESC
+                    kiss[offset + 1] = KISS_TFESC
+                    offset += 2
+                else:
+                    kiss[offset] = byte
+                    offset += 1
+        kiss[offset] = KISS_FEND
+        return self._kiss_view[:offset + 1]
+
+def set_serial_raw(fd, baudrate=9600):
+    """
+    把串口/pty 设为原始模式并设置波特率（不是终端设备时不做处理）
+
+    关闭换行转换 (ONLCR/ICRNL)、规范模式和回显，二进制数据原样收发。
+    """
+    if termios is None or not os.isatty(fd):
+        return
+    attrs = termios.tcgetattr(fd)
+    speed = getattr(termios, f"B{baudrate}", termios.B9600)
+    attrs[0] = termios.IGNPAR                                   # iflag
+    attrs[1] = 0                                                # oflag
+    attrs[2] = termios.CS8 | termios.CLOCAL | termios.CREAD     # cflag
+    attrs[3] = 0                                                # lflag: 关闭规范模式和回显
+    attrs[4] = attrs[5] = speed                                 # 输入/输出波特率
+    attrs[6][termios.VMIN] = 1
+    attrs[6][termios.VTIME] = 0
+    termios.tcsetattr(fd, termios.TCSANOW, attrs)
+
+class KissTransport:
+    """
+    KISS 输出（本地 TNC / 声卡调制解调器）
+
+    支持 KISS TCP 端口 (如 Direwolf 的 8001) 或 pty/串口设备文件。
+    连接在首次发送时建立，写入失败后自动关闭，下次发送时重连。
+    """
+
+    def __init__(self, host="127.0.0.1", port=8001, device=None, kiss_port=0, timeout=5, baudrate=9600):
+        self.host = host
+        self.port = port
+        self.device = device        # 设备路径，设置后忽略 host/port
+        self.baudrate = baudrate    # 串口波特率
+        self.kiss_port = kiss_port
+        self.timeout = timeout
+        self.frames_sent = 0
+        self._sock = None
+        self._fd = None
+        self._encoder = AX25Encoder()
+        self._lock = threading.Lock()
+
+    def open(self):
+        """建立连接"""
+        if self.device:
+            if self._fd is None:
+                flags = os.O_WRONLY | getattr(os, "O_NOCTTY", 0)
+                fd = os.open(self.device, flags)
+                try:
+                    set_serial_raw(fd, self.baudrate)
+                except Exception:
+                    os.close(fd)
+                    raise
+                self._fd = fd
+        elif self._sock is None:
+            self._sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+            self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def close(self):
+        """关闭连接"""
+        with self._lock:
+            self._close()
+
+    def _close(self):
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            finally:
+                self._sock = None
+        if self._fd is not None:
+            try:
+                os.close(self._fd)
+            finally:
+                self._fd = None
+
+    def send(self, tnc2):
+        """
+        编码并发送一个数据包
+
+        返回:
+        int - 写入的字节数
+        """
+        with self._lock:
+            frame = self._encoder.encode_kiss(tnc2, self.kiss_port)
+            try:
+                self.open()
+                if self._fd is not None:
+                    written = 0
+                    while written < len(frame):
+                        written += os.write(self._fd, frame[written:])
+                else:
+                    self._sock.sendall(frame)
+            except OSError:
+                self._close()
+                raise
+            self.frames_sent += 1
+            return len(frame)
+
+    def __enter__(self):
+        with self._lock:
+            self.open()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+# base-91 编码字符起点 ("!" = 0)
+BASE91_OFFSET = 33
+
+def encode_base91(value, width):
+    """
+    把非负整数编码为定长 base-91 字符串
+
+    参数:
+    value - 整数 (0 ~ 91^width - 1)
+    width - 字符数
+
+    返回:
+    str - base-91 字符串
+    """
+    chars = []
+    for _ in range(width):
+        value, digit = divmod(value, 91)
+        chars.append(chr(digit + BASE91_OFFSET))
+    return "".join(reversed(chars))
+
+# 传感器文本中的 "名称:数值" / "名称=数值"，与设备信息格式一致 (如 rssi:-56 temp:42°C)
+SENSOR_FIELD_PATTERN = re.compile(r"([A-Za-z_]\w*)\s*[:=]\s*(-?\d+(?:\.\d+)?)")
+
+def parse_sensor_text(text):
+    """
+    解析传感器文本行
+
+    返回:
+    dict - 小写名称 -> 数值
+    """
+    return {name.lower(): float(value) for name, value in SENSOR_FIELD_PATTERN.findall(text)}
+
+class TelemetryChannel:
+    """遥测模拟通道定义（名称、单位、量程、上报的统计量、对应的传感器字段）"""
+
+    def __init__(self, name, unit, low, high, stat="mean", field=None):
+        self.name = name      # 通道名称 (PARM)
+        self.field = (field or name).lower()  # 匹配的传感器字段 (不区分大小写)，默认同名称
+        self.unit = unit
+        self.low = low        # 量程下限
+        self.high = high      # 量程上限
+        self.stat = stat      # 上报的统计量: min / mean / max
+
+    def quantize(self, value, levels):
+        """把数值量化为 0 ~ levels 的整数"""
+        ratio = (value - self.low) / (self.high - self.low)
+        return min(max(round(ratio * levels), 0), levels)
+
+    def coefficients(self, levels):
+        """EQNS 系数 (a, b, c)：数值 = a*x² + b*x + c"""
+        return 0, (self.high - self.low) / levels, self.low
+
+# 默认遥测通道（对应默认设备信息 rssi / sat / temp / vol / mileage）
+DEFAULT_TELEMETRY_CHANNELS = (
+    TelemetryChannel("RSSI", "dBm", -150, 0),
+    TelemetryChannel("Sat", "sats", 0, 50, stat="min"),
+    TelemetryChannel("Temp", "degC", -40, 85, stat="max"),
+    TelemetryChannel("Vol", "V", 0, 30, stat="min"),
+    TelemetryChannel("Dist", "km", 0, 100000, stat="max", field="mileage"),
+)
+
+# APRS 规范中 PARM / UNIT 第 1~5 个模拟通道名称的最大长度
+TELEMETRY_LABEL_LIMITS = (7, 7, 6, 6, 5)
+
+class TelemetryRing:
+    """
+    固定大小的采样环形缓冲区
+
+    高频采样写入预分配的数组，信标发送时统计上次以来的采样
+    (超过容量时只统计最近的 capacity 个)，内存占用固定。
+    """
+
+    def __init__(self, capacity=1024):
+        self.capacity = capacity
+        self._samples = array("d", bytes(8 * capacity))
+        self._head = 0      # 下一个写入位置
+        self._pending = 0   # 上次统计以来的采样数
+        self.last = None    # 最近一次采样值
+
+    def add(self, value):
+        self._samples[self._head] = value
+        self._head = (self._head + 1) % self.capacity
+        self._pending = min(self._pending + 1, self.capacity)
+        self.last = value
+
+    def summary(self):
+        """
+        统计上次消费以来的采样（不清零）
+
+        返回:
+        dict - {"min", "mean", "max", "count"}，没有新采样时返回 None
+        """
+        count = self._pending
+        if not count:
+            return None
+        start = (self._head - count) % self.capacity
+        if start + count <= self.capacity:
+            window = self._samples[start:start + count]
+        else:
+            window = self._samples[start:] + self._samples[:self._head]
+        return {"min": min(window), "mean": sum(window) / count, "max": max(window), "count": count}
+
+    def consume(self, count):
+        """标记最早的 count 个待统计采样已发送（统计之后新到的采样保留到下个周期）"""
+        self._pending = max(0, self._pending - count)
+
+class TelemetryAggregator:
+    """按通道汇总传感器采样（线程安全）"""
+
+    def __init__(self, channels=DEFAULT_TELEMETRY_CHANNELS, capacity=1024):
+        self.channels = list(channels)
+        self._rings = {channel.field: TelemetryRing(capacity) for channel in self.channels}
+        self._lock = threading.Lock()
+        self.samples = 0
+
+    def add_sample(self, values):
+        """
+        添加一次采样
+
+        参数:
+        values - dict 名称 -> 数值；不属于任何通道的名称会被忽略
+        """
+        with self._lock:
+            for name, value in values.items():
+                ring = self._rings.get(name.lower())
+                if ring is not None:
+                    ring.add(float(value))
+                    self.samples += 1
+
+    def snapshot(self):
+        """
+        统计本周期各通道的数值（按通道配置的统计量），不消费采样
+
+        返回:
+        (values, counts) - 每个通道的数值 (本周期无采样时沿用最近值，从未采样为 None) 和参与统计的采样数
+        """
+        values = []
+        counts = []
+        with self._lock:
+            for channel in self.channels:
+                ring = self._rings[channel.field]
+                stats = ring.summary()
+                values.append(stats[channel.stat] if stats else ring.last)
+                counts.append(stats["count"] if stats else 0)
+        return values, counts
+
+    def consume(self, counts):
+        """遥测发出后消费 snapshot 统计过的采样"""
+        with self._lock:
+            for channel, count in zip(self.channels, counts):
+                self._rings[channel.field].consume(count)
+
+class SensorSource:
+    """
+    传感器数据源：在后台线程中按固定频率调用函数获取采样（函数返回 dict 名称 -> 数值）并写入汇总器
+
+    文件、UDP 等推送式数据源继承本类并重写 _run。
+    """
+
+    def __init__(self, aggregator, func=None, rate=10):
+        self.aggregator = aggregator
+        self.func = func
+        self.period = 1.0 / rate
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+
+    def _run(self):
+        if self.func is None:
+            return
+        while not self._stop.wait(self.period):
+            try:
+                values = self.func()
+            except Exception:
+                continue
+            if values:
+                self.aggregator.add_sample(values)
+
+class FileSensorSource(SensorSource):
+    """
+    跟随读取文本文件（类似 tail -f）
+
+    每行一次采样，格式与设备信息相同，如 "rssi:-56 sat:20 temp:42 vol:4.2"。
+    """
+
+    def __init__(self, aggregator, path, from_start=False, poll_interval=0.2):
+        super().__init__(aggregator)
+        self.path = path
+        self.from_start = from_start
+        self.poll_interval = poll_interval
+
+    def _run(self):
+        with open(self.path, encoding="utf-8", errors="replace") as f:
+            if not self.from_start:
+                f.seek(0, os.SEEK_END)
+            pending = ""
+            while not self._stop.is_set():
+                chunk = f.readline()
+                if not chunk:
+                    self._stop.wait(self.poll_interval)
+                    continue
+                pending += chunk
+                if not pending.endswith("\n"):
+                    continue  # 不完整的行，等待剩余部分
+                values = parse_sensor_text(pending)
+                pending = ""
+                if values:
+                    self.aggregator.add_sample(values)
+
+class SocketSensorSource(SensorSource):
+    """接收 UDP 数据报，每个数据报一次采样（文本格式同 FileSensorSource）"""
+
+    def __init__(self, aggregator, host="127.0.0.1", port=9100):
+        super().__init__(aggregator)
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind((host, port))
+        self.sock.settimeout(0.5)
+
+    @property
+    def address(self):
+        return self.sock.getsockname()
+
+    def stop(self):
+        super().stop()
+        self.sock.close()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                data = self.sock.recv(2048)
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            self._handle_datagram(data)
+
+    def _handle_datagram(self, data):
+        values = parse_sensor_text(data.decode("utf-8", errors="replace"))
+        if values:
+            self.aggregator.add_sample(values)
+
+class PacketFeedSource(SocketSensorSource):
+    """
+    UDP 数据包接收源：每行一个 TNC2 格式数据包，交给 handler.handle_packet 处理
+    （用作消息确认的接收源或本地模拟）
+    """
+
+    def _handle_datagram(self, data):
+        for line in data.decode("utf-8", errors="replace").splitlines():
+            if line.strip():
+                self.aggregator.handle_packet(line.strip())
+
+def create_sensor_source(spec, sink):
+    """
+    根据配置字符串创建传感器数据源（未启动）
+
+    参数:
+    spec - "udp:端口" 或文件路径
+    sink - 接收采样的对象 (需提供 add_sample 方法)
+
+    返回:
+    SensorSource
+    """
+    spec = spec.strip()
+    if spec.lower().startswith("udp:"):
+        return SocketSensorSource(sink, port=int(spec[4:]))
+    if not os.path.exists(spec):
+        raise OSError(f"文件不存在: {spec}")
+    return FileSensorSource(sink, spec)
+
+class TelemetryEncoder:
+    """
+    APRS 遥测编码
+
+    mode="standard": 独立的 T# 遥测包 (8位数值)
+    mode="base91":   附加在位置注释中的 base-91 压缩遥测 |ss1122334455|
+    两种模式下 PARM/UNIT/EQNS 定义都只发送到服务器接受为止。
+    """
+
+    # 各模式的数值量化上限和序号范围
+    LEVELS = {"standard": 255, "base91": 8280}
+    SEQUENCE = {"standard": 1000, "base91": 8281}
+
+    def __init__(self, aggregator, mode="standard"):
+        if mode not in self.LEVELS:
+            raise ValueError(f"未知的遥测模式: {mode}")
+        if len(aggregator.channels) > len(TELEMETRY_LABEL_LIMITS):
+            raise ValueError(f"遥测最多 {len(TELEMETRY_LABEL_LIMITS)} 个模拟通道")
+        for channel, limit in zip(aggregator.channels, TELEMETRY_LABEL_LIMITS):
+            if len(channel.name) > limit or len(channel.unit) > limit:
+                raise ValueError(f"遥测通道 {channel.name}/{channel.unit} 超过 {limit} 个字符")
+        self.aggregator = aggregator
+        self.mode = mode
+        self.sequence = 0
+        self.definitions_sent = False
+        self._lock = threading.Lock()
+
+    @property
+    def channels(self):
+        return self.aggregator.channels
+
+    def _raw_values(self, values):
+        levels = self.LEVELS[self.mode]
+        return [0 if value is None else channel.quantize(value, levels)
+                for channel, value in zip(self.channels, values)]
+
+    def definition_packets(self, callsign, path):
+        """构建 PARM / UNIT / EQNS 定义消息（发给自己的APRS消息）"""
+        header = f"{callsign}>APRSTV,{path}::{callsign.upper():<9}:"
+        levels = self.LEVELS[self.mode]
+        eqns = []
+        for channel in self.channels:
+            eqns.extend(f"{coefficient:.6g}" for coefficient in channel.coefficients(levels))
+        return [
+            header + "PARM." + ",".join(channel.name for channel in self.channels),
+            header + "UNIT." + ",".join(channel.unit for channel in self.channels),
+            header + "EQNS." + ",".join(eqns),
+        ]
+
+    def standard_packet(self, callsign, path, values):
+        """构建 T# 遥测包"""
+        raw = ",".join(f"{value:03d}" for value in self._raw_values(values))
+        return f"{callsign}>APRSTV,{path}:T#{self.sequence:03d},{raw},00000000"
+
+    def compressed_comment(self, values):
+        """构建 base-91 压缩遥测注释 |ss1122...|"""
+        raw = "".join(encode_base91(value, 2) for value in self._raw_values(values))
+        return f"|{encode_base91(self.sequence, 2)}{raw}|"
+
+    def prepare(self, callsign, path):
+        """
+        统计本周期采样并生成遥测（不消费采样、不推进序号）
+
+        位置数据包发出后调用 commit；位置数据包被去重跳过时不调用，采样留到下个周期。
+
+        返回:
+        dict - {"comment": 附加到位置注释的文本, "definitions": 尚未发送的 PARM/UNIT/EQNS,
+                "packets": 需要单独发送的遥测包, "values": 各通道数值, "counts", "sequence"}
+        """
+        values, counts = self.aggregator.snapshot()
+        with self._lock:
+            definitions = [] if self.definitions_sent else self.definition_packets(callsign, path)
+            comment = ""
+            packets = []
+            if self.mode == "standard":
+                packets.append(self.standard_packet(callsign, path, values))
+            else:
+                comment = self.compressed_comment(values)
+            sequence = self.sequence
+        return {"comment": comment, "definitions": definitions, "packets": packets, "values": values,
+                "counts": counts, "sequence": sequence}
+
+    def commit(self, telemetry):
+        """遥测已随位置发出：消费统计过的采样并推进序号"""
+        self.aggregator.consume(telemetry["counts"])
+        with self._lock:
+            if self.sequence == telemetry["sequence"]:
+                self.sequence = (self.sequence + 1) % self.SEQUENCE[self.mode]
+
+    def mark_definitions_sent(self):
+        """PARM/UNIT/EQNS 定义已被服务器接受，之后不再发送"""
+        with self._lock:
+            self.definitions_sent = True
+
+    def strip_covered(self, text):
+        """
+        从设备信息文本中去掉遥测通道已经上报的字段（如 rssi:-56），其余内容保留
+
+        返回:
+        str - 剩余文本，为空时返回 None
+        """
+        if not text:
+            return None
+        fields = {channel.field for channel in self.channels}
+        pattern = re.compile(r"(?<!\S)([A-Za-z_]\w*)\s*[:=]\s*-?\d+(?:\.\d+)?\S*")
+        text = pattern.sub(lambda match: "" if match.group(1).lower() in fields else match.group(0), text)
+        return " ".join(text.split()) or None
+
+class RollingBuckets:
+    """
+    分桶滚动窗口（固定内存）
+
+    把窗口按时间分成若干桶，每个桶记录总和、个数和最大值；
+    新数据只更新当前桶，过期的桶在前进时清零，不保留原始历史。
+    """
+
+    def __init__(self, window, bucket):
+        self.bucket = bucket
+        self.size = max(1, int(round(window / bucket)))
+        self._sums = array("d", bytes(8 * self.size))
+        self._counts = array("L", bytes(array("L").itemsize * self.size))
+        self._peaks = array("d", bytes(8 * self.size))
+        self._current = None  # 当前桶的序号 (时间 // 桶长)
+
+    def _advance(self, now):
+        """前进到 now 所在的桶，清空期间过期的桶"""
+        index = int(now // self.bucket)
+        if self._current is None:
+            self._current = index
+            return
+        steps = min(index - self._current, self.size)
+        for step in range(1, steps + 1):
+            slot = (self._current + step) % self.size
+            self._sums[slot] = 0.0
+            self._counts[slot] = 0
+            self._peaks[slot] = 0.0
+        if index > self._current:
+            self._current = index
+
+    def add(self, value, now):
+        self._advance(now)
+        slot = self._current % self.size
+        if self._counts[slot] == 0 or value > self._peaks[slot]:
+            self._peaks[slot] = value
+        self._sums[slot] += value
+        self._counts[slot] += 1
+
+    def total(self, now):
+        self._advance(now)
+        return sum(self._sums)
+
+    def mean(self, now):
+        """窗口内平均值，没有数据时返回 None"""
+        self._advance(now)
+        count = sum(self._counts)
+        return sum(self._sums) / count if count else None
+
+    def peak(self, now):
+        """窗口内最大值，没有数据时返回 None"""
+        self._advance(now)
+        peaks = [peak for peak, count in zip(self._peaks, self._counts) if count]
+        return max(peaks) if peaks else None
+
+# 气象传感器字段别名 -> 标准名称
+WEATHER_FIELD_ALIASES = {
+    "wind_dir": "wind_dir", "winddir": "wind_dir", "dir": "wind_dir",
+    "wind_speed": "wind_speed", "windspeed": "wind_speed", "wind": "wind_speed",
+    "temp": "temp", "temperature": "temp",
+    "rain": "rain",
+    "humidity": "humidity", "hum": "humidity",
+    "pressure": "pressure", "baro": "pressure",
+}
+
+class WeatherStation:
+    """
+    气象报告生成器
+
+    接收流式传感器采样（可直接作为 SensorSource 的汇总器），
+    用分桶滚动窗口维护风速均值、阵风、1小时/24小时降雨，内存占用固定。
+
+    采样字段 (公制):
+    wind_dir   - 风向 (°)
+    wind_speed - 风速 (m/s)
+    temp       - 温度 (°C)
+    rain       - 距上次采样的降雨量 (mm，雨量计翻斗增量)
+    humidity   - 湿度 (%)
+    pressure   - 气压 (hPa)
+    """
+
+    def __init__(self, clock=time_module.time):
+        self.clock = clock
+        self._lock = threading.Lock()
+        # 持续风速取1分钟平均，风向用1分钟矢量平均
+        self._wind = RollingBuckets(60, 5)
+        self._wind_x = RollingBuckets(60, 5)
+        self._wind_y = RollingBuckets(60, 5)
+        # 阵风取最近5分钟最大值
+        self._gust = RollingBuckets(300, 10)
+        # 降雨: 1小时 (1分钟桶) 和 24小时 (5分钟桶)
+        self._rain_1h = RollingBuckets(3600, 60)
+        self._rain_24h = RollingBuckets(86400, 300)
+        self._rain_midnight = 0.0
+        self._rain_day = None
+        self._has_rain = False  # 是否接有雨量计
+        self._latest = {}
+        self.samples = 0
+
+    def add_sample(self, values, now=None):
+        """
+        添加一次采样
+
+        参数:
+        values - dict 字段名 -> 数值 (支持 WEATHER_FIELD_ALIASES 中的别名)
+        now    - 可选: 采样时间 (秒，默认当前时间)
+        """
+        now = self.clock() if now is None else now
+        with self._lock:
+            fields = {}
+            for name, value in values.items():
+                key = WEATHER_FIELD_ALIASES.get(name.lower())
+                if key is not None:
+                    fields[key] = float(value)
+            if not fields:
+                return
+            self.samples += 1
+            
+            if "wind_speed" in fields:
+                speed = fields["wind_speed"]
+                self._wind.add(speed, now)
+                self._gust.add(speed, now)
+                if "wind_dir" in fields:
+                    angle = math.radians(fields["wind_dir"])
+                    self._wind_x.add(speed * math.sin(angle), now)
+                    self._wind_y.add(speed * math.cos(angle), now)
+            
+            if "rain" in fields:
+                self._reset_midnight(now)
+                self._rain_1h.add(fields["rain"], now)
+                self._rain_24h.add(fields["rain"], now)
+                self._rain_midnight += fields["rain"]
+                self._has_rain = True
+            
+            for key in ("wind_dir", "temp", "humidity", "pressure"):
+                if key in fields:
+                    self._latest[key] = fields[key]
+
+    def _reset_midnight(self, now):
+        """本地日期变化时清零当日降雨"""
+        day = datetime.fromtimestamp(now).date()
+        if day != self._rain_day:
+            self._rain_day = day
+            self._rain_midnight = 0.0
+
+    def report(self, now=None):
+        """
+        生成气象数据字段 (紧跟在气象站符号 _ 之后)
+
+        格式: DDD/SSSgGGGtTTTrRRRpPPPPPPPhHHbBBBBB
+        风速单位 mph，温度 °F，降雨 0.01 英寸，气压 0.1 hPa；
+        风向风速未知时用 ... 占位，其余未知字段省略。
+        """
+        now = self.clock() if now is None else now
+        with self._lock:
+            self._reset_midnight(now)
+            speed = self._wind.mean(now)
+            wind_x = self._wind_x.mean(now)
+            wind_y = self._wind_y.mean(now)
+            if wind_x is not None and wind_y is not None and (wind_x or wind_y):
+                direction = round(math.degrees(math.atan2(wind_x, wind_y))) % 360
+            else:
+                direction = self._latest.get("wind_dir")
+            
+            parts = [
+                f"{round(direction) % 360 or 360:03d}" if direction is not None else "...",
+                "/",
+                f"{min(round(speed * 2.23694), 999):03d}" if speed is not None else "...",
+            ]
+            
+            gust = self._gust.peak(now)
+            if gust is not None:
+                parts.append(f"g{min(round(gust * 2.23694), 999):03d}")
+            if "temp" in self._latest:
+                temp_f = round(self._latest["temp"] * 9 / 5 + 32)
+                parts.append(f"t{min(max(temp_f, -99), 999):03d}")
+            
+            if self._has_rain:
+                parts.append(f"r{min(round(self._rain_1h.total(now) / 0.254), 999):03d}")
+                parts.append(f"p{min(round(self._rain_24h.total(now) / 0.254), 999):03d}")
+                parts.append(f"P{min(round(self._rain_midnight / 0.254), 999):03d}")
+            
+            if "humidity" in self._latest:
+                humidity = min(max(round(self._latest["humidity"]), 1), 100)
+                parts.append(f"h{humidity % 100:02d}")
+            if "pressure" in self._latest:
+                parts.append(f"b{min(round(self._latest['pressure'] * 10), 99999):05d}")
+            return "".join(parts)
+
+def haversine_m(lat1, lon1, lat2, lon2):
+    """两点间大圆距离 (米)"""
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * 6371000 * math.asin(math.sqrt(a))
+
+def _nmea_coordinate(value, hemisphere):
+    """NMEA 度分格式 (dddmm.mmmm) 转十进制度"""
+    if not value:
+        return None
+    dot = value.index(".") if "." in value else len(value)
+    degrees = int(value[:dot - 2])
+    minutes = float(value[dot - 2:])
+    decimal = degrees + minutes / 60
+    return -decimal if hemisphere in ("S", "W") else decimal
+
+class NMEAParser:
+    """
+    NMEA 0183 增量解析器 (RMC / GGA)
+
+    feed() 可接收任意切分的字节流，只解析完整的行；
+    校验和错误、无效定位的语句直接丢弃。
+    """
+
+    MAX_LINE = 120  # NMEA 语句最长 82 字符，留余量防止垃圾数据撑大缓冲区
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self.sentences = 0
+        self.rejected = 0
+
+    def feed(self, data):
+        """
+        输入原始字节
+
+        返回:
+        list - 解析出的语句 dict (type 为 "RMC" 或 "GGA")
+        """
+        self._buffer += data
+        results = []
+        while True:
+            end = self._buffer.find(b"\n")
+            if end < 0:
+                if len(self._buffer) > self.MAX_LINE:
+                    del self._buffer[:]
+                break
+            line = bytes(self._buffer[:end]).strip()
+            del self._buffer[:end + 1]
+            if line:
+                sentence = self.parse_sentence(line.decode("ascii", errors="replace"))
+                if sentence is not None:
+                    results.append(sentence)
+        return results
+
+    def parse_sentence(self, line):
+        """解析单条语句，不支持或无效时返回 None"""
+        start = line.find("$")
+        if start < 0:
+            return None
+        line = line[start:]
+        body, star, checksum = line[1:].partition("*")
+        if star:
+            calculated = 0
+            for char in body:
+                calculated ^= ord(char)
+            try:
+                if calculated != int(checksum[:2], 16):
+                    self.rejected += 1
+                    return None
+            except ValueError:
+                self.rejected += 1
+                return None
+        
+        fields = body.split(",")
+        kind = fields[0][-3:]
+        try:
+            if kind == "RMC" and len(fields) >= 10:
+                sentence = {
+                    "type": "RMC",
+                    "time": fields[1],
+                    "valid": fields[2] == "A",
+                    "latitude": _nmea_coordinate(fields[3], fields[4]),
+                    "longitude": _nmea_coordinate(fields[5], fields[6]),
+                    "speed": float(fields[7]) * 1.852 if fields[7] else None,  # 节 -> km/h
+                    "course": float(fields[8]) if fields[8] else None,
+                }
+            elif kind == "GGA" and len(fields) >= 10:
+                sentence = {
+                    "type": "GGA",
+                    "time": fields[1],
+                    "valid": fields[6] not in ("", "0"),
+                    "latitude": _nmea_coordinate(fields[2], fields[3]),
+                    "longitude": _nmea_coordinate(fields[4], fields[5]),
+                    "satellites": int(fields[7]) if fields[7] else 0,
+                    "hdop": float(fields[8]) if fields[8] else None,
+                    "altitude": float(fields[9]) if fields[9] else None,
+                }
+            else:
+                return None
+        except ValueError:
+            self.rejected += 1
+            return None
+        
+        self.sentences += 1
+        if not sentence["valid"] or sentence["latitude"] is None or sentence["longitude"] is None:
+            self.rejected += 1
+            return None
+        return sentence
+
+class NMEAPositionSource:
+    """
+    实时 GPS 位置源（串口 / pty）
+
+    后台线程阻塞读取设备（不轮询），增量解析 NMEA 并过滤坏定位：
+    HDOP 过大、卫星数不足、位置跳变超过 max_speed。
+    连续 reanchor 个被拒定位彼此一致时，认为之前接受的定位才是跳点（例如第一个定位就是坏点），
+    改为以新位置为准。
+    最新位置通过 latest() 以字典形式提供，线程安全，不访问任何 Tk 控件；
+    也可用 subscribe() 注册回调（在读取线程中调用）。
+    """
+
+    def __init__(self, device, baudrate=9600, max_hdop=5.0, min_satellites=4, max_speed=300.0, reanchor=3):
+        self.device = device
+        self.baudrate = baudrate
+        self.max_hdop = max_hdop
+        self.min_satellites = min_satellites
+        self.max_speed = max_speed    # 允许的最大位移速度 (m/s)，超过视为跳点
+        self.reanchor = reanchor      # 连续多少个彼此一致的被拒定位后重新锚定
+        self.parser = NMEAParser()
+        self.fixes = 0
+        self.dropped = 0
+        self.error = None
+        self._latest = None
+        self._quality = {}            # 最近一次 GGA 的卫星数/HDOP/海拔
+        self._pending = None          # 等待同一时刻 GGA 的 RMC
+        self._rejected = (None, 0)    # (最近一个被拒定位, 连续一致的个数)
+        self._callbacks = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._fd = None
+
+    def subscribe(self, callback):
+        """注册位置更新回调 callback(fix)"""
+        self._callbacks.append(callback)
+
+    def unsubscribe(self, callback):
+        """取消位置更新回调"""
+        if callback in self._callbacks:
+            self._callbacks.remove(callback)
+
+    def latest(self, max_age=None):
+        """
+        获取最新定位
+
+        参数:
+        max_age - 可选: 最大允许的定位时间 (秒)，超过返回 None
+
+        返回:
+        dict - {"latitude", "longitude", "speed", "course", "altitude", "satellites", "hdop", "timestamp"}
+        """
+        with self._lock:
+            fix = self._latest
+        if fix is None or (max_age is not None and time_module.monotonic() - fix["timestamp"] > max_age):
+            return None
+        return dict(fix)
+
+    def _open(self):
+        """以原始模式打开设备"""
+        flags = os.O_RDONLY | getattr(os, "O_NOCTTY", 0)
+        fd = os.open(self.device, flags)
+        set_serial_raw(fd, self.baudrate)
+        return fd
+
+    def start(self):
+        self._fd = self._open()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            # 等待数据到达，超时只用于检查停止标志 (Windows 不支持对设备 select，直接阻塞读取)
+            try:
+                if termios is not None:
+                    readable, _, _ = select.select([self._fd], [], [], 0.5)
+                    if not readable:
+                        continue
+                data = os.read(self._fd, 4096)
+            except OSError as e:
+                self.error = str(e)
+                break
+            if not data:
+                break  # 设备关闭
+            for sentence in self.parser.feed(data):
+                self._handle(sentence)
+
+    def _handle(self, sentence):
+        """
+        按时刻配对 RMC 和 GGA，用同一时刻 GGA 的卫星数/HDOP 过滤后发布定位
+
+        GGA 先到时 RMC 立即处理；RMC 先到时 (接收机输出过 GGA) 等待同一时刻的 GGA。
+        某个时刻的 GGA 丢失时，该时刻的 RMC 在下一条语句到达时不做质量检查直接处理。
+        """
+        pending = self._pending
+        if sentence["type"] == "GGA":
+            self._quality = sentence
+            if pending is not None:
+                self._pending = None
+                self._publish(pending, sentence if pending["time"] == sentence["time"] else None)
+            return
+        
+        if pending is not None:
+            self._pending = None
+            self._publish(pending, None)
+        quality = self._quality
+        if quality.get("time") == sentence["time"]:
+            self._publish(sentence, quality)
+        elif quality:
+            self._pending = sentence
+        else:
+            self._publish(sentence, None)
+
+    def _publish(self, sentence, quality):
+        """质量检查和跳点过滤后发布 RMC 定位 (quality 为同一时刻的 GGA，没有时为 None)"""
+        quality = quality or {}
+        if quality and (quality["satellites"] < self.min_satellites or
+                        (quality["hdop"] is not None and quality["hdop"] > self.max_hdop)):
+            self.dropped += 1
+            return
+        
+        now = time_module.monotonic()
+        with self._lock:
+            previous = self._latest
+        if previous is not None and not self._plausible(previous, sentence, now):
+            last, count = self._rejected
+            count = count + 1 if last is not None and self._plausible(last, sentence, now) else 1
+            if count < self.reanchor:
+                self._rejected = ({"latitude": sentence["latitude"], "longitude": sentence["longitude"],
+                                   "timestamp": now}, count)
+                self.dropped += 1
+                return
+        self._rejected = (None, 0)
+        
+        fix = {
+            "latitude": sentence["latitude"],
+            "longitude": sentence["longitude"],
+            "speed": sentence["speed"],
+            "course": sentence["course"],
+            "altitude": quality.get("altitude"),
+            "satellites": quality.get("satellites"),
+            "hdop": quality.get("hdop"),
+            "timestamp": now,
+        }
+        with self._lock:
+            self._latest = fix
+        self.fixes += 1
+        for callback in list(self._callbacks):
+            callback(dict(fix))
+
+    def _plausible(self, previous, sentence, now):
+        """从 previous 移动到本次定位的速度不超过 max_speed"""
+        elapsed = max(now - previous["timestamp"], 0.1)
+        distance = haversine_m(previous["latitude"], previous["longitude"], sentence["latitude"], sentence["longitude"])
+        return distance / elapsed <= self.max_speed
+
+# 地理围栏
+class Geofence:
+    """
+    单个地理围栏（多边形或圆）
+
+    多边形坐标为 GeoJSON 顺序 (经度, 纬度)，第一个环为外边界，其余为内洞。
+    """
+    __slots__ = ("name", "kind", "bbox", "dwell", "_rings", "_center", "_radius")
+
+    def __init__(self, name, rings=None, center=None, radius=None, dwell=None):
+        """
+        参数:
+        name   - 围栏名称
+        rings  - 多边形环列表 [[(lon, lat), ...], ...]
+        center - 圆心 (lat, lon)
+        radius - 半径 (米)
+        dwell  - 可选: 停留多少秒后触发停留事件（覆盖默认值）
+        """
+        self.name = name
+        self.dwell = dwell
+        if rings is not None:
+            self.kind = "polygon"
+            self._rings = [tuple((float(lon), float(lat)) for lon, lat, *_ in ring) for ring in rings]
+            if not self._rings or len(self._rings[0]) < 3:
+                raise ValueError(f"多边形至少需要3个顶点: {name}")
+            lons = [lon for lon, _ in self._rings[0]]
+            lats = [lat for _, lat in self._rings[0]]
+            self.bbox = (min(lats), min(lons), max(lats), max(lons))
+            self._center = self._radius = None
+        else:
+            self.kind = "circle"
+            lat, lon = float(center[0]), float(center[1])
+            self._center = (lat, lon)
+            self._radius = float(radius)
+            if self._radius <= 0:
+                raise ValueError(f"圆形围栏半径必须大于0: {name}")
+            dlat = self._radius / 111320.0
+            dlon = dlat / max(math.cos(math.radians(lat)), 1e-6)
+            self.bbox = (lat - dlat, lon - dlon, lat + dlat, lon + dlon)
+            self._rings = None
+
+    def contains(self, lat, lon):
+        """判断点是否在围栏内"""
+        min_lat, min_lon, max_lat, max_lon = self.bbox
+        if not (min_lat <= lat <= max_lat and min_lon <= lon <= max_lon):
+            return False
+        if self.kind == "circle":
+            return haversine_m(lat, lon, *self._center) <= self._radius
+        if not _ring_contains(self._rings[0], lon, lat):
+            return False
+        return not any(_ring_contains(hole, lon, lat) for hole in self._rings[1:])
+
+def _ring_contains(ring, x, y):
+    """射线法判断点是否在环内"""
+    inside = False
+    x1, y1 = ring[-1]
+    for x2, y2 in ring:
+        if (y1 > y) != (y2 > y) and x < (x2 - x1) * (y - y1) / (y2 - y1) + x1:
+            inside = not inside
+        x1, y1 = x2, y2
+    return inside
+
+class GeofenceIndex:
+    """
+    围栏网格索引：按经纬度网格登记每个围栏的外包矩形，
+    查询时只检查所在网格中的候选围栏；覆盖网格过多的大围栏单独列出，每次按外包矩形过滤
+    """
+
+    def __init__(self, fences=(), cell=0.01, max_cells=4096):
+        """
+        参数:
+        fences    - Geofence 列表
+        cell      - 网格大小 (度，0.01° 约 1 公里)
+        max_cells - 单个围栏最多登记的网格数，超过的作为大围栏
+        """
+        self.cell = cell
+        self.max_cells = max_cells
+        self.fences = []
+        self._grid = {}                       # (行, 列) -> [围栏]
+        self._large = []
+        for fence in fences:
+            self.add(fence)
+
+    def _cell(self, lat, lon):
+        return (math.floor(lat / self.cell), math.floor(lon / self.cell))
+
+    def add(self, fence):
+        """登记围栏"""
+        self.fences.append(fence)
+        min_lat, min_lon, max_lat, max_lon = fence.bbox
+        row0, col0 = self._cell(min_lat, min_lon)
+        row1, col1 = self._cell(max_lat, max_lon)
+        if (row1 - row0 + 1) * (col1 - col0 + 1) > self.max_cells:
+            self._large.append(fence)
+            return
+        for row in range(row0, row1 + 1):
+            for col in range(col0, col1 + 1):
+                self._grid.setdefault((row, col), []).append(fence)
+
+    def query(self, lat, lon):
+        """
+        返回包含该点的全部围栏
+
+        返回:
+        list - Geofence 列表
+        """
+        candidates = self._grid.get(self._cell(lat, lon), ())
+        hits = [fence for fence in candidates if fence.contains(lat, lon)]
+        if self._large:
+            hits.extend(fence for fence in self._large if fence.contains(lat, lon))
+        return hits
+
+    def __len__(self):
+        return len(self.fences)
+
+def load_geofences(path, cell=0.01):
+    """
+    从 GeoJSON 文件加载围栏
+
+    Polygon / MultiPolygon 要素为多边形围栏；Point 要素需要 radius (米) 属性，作为圆形围栏。
+    属性 name 为名称，dwell 为可选的停留触发时间 (秒)。
+
+    返回:
+    GeofenceIndex
+
+    异常:
+    ValueError - 要素无效（列出所有出错的要素）
+    """
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    features = data.get("features", []) if data.get("type") == "FeatureCollection" else [data]
+    
+    index = GeofenceIndex(cell=cell)
+    errors = []
+    for number, feature in enumerate(features, 1):
+        properties = feature.get("properties") or {}
+        geometry = feature.get("geometry") or {}
+        name = str(properties.get("name") or f"围栏{number}")
+        try:
+            dwell = float(properties["dwell"]) if properties.get("dwell") not in (None, "") else None
+            kind = geometry.get("type")
+            coordinates = geometry.get("coordinates")
+            if kind == "Polygon":
+                index.add(Geofence(name, rings=coordinates, dwell=dwell))
+            elif kind == "MultiPolygon":
+                for polygon in coordinates:
+                    index.add(Geofence(name, rings=polygon, dwell=dwell))
+            elif kind == "Point":
+                if properties.get("radius") in (None, ""):
+                    raise ValueError("点要素需要 radius 属性")
+                index.add(Geofence(name, center=(coordinates[1], coordinates[0]),
+                                   radius=properties["radius"], dwell=dwell))
+            else:
+                raise ValueError(f"不支持的几何类型: {kind}")
+        except (ValueError, TypeError, IndexError) as e:
+            errors.append(f"要素 {number} ({name}): {str(e)}")
+    
+    if errors:
+        raise ValueError("\n".join(errors))
+    return index
+
+class GeofenceMonitor:
+    """
+    围栏事件检测：根据连续位置产生进入/离开/停留事件，并在长时间未发送时产生心跳
+
+    同名的多个多边形 (MultiPolygon) 视为一个围栏。
+    """
+
+    def __init__(self, index, dwell=300, heartbeat=1800, clock=time_module.monotonic):
+        """
+        参数:
+        index     - GeofenceIndex
+        dwell     - 默认停留触发时间 (秒)，0 表示不触发停留事件
+        heartbeat - 心跳间隔 (秒)：距上次发送超过该时间时发送一次
+        """
+        self.index = index
+        self.dwell = dwell
+        self.heartbeat = heartbeat
+        self.clock = clock
+        self.inside = {}                      # 名称 -> [进入时间, 已触发停留, 停留阈值]
+        self.last_beacon = None
+
+    def update(self, lat, lon, now=None):
+        """
+        处理一个新位置
+
+        返回:
+        list - [(事件, 围栏名称)]，事件为 "enter" / "exit" / "dwell"
+        """
+        now = self.clock() if now is None else now
+        current = {}
+        for fence in self.index.query(lat, lon):
+            if fence.name not in current or fence.dwell is not None:
+                current[fence.name] = fence.dwell if fence.dwell is not None else self.dwell
+        
+        events = []
+        for name in list(self.inside):
+            if name not in current:
+                del self.inside[name]
+                events.append(("exit", name))
+        for name, dwell in current.items():
+            state = self.inside.get(name)
+            if state is None:
+                self.inside[name] = [now, False, dwell]
+                events.append(("enter", name))
+            elif not state[1] and state[2] and now - state[0] >= state[2]:
+                state[1] = True
+                events.append(("dwell", name))
+        return events
+
+    def next_heartbeat(self, now=None):
+        """距下一次心跳的秒数（从未发送时为 0）"""
+        now = self.clock() if now is None else now
+        if self.last_beacon is None:
+            return 0.0
+        return max(0.0, self.last_beacon + self.heartbeat - now)
+
+    def mark_sent(self, now=None):
+        """记录一次发送（重新开始心跳计时）"""
+        self.last_beacon = self.clock() if now is None else now
+
+# APRS 未压缩位置格式
+APRS_LATITUDE_PATTERN = re.compile(r"^\d{4}\.\d{2}[NS]$")
+APRS_LONGITUDE_PATTERN = re.compile(r"^\d{5}\.\d{2}[EW]$")
+
+class StationConfig(namedtuple("StationConfig", [
+    "callsign", "path", "latitude", "longitude", "symbol_table", "symbol_code", "comment",
+    "speed", "course", "altitude", "power", "antenna_height", "gain",
+    "device_info", "software_info", "phg", "text_budget", "use_gps"
+])):
+    """
+    台站配置快照（不可变，已校验）
+
+    由表单输入构建一次，之后可在任意线程中使用，发送时不再读取 Tk 控件。
+    数值字段已转换为 int/float，空值为 None。
+    """
+
+    __slots__ = ()
+
+    NUMERIC_FIELDS = {
+        "speed": "速度", "course": "方向", "altitude": "海拔",
+        "power": "功率", "antenna_height": "天线高度", "gain": "增益"
+    }
+
+    @classmethod
+    def from_inputs(cls, inputs, use_gps=False):
+        """
+        从表单输入构建配置快照
+
+        参数:
+        inputs  - get_user_inputs() 返回的字典
+        use_gps - 发送时是否使用GPS定位
+
+        返回:
+        StationConfig
+
+        异常:
+        ValueError - 输入无效，消息可直接显示给用户
+        """
+        callsign = inputs["callsign"].strip()
+        latitude = inputs["latitude"].strip()
+        longitude = inputs["longitude"].strip()
+        if not all([callsign, latitude, longitude]):
+            raise ValueError("呼号、纬度和经度是必填字段！")
+        if not APRS_LATITUDE_PATTERN.match(latitude):
+            raise ValueError(f"纬度格式错误: {latitude} (应为 ddmm.mmN/S)")
+        if not APRS_LONGITUDE_PATTERN.match(longitude):
+            raise ValueError(f"经度格式错误: {longitude} (应为 dddmm.mmE/W)")
+        
+        symbol_table = inputs["symbol_table"]
+        symbol_code = inputs["symbol_code"]
+        if symbol_table not in ("/", "\\") and not is_overlay_table(symbol_table):
+            raise ValueError(f"符号表无效: {symbol_table} (应为 /、\\ 或叠加字符 0-9/A-Z)")
+        if len(symbol_code) != 1 or not 0x21 <= ord(symbol_code) <= 0x7e:
+            raise ValueError(f"符号代码无效: {symbol_code}")
+        if is_overlay_table(symbol_table) and symbol_index.get(symbol_table, symbol_code) is None:
+            raise ValueError(f"符号 {symbol_code} 不能叠加字符 {symbol_table}")
+        
+        numbers = {}
+        for field, label in cls.NUMERIC_FIELDS.items():
+            value = inputs[field].strip()
+            try:
+                number = float(value) if value else None
+            except ValueError:
+                raise ValueError(f"{label}必须是数字: {value}")
+            # 整数保持整数，状态文本中显示为 5W 而不是 5.0W
+            numbers[field] = int(number) if number is not None and number.is_integer() else number
+        
+        text_budget = inputs["text_budget"].strip()
+        try:
+            text_budget = int(text_budget) if text_budget else None
+        except ValueError:
+            raise ValueError(f"信息字节上限必须是整数: {text_budget}")
+        
+        # 组合消息内容和状态信息
+        comment = inputs["comment"]
+        if inputs["status"]:
+            comment += " " + inputs["status"]
+        
+        return cls(
+            callsign=callsign,
+            path=inputs["path"].strip(),
+            latitude=latitude,
+            longitude=longitude,
+            symbol_table=symbol_table,
+            symbol_code=symbol_code,
+            comment=comment,
+            device_info=inputs["device_info"] or None,
+            software_info=inputs["software_info"] or None,
+            phg=bool(inputs["phg"]),
+            text_budget=text_budget,
+            use_gps=use_gps,
+            **numbers
+        )
+
+    @classmethod
+    def from_spec(cls, spec):
+        """
+        从 JSON 参数 (send_aprs_packet 参数名) 构建配置快照，未提供的字段为空
+
+        异常:
+        ValueError - 输入无效或包含未知参数
+        """
+        unknown = set(spec) - (set(cls._fields) - {"use_gps"}) - {"status"}
+        if unknown:
+            raise ValueError(f"未知参数: {', '.join(sorted(unknown))}")
+        inputs = {field: "" for field in cls._fields}
+        inputs.update(path="WIDE1-1", symbol_table="/", symbol_code="L", status="", phg=False)
+        for key, value in spec.items():
+            if key == "phg":
+                inputs[key] = bool(value)
+            elif value is not None:
+                inputs[key] = str(value)
+        return cls.from_inputs(inputs)
+
+    def send_kwargs(self):
+        """转换为 send_aprs_packet 的关键字参数"""
+        kwargs = self._asdict()
+        del kwargs["use_gps"]
+        return kwargs
+
+def aprs_to_decimal(value):
+    """
+    APRS 格式经纬度 (ddmm.mmN / dddmm.mmE) 转十进制度
+
+    返回:
+    float - 十进制度，格式无效时返回 None
+    """
+    try:
+        value = value.strip()
+        hemisphere = value[-1].upper()
+        number = value[:-1]
+        dot = number.index(".") if "." in number else len(number)
+        decimal = int(number[:dot - 2]) + float(number[dot - 2:]) / 60
+    except (ValueError, IndexError, AttributeError):
+        return None
+    return -decimal if hemisphere in ("S", "W") else decimal
+
+def user_data_dir():
+    """
+    每个用户的数据目录（程序目录可能只读）
+
+    Windows: %APPDATA%/APRSTool；其他系统: $XDG_DATA_HOME/aprstool (默认 ~/.local/share/aprstool)
+    """
+    if os.name == "nt":
+        base = os.environ.get("APPDATA") or os.path.expanduser("~")
+        return os.path.join(base, "APRSTool")
+    base = os.environ.get("XDG_DATA_HOME") or os.path.join(os.path.expanduser("~"), ".local", "share")
+    return os.path.join(base, "aprstool")
+
+# 发送历史数据库（程序目录下已有旧数据库时继续使用）
+LEGACY_HISTORY_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "aprs_history.db")
+HISTORY_DB_PATH = LEGACY_HISTORY_DB_PATH if os.path.exists(LEGACY_HISTORY_DB_PATH) else \
+    os.path.join(user_data_dir(), "aprs_history.db")
+
+class PacketHistory:
+    """
+    发送历史记录（SQLite，只追加）
+
+    每次发送的结果写入一行，按时间和呼号建索引；
+    查询使用键集分页 (按时间和ID倒序)，导出时逐行流式写出，不会一次载入全部记录。
+    """
+
+    COLUMNS = ("id", "sent_at", "callsign", "latitude", "longitude", "status", "message", "aprs_data")
+
+    def __init__(self, path=HISTORY_DB_PATH):
+        """
+        异常:
+        OSError / sqlite3.Error - 无法创建目录或打开数据库
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        with self._lock:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS packets (
+                    id INTEGER PRIMARY KEY,
+                    sent_at REAL NOT NULL,
+                    callsign TEXT NOT NULL,
+                    latitude REAL,
+                    longitude REAL,
+                    status TEXT,
+                    message TEXT,
+                    aprs_data TEXT
+                )
+            """)
+            self._db.execute("CREATE INDEX IF NOT EXISTS packets_time ON packets (sent_at, id)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS packets_callsign_time ON packets (callsign, sent_at, id)")
+            self._db.commit()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def record(self, result, callsign, latitude=None, longitude=None, sent_at=None):
+        """
+        记录一次发送结果
+
+        参数:
+        result    - send_aprs_packet 返回的结果
+        callsign  - 呼号
+        latitude  - 纬度 (APRS 格式或十进制)
+        longitude - 经度 (APRS 格式或十进制)
+        sent_at   - 可选: 发送时间 (Unix 时间戳，默认当前时间)
+        """
+        if isinstance(latitude, str):
+            latitude = aprs_to_decimal(latitude)
+        if isinstance(longitude, str):
+            longitude = aprs_to_decimal(longitude)
+        message = result.get("msg") or result.get("message")
+        row = (
+            time_module.time() if sent_at is None else sent_at,
+            callsign.upper(),
+            latitude,
+            longitude,
+            result.get("rs"),
+            str(message) if message is not None else None,
+            result.get("aprs_data"),
+        )
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO packets (sent_at, callsign, latitude, longitude, status, message, aprs_data) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                row
+            )
+            self._db.commit()
+
+    @staticmethod
+    def _where(start=None, end=None, callsign=None):
+        """构建查询条件"""
+        clauses, params = [], []
+        if callsign:
+            clauses.append("callsign = ?")
+            params.append(callsign.upper())
+        if start is not None:
+            clauses.append("sent_at >= ?")
+            params.append(start)
+        if end is not None:
+            clauses.append("sent_at < ?")
+            params.append(end)
+        return clauses, params
+
+    def query(self, start=None, end=None, callsign=None, limit=100, before=None):
+        """
+        按时间范围和呼号查询（最新的在前）
+
+        参数:
+        start    - 可选: 开始时间 (含)
+        end      - 可选: 结束时间 (不含)
+        callsign - 可选: 呼号
+        limit    - 每页条数
+        before   - 可选: 上一页最后一行的 (sent_at, id)，返回其后的一页
+
+        返回:
+        list - 行字典列表
+        """
+        clauses, params = self._where(start, end, callsign)
+        if before is not None:
+            clauses.append("(sent_at < ? OR (sent_at = ? AND id < ?))")
+            params.extend([before[0], before[0], before[1]])
+        sql = f"SELECT {', '.join(self.COLUMNS)} FROM packets"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY sent_at DESC, id DESC LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = self._db.execute(sql, params).fetchall()
+        return [dict(zip(self.COLUMNS, row)) for row in rows]
+
+    def count(self, start=None, end=None, callsign=None):
+        """统计符合条件的记录数"""
+        clauses, params = self._where(start, end, callsign)
+        sql = "SELECT COUNT(*) FROM packets"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        with self._lock:
+            return self._db.execute(sql, params).fetchone()[0]
+
+    def iterate(self, start=None, end=None, callsign=None, batch=500):
+        """按时间正序逐批遍历记录（用于导出）"""
+        after = None
+        while True:
+            clauses, params = self._where(start, end, callsign)
+            if after is not None:
+                clauses.append("(sent_at > ? OR (sent_at = ? AND id > ?))")
+                params.extend([after[0], after[0], after[1]])
+            sql = f"SELECT {', '.join(self.COLUMNS)} FROM packets"
+            if clauses:
+                sql += " WHERE " + " AND ".join(clauses)
+            sql += " ORDER BY sent_at, id LIMIT ?"
+            params.append(batch)
+            with self._lock:
+                rows = self._db.execute(sql, params).fetchall()
+            for row in rows:
+                yield dict(zip(self.COLUMNS, row))
+            if len(rows) < batch:
+                return
+            after = (rows[-1][1], rows[-1][0])
+
+    def export_csv(self, path, start=None, end=None, callsign=None):
+        """
+        导出为 CSV
+
+        返回:
+        int - 导出的记录数
+        """
+        count = 0
+        with open(path, "w", newline="", encoding="utf-8-sig") as f:
+            writer = csv.writer(f)
+            writer.writerow(["time"] + list(self.COLUMNS[2:]))
+            for row in self.iterate(start, end, callsign):
+                writer.writerow([datetime.fromtimestamp(row["sent_at"]).isoformat(timespec="seconds")]
+                                + [row[column] for column in self.COLUMNS[2:]])
+                count += 1
+        return count
+
+    def export_gpx(self, path, start=None, end=None, callsign=None):
+        """
+        导出为 GPX（每个呼号一条航迹，只包含有位置的记录）
+
+        返回:
+        int - 导出的航迹点数
+        """
+        count = 0
+        with open(path, "w", encoding="utf-8") as f:
+            f.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+            f.write('<gpx version="1.1" creator="APRS TOOL" xmlns="http://www.topografix.com/GPX/1/1">\n')
+            # 按呼号分组输出航迹，每个呼号单独遍历以保持流式导出
+            callsigns = [callsign.upper()] if callsign else self._callsigns(start, end)
+            for current in callsigns:
+                f.write(f"  <trk><name>{xml_escape(current)}</name><trkseg>\n")
+                for row in self.iterate(start, end, current):
+                    if row["latitude"] is None or row["longitude"] is None:
+                        continue
+                    stamp = datetime.utcfromtimestamp(row["sent_at"]).strftime("%Y-%m-%dT%H:%M:%SZ")
+                    f.write(f'    <trkpt lat="{row["latitude"]:.6f}" lon="{row["longitude"]:.6f}">'
+                            f'<time>{stamp}</time><desc>{xml_escape(row["status"] or "")}</desc></trkpt>\n')
+                    count += 1
+                f.write("  </trkseg></trk>\n")
+            f.write("</gpx>\n")
+        return count
+
+    def _callsigns(self, start=None, end=None):
+        """时间范围内出现过的呼号"""
+        clauses, params = self._where(start, end)
+        sql = "SELECT DISTINCT callsign FROM packets"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY callsign"
+        with self._lock:
+            return [row[0] for row in self._db.execute(sql, params).fetchall()]
+
+# APRS 消息正文最长 67 字符，且不能包含 | ~ {
+APRS_MESSAGE_MAX = 67
+APRS_MESSAGE_FORBIDDEN = "|~{"
+# ack/rej 正文: 消息编号 (1-5 位字母数字)，可带回复确认 "}编号"
+APRS_ACK_PATTERN = re.compile(r"(ack|rej)([A-Za-z0-9]{1,5})(?:\}[A-Za-z0-9]{0,5})?$")
+
+def parse_aprs_message(tnc2):
+    """
+    解析 APRS 消息数据包
+
+    返回:
+    dict - {"source", "addressee", "text", "msgid"}，ack/rej 时 text 为空，
+           kind 为 "message" / "ack" / "rej"；不是消息时返回 None
+    """
+    header, sep, info = tnc2.partition(":")
+    if not sep or not info.startswith(":") or len(info) < 11 or info[10] != ":":
+        return None
+    source = header.partition(">")[0].strip().upper()
+    addressee = info[1:10].strip().upper()
+    body = info[11:]
+    
+    # 其他以 ack/rej 开头的正文 (如 "ackOK{3") 按普通消息处理
+    match = APRS_ACK_PATTERN.match(body.rstrip())
+    if match is not None:
+        return {"kind": match.group(1), "source": source, "addressee": addressee, "text": "",
+                "msgid": match.group(2)}
+    
+    text, brace, msgid = body.partition("{")
+    return {
+        "kind": "message",
+        "source": source,
+        "addressee": addressee,
+        "text": text,
+        "msgid": msgid.partition("}")[0].strip() if brace else None
+    }
+
+class MessageManager:
+    """
+    APRS 消息发送与确认跟踪
+
+    每个目的呼号独立分配消息编号；待确认消息保存在 (目的呼号, 编号) 索引的表中，
+    收到 ack/rej 时 O(1) 匹配。所有重试由一个定时堆驱动，只有一个调度线程，
+    实际发送交给固定大小的线程池，多条消息可同时在途。
+    """
+
+    def __init__(self, callsign, path, send_func, retry_intervals=(30, 60, 120, 240, 480),
+                 workers=4, clock=time_module.monotonic, on_update=None):
+        self.callsign = callsign.upper()
+        self.path = path
+        self.send_func = send_func            # send_func(aprs_data) -> 结果字典
+        self.retry_intervals = retry_intervals
+        self.clock = clock
+        self.on_update = on_update            # on_update(事件, 消息记录)
+        self._next_id = {}                    # 目的呼号 -> 下一个消息编号
+        self._outstanding = {}                # (目的呼号, 编号) -> 消息记录
+        self._heap = []                       # (到期时间, 序号, 键)
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+        self._stopped = False
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="aprs-msg")
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _allocate_id(self, addressee):
+        """为目的呼号分配下一个消息编号 (1 ~ 99999 循环)"""
+        msgid = self._next_id.get(addressee, 1)
+        self._next_id[addressee] = msgid % 99999 + 1
+        return str(msgid)
+
+    def build_message(self, addressee, text, msgid=None):
+        """构建消息数据包 呼号>APRSTV,路径::目的呼号:正文{编号"""
+        packet = f"{self.callsign}>APRSTV,{self.path}::{addressee.upper():<9}:{text}"
+        if msgid is not None:
+            packet += "{" + msgid
+        return packet
+
+    def send_message(self, addressee, text):
+        """
+        发送消息并等待确认
+
+        返回:
+        str - 消息编号
+
+        异常:
+        ValueError - 目的呼号或正文无效
+        """
+        addressee = addressee.strip().upper()
+        if not addressee or len(addressee) > 9:
+            raise ValueError(f"无效的目的呼号: {addressee}")
+        if len(text) > APRS_MESSAGE_MAX:
+            raise ValueError(f"消息正文超过{APRS_MESSAGE_MAX}个字符")
+        if any(char in text for char in APRS_MESSAGE_FORBIDDEN):
+            raise ValueError("消息正文不能包含 | ~ {")
+        
+        with self._condition:
+            msgid = self._allocate_id(addressee)
+            key = (addressee, msgid)
+            self._outstanding[key] = {
+                "addressee": addressee,
+                "msgid": msgid,
+                "text": text,
+                "packet": self.build_message(addressee, text, msgid),
+                "attempts": 0,
+                "state": "pending",
+                "created": self.clock()
+            }
+            heapq.heappush(self._heap, (self.clock(), next(self._counter), key))
+            self._condition.notify()
+        return msgid
+
+    def handle_packet(self, tnc2):
+        """
+        处理收到的数据包（接收源或本地模拟）
+
+        ack/rej 匹配待确认消息；发给本台的消息自动回复 ack。
+
+        返回:
+        dict - 解析出的消息，不是消息时返回 None
+        """
+        message = parse_aprs_message(tnc2)
+        if message is None or message["addressee"] != self.callsign:
+            return message
+        
+        if message["kind"] in ("ack", "rej"):
+            with self._condition:
+                record = self._outstanding.pop((message["source"], message["msgid"]), None)
+            if record is not None:
+                record["state"] = "acked" if message["kind"] == "ack" else "rejected"
+                self._notify(record["state"], record)
+        else:
+            if message["msgid"]:
+                ack = f"{self.callsign}>APRSTV,{self.path}::{message['source']:<9}:ack{message['msgid']}"
+                self._executor.submit(self.send_func, ack)
+            self._notify("received", message)
+        return message
+
+    def outstanding(self):
+        """返回所有待确认消息的副本"""
+        with self._condition:
+            return [dict(record) for record in self._outstanding.values()]
+
+    def stop(self):
+        """停止调度线程和发送线程池"""
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+        self._thread.join(timeout=2)
+        self._executor.shutdown(wait=False)
+
+    def _notify(self, event, record):
+        if self.on_update is not None:
+            self.on_update(event, record)
+
+    def _run(self):
+        """定时堆调度循环：取出到期的消息发送并安排下一次重试"""
+        while True:
+            with self._condition:
+                while not self._stopped:
+                    if self._heap:
+                        delay = self._heap[0][0] - self.clock()
+                        if delay <= 0:
+                            break
+                        self._condition.wait(delay)
+                    else:
+                        self._condition.wait()
+                if self._stopped:
+                    return
+                
+                _, _, key = heapq.heappop(self._heap)
+                record = self._outstanding.get(key)
+                if record is None:
+                    continue  # 已确认，跳过过期的定时项
+                
+                if record["attempts"] >= len(self.retry_intervals):
+                    # 已发送 len(retry_intervals) 次，最后一次发送后的间隔内仍未确认
+                    del self._outstanding[key]
+                    record["state"] = "failed"
+                    expired = record
+                else:
+                    # 第 n 次发送后等待 retry_intervals[n-1]，到期时重发或判定失败
+                    expired = None
+                    record["attempts"] += 1
+                    due = self.clock() + self.retry_intervals[record["attempts"] - 1]
+                    heapq.heappush(self._heap, (due, next(self._counter), key))
+            
+            if expired is not None:
+                self._notify("failed", expired)
+            else:
+                self._executor.submit(self._send, record)
+
+    def _send(self, record):
+        """在线程池中发送一次"""
+        result = self.send_func(record["packet"])
+        self._notify("sent", dict(record, result=result))
+
+# APRS 对象/物品
+APRS_OBJECT_COMMENT_MAX = 43
+
+class APRSObject(namedtuple("APRSObject", [
+    "name", "latitude", "longitude", "symbol_table", "symbol_code", "comment", "kind", "live"
+])):
+    """
+    APRS 对象 (;) 或物品 ()) 的不可变描述
+
+    latitude/longitude 为 APRS 格式 (ddmm.mmN / dddmm.mmE)；kind 为 "object" 或 "item"；
+    live 为 False 时发送删除报文。
+    """
+    __slots__ = ()
+
+    def info(self, now=None):
+        """
+        构建信息字段
+
+        对象: ;名称(9位)*DDHHMMz纬度表经度符号注释
+        物品: )名称!纬度表经度符号注释 (删除时 ! 改为 _)
+        """
+        position = f"{self.latitude}{self.symbol_table}{self.longitude}{self.symbol_code}{self.comment}"
+        if self.kind == "item":
+            return f"){self.name}{'!' if self.live else '_'}{position}"
+        timestamp = (now or datetime.utcnow()).strftime("%d%H%Mz")
+        return f";{self.name:<9}{'*' if self.live else '_'}{timestamp}{position}"
+
+    def killed(self):
+        """返回对应的删除报文对象"""
+        return self._replace(live=False)
+
+def build_aprs_object(name, latitude, longitude, symbol_table="/", symbol_code="E", comment="",
+                      kind="object", live=True):
+    """
+    校验参数并构建 APRSObject
+
+    参数:
+    name         - 名称 (对象最长9字符；物品3-9字符，不能包含 ! 和 _)
+    latitude     - 纬度 (十进制度或 ddmm.mmN 格式)
+    longitude    - 经度 (十进制度或 dddmm.mmE 格式)
+    symbol_table - 符号表 (/ \\ 或叠加字符)
+    symbol_code  - 符号代码
+    comment      - 注释 (最长43字符)
+    kind         - "object" 或 "item"
+    live         - False 表示删除该对象
+
+    返回:
+    APRSObject
+
+    异常:
+    ValueError - 参数无效
+    """
+    name = str(name).strip()
+    kind = (kind or "object").strip().lower()
+    if kind not in ("object", "item"):
+        raise ValueError(f"类型必须为 object 或 item: {kind}")
+    if not name or len(name) > 9 or any(not 0x20 <= ord(c) <= 0x7e for c in name):
+        raise ValueError(f"名称必须为1-9个ASCII字符: {name}")
+    if kind == "item" and (len(name) < 3 or "!" in name or "_" in name):
+        raise ValueError(f"物品名称必须为3-9个字符且不能包含 ! 或 _: {name}")
+    
+    latitude = _aprs_coordinate(latitude, APRS_LATITUDE_PATTERN, decimal_to_aprs_lat, 90, "纬度")
+    longitude = _aprs_coordinate(longitude, APRS_LONGITUDE_PATTERN, decimal_to_aprs_lon, 180, "经度")
+    
+    if symbol_table not in ("/", "\\") and not is_overlay_table(symbol_table):
+        raise ValueError(f"符号表无效: {symbol_table}")
+    if len(symbol_code) != 1 or not 0x21 <= ord(symbol_code) <= 0x7e:
+        raise ValueError(f"符号代码无效: {symbol_code}")
+    
+    comment = (comment or "").strip()
+    if len(comment) > APRS_OBJECT_COMMENT_MAX:
+        raise ValueError(f"注释超过{APRS_OBJECT_COMMENT_MAX}个字符: {name}")
+    if any(c in APRS_MESSAGE_FORBIDDEN for c in comment):
+        raise ValueError(f"注释不能包含 {APRS_MESSAGE_FORBIDDEN}: {name}")
+    
+    return APRSObject(name, latitude, longitude, symbol_table, symbol_code, comment, kind, bool(live))
+
+def _aprs_coordinate(value, pattern, convert, limit, label):
+    """把十进制度或 APRS 格式坐标统一为 APRS 格式"""
+    text = str(value).strip().upper()
+    if pattern.match(text):
+        return text
+    try:
+        decimal = float(text)
+    except ValueError:
+        raise ValueError(f"{label}格式无效: {value}")
+    if not -limit <= decimal <= limit:
+        raise ValueError(f"{label}超出范围: {value}")
+    return convert(decimal)
+
+def _parse_live(value):
+    """解析 live 列：空值为 True，0/false/no/kill/delete 为 False"""
+    if value is None or value == "":
+        return True
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() not in ("0", "false", "no", "kill", "delete")
+
+def _object_from_fields(fields):
+    """从 CSV 行或 GeoJSON 属性构建对象（symbol 列可写成两字符表+代码）"""
+    symbol = (fields.get("symbol") or "").strip()
+    symbol_table = fields.get("symbol_table") or (symbol[0] if len(symbol) == 2 else "/")
+    symbol_code = fields.get("symbol_code") or (symbol[1] if len(symbol) == 2 else symbol or "E")
+    return build_aprs_object(
+        fields.get("name", ""),
+        fields.get("latitude", fields.get("lat", "")),
+        fields.get("longitude", fields.get("lon", "")),
+        symbol_table=symbol_table,
+        symbol_code=symbol_code,
+        comment=fields.get("comment") or "",
+        kind=fields.get("type") or fields.get("kind") or "object",
+        live=_parse_live(fields.get("live"))
+    )
+
+def load_aprs_objects(path):
+    """
+    从 CSV 或 GeoJSON 文件导入对象，先校验全部行，有任何错误时整体拒绝
+
+    CSV 列: name, lat/latitude, lon/longitude, symbol (如 /E) 或 symbol_table + symbol_code,
+           comment, type (object/item), live
+    GeoJSON: Point 要素，属性同 CSV 列名，坐标取自 geometry
+
+    参数:
+    path - 文件路径 (.json/.geojson 按 GeoJSON 解析，其余按 CSV)
+
+    返回:
+    list - APRSObject 列表（保持文件顺序）
+
+    异常:
+    ValueError - 校验失败，消息中列出所有出错的行
+    """
+    rows = []
+    if path.lower().endswith((".json", ".geojson")):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        features = data.get("features", []) if data.get("type") == "FeatureCollection" else [data]
+        for number, feature in enumerate(features, 1):
+            fields = dict(feature.get("properties") or {})
+            geometry = feature.get("geometry") or {}
+            if geometry.get("type") == "Point" and len(geometry.get("coordinates") or ()) >= 2:
+                fields["longitude"], fields["latitude"] = geometry["coordinates"][:2]
+            rows.append((f"要素 {number}", fields))
+    else:
+        with open(path, encoding="utf-8-sig", newline="") as f:
+            for number, row in enumerate(csv.DictReader(f), 2):
+                fields = {(key or "").strip().lower(): (value or "").strip() for key, value in row.items()}
+                rows.append((f"第 {number} 行", fields))
+    
+    objects = []
+    errors = []
+    names = set()
+    for label, fields in rows:
+        try:
+            obj = _object_from_fields(fields)
+        except ValueError as e:
+            errors.append(f"{label}: {str(e)}")
+            continue
+        if obj.name in names:
+            errors.append(f"{label}: 名称重复: {obj.name}")
+            continue
+        names.add(obj.name)
+        objects.append(obj)
+    
+    if errors:
+        raise ValueError("\n".join(errors))
+    return objects
+
+class ObjectBatchSender:
+    """
+    对象批量发送（限速 + 增量重发）
+
+    记录每个对象上次成功发送的内容，再次发送时只发送新增或变化的对象；
+    发送失败的对象不记录，下一次自动重试。可选对已从列表中移除的对象发送删除报文。
+    """
+
+    def __init__(self, callsign, path, send_func, rate=1.0, clock=time_module.monotonic):
+        """
+        参数:
+        callsign  - 发送呼号
+        path      - 转发路径
+        send_func - send_func(aprs_data) -> 结果字典
+        rate      - 最大发送速率 (包/秒)
+        """
+        self.callsign = callsign.upper()
+        self.path = path
+        self.send_func = send_func
+        self.interval = 1.0 / rate if rate and rate > 0 else 0.0
+        self.clock = clock
+        self.sent = {}                        # 名称 -> 上次成功发送的 APRSObject
+        self._stop = threading.Event()
+
+    def packet(self, obj, now=None):
+        """构建对象的完整 TNC2 数据包"""
+        return f"{self.callsign}>APRSTV,{self.path}:{obj.info(now)}"
+
+    def pending(self, objects, kill_removed=False, force=False):
+        """
+        计算需要发送的对象
+
+        返回:
+        list - 新增或变化的对象 (force 为 True 时为全部对象)；kill_removed 为 True 时追加已移除对象的删除报文
+        """
+        changed = [obj for obj in objects if force or self.sent.get(obj.name) != obj]
+        if kill_removed:
+            names = {obj.name for obj in objects}
+            changed.extend(obj.killed() for name, obj in self.sent.items() if name not in names and obj.live)
+        return changed
+
+    def send(self, objects, force=False, kill_removed=False, on_result=None):
+        """
+        限速发送对象
+
+        参数:
+        objects      - APRSObject 列表
+        force        - True 时全部重发，忽略上次发送记录
+        kill_removed - True 时为上次发送过但已不在列表中的对象发送删除报文
+        on_result    - 可选: on_result(结果) 每个对象发送后回调
+
+        返回:
+        list - 按输入顺序排列的结果 {"name", "rs", "message", "aprs_data"}，删除报文的结果排在最后；
+               未变化的对象 rs 为 "skip"，被 stop() 中断而未发送的对象 rs 为 "stopped"
+        """
+        self._stop.clear()
+        objects = list(objects)
+        to_send = self.pending(objects, kill_removed, force)
+        pending_names = {obj.name for obj in to_send}
+        results = [
+            {"name": obj.name, "rs": "stopped", "message": "已中断，未发送", "aprs_data": ""}
+            if obj.name in pending_names else
+            {"name": obj.name, "rs": "skip", "message": "未变化", "aprs_data": ""}
+            for obj in objects
+        ]
+        positions = {obj.name: index for index, obj in enumerate(objects)}
+        
+        next_due = self.clock()
+        for obj in to_send:
+            # 限速：按固定间隔发送，stop() 可随时中断等待
+            delay = next_due - self.clock()
+            if delay > 0 and self._stop.wait(delay):
+                break
+            if self._stop.is_set():
+                break
+            next_due = max(next_due, self.clock()) + self.interval
+            
+            packet = self.packet(obj)
+            try:
+                result = self.send_func(packet)
+            except Exception as e:
+                result = {"rs": "err", "message": str(e)}
+            if result.get("rs") == "ok":
+                if obj.live:
+                    self.sent[obj.name] = obj
+                else:
+                    self.sent.pop(obj.name, None)
+            entry = {"name": obj.name, "rs": result.get("rs"), "message": result.get("message", ""),
+                     "aprs_data": packet}
+            index = positions.get(obj.name)
+            if index is not None:
+                results[index] = entry
+            else:
+                results.append(entry)  # 已移除对象的删除报文
+            if on_result is not None:
+                on_result(entry)
+        return results
+
+    def stop(self):
+        """中断正在进行的批量发送"""
+        self._stop.set()
+
+    def save_state(self, path):
+        """保存上次发送记录 (JSON)，用于命令行多次运行之间增量发送"""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({name: list(obj) for name, obj in self.sent.items()}, f, ensure_ascii=False, indent=2)
+
+    def load_state(self, path):
+        """读取上次发送记录，文件不存在时忽略"""
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        self.sent = {name: APRSObject(*fields) for name, fields in data.items()}
+
+# 本地接入网关
+TNC2_PATTERN = re.compile(
+    r"^(?P<source>[A-Z0-9]{1,6}(?:-[0-9]{1,2})?)>(?P<dest>[A-Z0-9]{1,6}(?:-[0-9]{1,2})?)"
+    r"(?P<path>(?:,[A-Z0-9*-]{1,10}){0,8}):(?P<info>.+)$",
+    re.IGNORECASE
+)
+TNC2_MAX_LENGTH = 512
+
+class RateLimiter:
+    """令牌桶限速（多线程共享）"""
+
+    def __init__(self, rate, burst=None, clock=time_module.monotonic):
+        """
+        参数:
+        rate  - 平均速率 (次/秒)，0 表示不限速
+        burst - 突发容量 (默认等于 rate，至少 1)
+        """
+        self.rate = rate
+        self.burst = burst or max(1.0, rate)
+        self.clock = clock
+        self._tokens = self.burst
+        self._stamp = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self, stop_event=None):
+        """取得一个令牌，没有令牌时等待；stop_event 被设置时返回 False"""
+        if not self.rate:
+            return True
+        while True:
+            with self._lock:
+                now = self.clock()
+                self._tokens = min(self.burst, self._tokens + (now - self._stamp) * self.rate)
+                self._stamp = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                delay = (1 - self._tokens) / self.rate
+            if stop_event is not None:
+                if stop_event.wait(delay):
+                    return False
+            else:
+                time_module.sleep(delay)
+
+class PacketGateway:
+    """
+    本地接入网关：其他程序通过 UDP / TCP / HTTP 提交 TNC2 数据包或 JSON 参数，
+    网关统一校验、去重后经一个共享的限速上行链路 (连接池或 EndpointPool) 发送
+
+    上行队列有上限，队列满时施加背压：UDP 丢弃并计数，TCP 阻塞读取直到有空位 (超时回复 BUSY)，
+    HTTP 返回 503 和 Retry-After。每个客户端 (协议:主机) 单独统计，不区分源端口；
+    客户端统计和验证码缓存都有数量上限，超过时淘汰最久未活动的记录。
+    """
+
+    MAX_CLIENTS = 256                         # 客户端统计上限
+    MAX_WORDS = 1024                          # 验证码缓存上限
+
+    def __init__(self, url=APRS_SUBMIT_URL, endpoints=None, rate=5.0, burst=None, queue_size=1000,
+                 workers=4, dedupe_window=30, block_timeout=5.0, profiler=None):
+        """
+        参数:
+        url           - 提交地址 (未提供 endpoints 时使用)
+        endpoints     - 可选: 服务器地址列表 (EndpointPool，支持 APRS-IS)
+        rate          - 上行最大速率 (包/秒)
+        burst         - 上行突发容量
+        queue_size    - 上行队列长度上限
+        workers       - 上行发送线程数
+        dedupe_window - 去重窗口 (秒)
+        block_timeout - TCP 客户端在队列满时最长等待时间 (秒)
+        profiler      - 可选: ProfilerHooks，接收和上行发送在各自线程中通过 profiler.call 分析
+        """
+        self.url = url
+        self.profiler = profiler or ProfilerHooks()
+        self.pool = EndpointPool(endpoints) if endpoints else None
+        self.session = create_http_session(pool_size=workers)
+        self.limiter = RateLimiter(rate, burst)
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.workers = workers
+        self.dedupe_cache = PacketDedupeCache(dedupe_window)
+        self.templates = PacketTemplateCache()
+        self.block_timeout = block_timeout
+        self.clients = OrderedDict()          # 客户端 -> 统计，按最近活动排列
+        self.uplink = {"sent": 0, "ok": 0, "err": 0, "latency": 0.0}
+        self._words = OrderedDict()           # 呼号 -> 验证码 (LRU)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._threads = []
+        self._servers = []
+
+    # ---- 解析与入队 ----
+
+    def _count(self, client, key, amount=1):
+        with self._lock:
+            stats = self.clients.get(client)
+            if stats is None:
+                stats = self.clients[client] = {
+                    "received": 0, "queued": 0, "invalid": 0, "dup": 0, "dropped": 0,
+                    "ok": 0, "err": 0, "last_seen": None,
+                }
+                if len(self.clients) > self.MAX_CLIENTS:
+                    self.clients.popitem(last=False)
+            else:
+                self.clients.move_to_end(client)
+            stats[key] += amount
+            stats["last_seen"] = datetime.now().strftime("%H:%M:%S")
+
+    def _aprs_word(self, callsign):
+        with self._lock:
+            word = self._words.get(callsign)
+            if word is not None:
+                self._words.move_to_end(callsign)
+                return word
+            word = self._words[callsign] = str(calculate_aprs_verification_code(callsign))
+            if len(self._words) > self.MAX_WORDS:
+                self._words.popitem(last=False)
+            return word
+
+    def parse(self, line):
+        """
+        校验一行输入，返回 (aprs_data, aprs_word, dedupe_key)
+
+        输入为 TNC2 数据包，或 JSON：{"aprs": TNC2, "isword": 可选} 或 send_aprs_packet 的参数 (需要 callsign)
+
+        异常:
+        ValueError - 输入无效
+        """
+        line = line.strip()
+        if line.startswith("{"):
+            try:
+                spec = json.loads(line)
+            except ValueError:
+                raise ValueError("JSON 格式无效")
+            if not isinstance(spec, dict):
+                raise ValueError("JSON 必须为对象")
+            if "aprs" not in spec:
+                if not spec.get("callsign"):
+                    raise ValueError("缺少 aprs 或 callsign")
+                kwargs = StationConfig.from_spec(spec).send_kwargs()
+                static = (kwargs["callsign"], kwargs["path"], kwargs["symbol_table"], kwargs["symbol_code"],
+                          kwargs["comment"], kwargs["power"], kwargs["antenna_height"], kwargs["gain"],
+                          kwargs["device_info"], kwargs["software_info"], kwargs["phg"], kwargs["text_budget"])
+                aprs_data, dedupe_key = self.templates.get(*static).build(
+                    kwargs["latitude"], kwargs["longitude"], kwargs["speed"], kwargs["course"], kwargs["altitude"]
+                )
+                return aprs_data, self._aprs_word(kwargs["callsign"].upper()), dedupe_key
+            line = str(spec["aprs"]).strip()
+            word = spec.get("isword")
+        else:
+            word = None
+        
+        if len(line.encode("utf-8")) > TNC2_MAX_LENGTH:
+            raise ValueError(f"数据包超过 {TNC2_MAX_LENGTH} 字节")
+        match = TNC2_PATTERN.match(line)
+        if match is None:
+            raise ValueError("不是有效的 TNC2 数据包 (呼号>目的,路径:信息)")
+        header = line[:match.start("info") - 1].upper()
+        aprs_data = f"{header}:{match.group('info')}"
+        source = match.group("source").upper()
+        return aprs_data, str(word) if word else self._aprs_word(source), aprs_data
+
+    def submit(self, client, line, block=False):
+        """
+        校验、去重并放入上行队列
+
+        参数:
+        client - 客户端标识 (协议:主机)
+        line   - 一行输入
+        block  - 队列满时是否等待 (最长 block_timeout 秒)
+
+        返回:
+        (状态, 说明) - 状态为 "queued" / "dup" / "invalid" / "busy"
+        """
+        self._count(client, "received")
+        try:
+            aprs_data, aprs_word, dedupe_key = self.parse(line)
+        except ValueError as e:
+            self._count(client, "invalid")
+            return "invalid", str(e)
+        
+        if self.dedupe_cache.check_and_add(dedupe_key):
+            self._count(client, "dup")
+            return "dup", "窗口内重复"
+        try:
+            self.queue.put((client, aprs_data, aprs_word, dedupe_key), block=block, timeout=self.block_timeout if block else None)
+        except queue.Full:
+            # 没有发出，允许客户端稍后重试
+            self.dedupe_cache.discard(dedupe_key)
+            self._count(client, "dropped")
+            return "busy", "上行队列已满"
+        self._count(client, "queued")
+        return "queued", aprs_data
+
+    # ---- 上行发送 ----
+
+    def _uplink_worker(self):
+        while not self._stop.is_set():
+            try:
+                client, aprs_data, aprs_word, dedupe_key = self.queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            try:
+                if not self.limiter.acquire(self._stop):
+                    # 停止时没有发出，移除去重记录
+                    self.dedupe_cache.discard(dedupe_key)
+                    self._count(client, "dropped")
+                    break
+                start = time_module.perf_counter()
+                result = self.profiler.call(
+                    "gateway_uplink", post_aprs_data, aprs_data, aprs_word, session=self.session, url=self.url,
+                    dedupe_cache=self.dedupe_cache, dedupe_key=dedupe_key, pool=self.pool
+                )
+                elapsed = time_module.perf_counter() - start
+                status = "ok" if result.get("rs") == "ok" else "err"
+                self._count(client, status)
+                with self._lock:
+                    self.uplink["sent"] += 1
+                    self.uplink[status] += 1
+                    self.uplink["latency"] = elapsed if self.uplink["sent"] == 1 else 0.2 * elapsed + 0.8 * self.uplink["latency"]
+            finally:
+                self.queue.task_done()
+
+    # ---- 监听 ----
+
+    def serve_udp(self, port, host="127.0.0.1"):
+        """监听 UDP：每个数据报可包含多行，队列满时丢弃"""
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.bind((host, port))
+        sock.settimeout(0.5)
+        self._servers.append(sock)
+        
+        def run():
+            while not self._stop.is_set():
+                try:
+                    data, address = sock.recvfrom(65535)
+                except socket.timeout:
+                    continue
+                except OSError:
+                    break
+                client = f"udp:{address[0]}"
+                for line in data.decode("utf-8", errors="replace").splitlines():
+                    if line.strip():
+                        self.profiler.call("gateway_submit", self.submit, client, line)
+        self._start_thread(run)
+        return sock.getsockname()[1]
+
+    def serve_tcp(self, port, host="127.0.0.1"):
+        """监听 TCP：按行读取，每行回复 OK/DUP/ERR/BUSY；队列满时阻塞读取形成背压"""
+        gateway = self
+        
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                client = f"tcp:{self.client_address[0]}"
+                replies = {"queued": "OK", "dup": "DUP", "invalid": "ERR", "busy": "BUSY"}
+                for raw in self.rfile:
+                    line = raw.decode("utf-8", errors="replace").strip()
+                    if not line:
+                        continue
+                    status, detail = gateway.profiler.call("gateway_submit", gateway.submit, client, line, True)
+                    reply = replies[status] if status in ("queued", "dup") else f"{replies[status]} {detail}"
+                    self.wfile.write((reply + "\r\n").encode("utf-8"))
+        
+        server = socketserver.ThreadingTCPServer((host, port), Handler)
+        server.daemon_threads = True
+        self._servers.append(server)
+        self._start_thread(server.serve_forever)
+        return server.server_address[1]
+
+    def serve_http(self, port, host="127.0.0.1"):
+        """
+        监听 HTTP：POST 提交，GET /stats 返回统计；队列满时返回 503
+
+        POST 正文为每行一个数据包 (TNC2 或 JSON 对象，即 NDJSON)，或一个 JSON 数组。
+        """
+        gateway = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            def _reply(self, code, payload, headers=()):
+                body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                self.send_response(code)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in headers:
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def do_GET(self):
+                if self.path.rstrip("/") == "/stats":
+                    self._reply(200, gateway.stats())
+                else:
+                    self._reply(404, {"error": "not found"})
+            
+            def do_POST(self):
+                client = f"http:{self.client_address[0]}"
+                length = int(self.headers.get("Content-Length") or 0)
+                text = self.rfile.read(length).decode("utf-8", errors="replace")
+                if text.lstrip().startswith("["):
+                    try:
+                        items = json.loads(text)
+                    except ValueError:
+                        self._reply(400, {"error": "JSON 数组格式无效"})
+                        return
+                    lines = [json.dumps(item, ensure_ascii=False) if isinstance(item, dict) else str(item)
+                             for item in items]
+                else:
+                    lines = [line for line in text.splitlines() if line.strip()]
+                results = [dict(zip(("status", "detail"), gateway.profiler.call("gateway_submit", gateway.submit, client, line)))
+                           for line in lines]
+                if any(result["status"] == "busy" for result in results):
+                    self._reply(503, {"results": results}, [("Retry-After", "1")])
+                else:
+                    self._reply(200, {"results": results})
+            
+            def log_message(self, format, *args):
+                pass
+        
+        server = ThreadingHTTPServer((host, port), Handler)
+        server.daemon_threads = True
+        self._servers.append(server)
+        self._start_thread(server.serve_forever)
+        return server.server_address[1]
+
+    def _start_thread(self, target):
+        thread = threading.Thread(target=target, daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def start(self):
+        """启动上行发送线程"""
+        for _ in range(self.workers):
+            self._start_thread(self._uplink_worker)
+        if self.pool is not None:
+            self.pool.start()
+        return self
+
+    def stop(self):
+        """停止监听和发送"""
+        self._stop.set()
+        for server in self._servers:
+            if isinstance(server, socket.socket):
+                server.close()
+            else:
+                server.shutdown()
+                server.server_close()
+        for thread in self._threads:
+            thread.join(timeout=2)
+        # 队列中未发出的数据包移除去重记录
+        while True:
+            try:
+                client, _, _, dedupe_key = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            self.dedupe_cache.discard(dedupe_key)
+            self._count(client, "dropped")
+            self.queue.task_done()
+        self.session.close()
+        if self.pool is not None:
+            self.pool.stop()
+
+    def stats(self):
+        """统计快照 {"queue", "queue_size", "uplink", "clients"}"""
+        with self._lock:
+            return {
+                "queue": self.queue.qsize(),
+                "queue_size": self.queue.maxsize,
+                "uplink": {
+                    "sent": self.uplink["sent"], "ok": self.uplink["ok"], "err": self.uplink["err"],
+                    "latency_ms": round(self.uplink["latency"] * 1000, 1),
+                },
+                "clients": {client: dict(stats) for client, stats in self.clients.items()},
+            }
+
+# 性能分析输出目录
+PROFILE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "profiles")
+
+class SamplingProfiler:
+    """
+    低开销采样分析器：后台线程按固定间隔读取所有线程的调用栈，
+    按 "线程;函数;函数..." 合并计数，输出 flamegraph.pl / speedscope 可读的折叠栈格式
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.counts = {}                      # 折叠栈 -> 采样次数
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """开始采样"""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="aprs-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """停止采样"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                key = ";".join(reversed(stack))
+                self.counts[key] = self.counts.get(key, 0) + 1
+            self.samples += 1
+
+    def dump_collapsed(self, path):
+        """写出折叠栈文件（每行: 栈 次数）"""
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in sorted(self.counts.items()):
+                f.write(f"{stack} {count}\n")
+
+class ProfilerHooks:
+    """
+    按需性能分析：cProfile 或采样分析器 + 事件耗时统计
+
+    cProfile 只分析调用 start() 的线程（GUI 主循环），后台线程通过 call() 包装后
+    各自建立分析器，停止时合并为一个 pstats 文件；采样模式覆盖本进程全部线程。
+    分片发送的子进程各自 start() / export()，父进程用 merge() 合并结果。
+    timed() 包装的函数记录每次调用的耗时（例如占用 GUI 线程的时间）。
+    """
+
+    def __init__(self, max_events=10000):
+        self.mode = None                      # None / "cprofile" / "sample"
+        self.started = None
+        self.events = deque(maxlen=max_events)  # (名称, 线程, 开始偏移, 耗时)
+        self.event_stats = {}                 # 名称 -> [次数, 总耗时, 最大耗时]
+        self._main_profile = None
+        self._thread_profiles = []
+        self._worker_files = []               # 子进程写出的临时 pstats 文件
+        self._worker_counts = {}              # 子进程的折叠栈计数
+        self._sampler = None
+        self._lock = threading.Lock()
+
+    @property
+    def active(self):
+        return self.mode is not None
+
+    def start(self, mode="cprofile", interval=0.005):
+        """
+        开始分析（cprofile 模式需要在要分析的主线程中调用）
+
+        参数:
+        mode     - "cprofile" 或 "sample"
+        interval - 采样间隔 (秒)
+        """
+        if self.active:
+            raise ValueError("性能分析已在运行")
+        if mode not in ("cprofile", "sample"):
+            raise ValueError(f"未知的分析模式: {mode}")
+        self.events.clear()
+        self.event_stats = {}
+        self._thread_profiles = []
+        self._worker_files = []
+        self._worker_counts = {}
+        self.started = time_module.perf_counter()
+        if mode == "cprofile":
+            self._main_profile = cProfile.Profile()
+            self._main_profile.enable()
+        else:
+            self._sampler = SamplingProfiler(interval).start()
+        self.mode = mode
+
+    def call(self, name, func, *args, **kwargs):
+        """在后台线程中执行 func：cprofile 模式下单独分析，同时记录耗时"""
+        if self.mode != "cprofile":
+            return self._timed_call(name, func, args, kwargs)
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # 解释器同一时间只允许一个分析器时只记录耗时
+            return self._timed_call(name, func, args, kwargs)
+        try:
+            return self._timed_call(name, func, args, kwargs)
+        finally:
+            profile.disable()
+            with self._lock:
+                self._thread_profiles.append(profile)
+
+    def timed(self, name, func):
+        """返回记录每次调用耗时的包装函数"""
+        def wrapper(*args, **kwargs):
+            return self._timed_call(name, func, args, kwargs)
+        return wrapper
+
+    def _timed_call(self, name, func, args, kwargs=None):
+        if not self.active:
+            return func(*args, **(kwargs or {}))
+        start = time_module.perf_counter()
+        try:
+            return func(*args, **(kwargs or {}))
+        finally:
+            elapsed = time_module.perf_counter() - start
+            with self._lock:
+                self.events.append((name, threading.current_thread().name, start - self.started, elapsed))
+                stats = self.event_stats.setdefault(name, [0, 0.0, 0.0])
+                stats[0] += 1
+                stats[1] += elapsed
+                stats[2] = max(stats[2], elapsed)
+
+    def stop(self, output_dir=PROFILE_DIR):
+        """
+        停止分析并写出结果文件
+
+        返回:
+        list - 写出的文件路径 (.pstats / .folded / 事件耗时 .csv)
+        """
+        if not self.active:
+            return []
+        # 先停止分析，写文件失败时分析器也不会一直运行
+        mode, self.mode = self.mode, None
+        main_profile, self._main_profile = self._main_profile, None
+        sampler, self._sampler = self._sampler, None
+        if mode == "cprofile":
+            main_profile.disable()
+        else:
+            sampler.stop()
+        with self._lock:
+            thread_profiles, self._thread_profiles = self._thread_profiles, []
+            worker_files, self._worker_files = self._worker_files, []
+            worker_counts, self._worker_counts = self._worker_counts, {}
+            events = list(self.events)
+        
+        try:
+            os.makedirs(output_dir, exist_ok=True)
+            prefix = os.path.join(output_dir, f"aprs-{datetime.now().strftime('%Y%m%d-%H%M%S')}")
+            paths = []
+            if mode == "cprofile":
+                stats = pstats.Stats(main_profile)
+                for source in thread_profiles + worker_files:
+                    stats.add(source)
+                stats.dump_stats(prefix + ".pstats")
+                paths.append(prefix + ".pstats")
+            else:
+                for stack, count in worker_counts.items():
+                    sampler.counts[stack] = sampler.counts.get(stack, 0) + count
+                sampler.dump_collapsed(prefix + ".folded")
+                paths.append(prefix + ".folded")
+        finally:
+            for path in worker_files:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+        
+        with open(prefix + "-events.csv", "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["event", "thread", "start_ms", "duration_ms"])
+            for name, thread, start, elapsed in events:
+                writer.writerow([name, thread, f"{start * 1000:.3f}", f"{elapsed * 1000:.3f}"])
+        paths.append(prefix + "-events.csv")
+        return paths
+
+    def export(self):
+        """
+        停止子进程中的分析，返回可以传回父进程合并的结果
+
+        返回:
+        tuple - ("cprofile", 临时 pstats 文件路径) 或 ("sample", 折叠栈计数)；未在分析时返回 None
+        """
+        if not self.active:
+            return None
+        mode, self.mode = self.mode, None
+        if mode == "cprofile":
+            self._main_profile.disable()
+            fd, path = tempfile.mkstemp(prefix="aprs-worker-", suffix=".pstats")
+            os.close(fd)
+            self._main_profile.dump_stats(path)
+            self._main_profile = None
+            return mode, path
+        self._sampler.stop()
+        counts = self._sampler.counts
+        self._sampler = None
+        return mode, counts
+
+    def merge(self, exported, label):
+        """
+        合并子进程 export() 的结果
+
+        参数:
+        exported - export() 的返回值
+        label    - 采样模式下折叠栈的前缀 (如 "shard-0")，区分各子进程
+        """
+        if exported is None:
+            return
+        mode, payload = exported
+        with self._lock:
+            if mode == "cprofile" and self.mode == "cprofile":
+                self._worker_files.append(payload)
+                return
+            if mode == "sample" and self.mode == "sample":
+                for stack, count in payload.items():
+                    key = f"{label};{stack}"
+                    self._worker_counts[key] = self._worker_counts.get(key, 0) + count
+                return
+        if mode == "cprofile":
+            os.remove(payload)
+
+    def summary(self):
+        """事件耗时汇总（按总耗时排序）"""
+        with self._lock:
+            items = sorted(self.event_stats.items(), key=lambda item: item[1][1], reverse=True)
+        return [
+            {"event": name, "count": count, "total_ms": total * 1000,
+             "avg_ms": total * 1000 / count, "max_ms": peak * 1000}
+            for name, (count, total, peak) in items
+        ]
+
+class SystemClock:
+    """系统时钟（定时发送循环使用，可替换为 VirtualClock 加速测试）"""
+
+    def monotonic(self):
+        return time_module.monotonic()
+
+    def time(self):
+        return time_module.time()
+
+    def wait(self, event, seconds):
+        """等待 seconds 秒或 event 被设置，返回 event 是否已设置"""
+        return event.wait(seconds)
+
+class VirtualClock(SystemClock):
+    """
+    加速虚拟时钟：虚拟时间按 speed 倍速前进，等待时间按比例缩短
+
+    例如 speed=3600 时，5 分钟的发送间隔实际只等待 1/12 秒。
+    """
+
+    def __init__(self, speed=3600.0):
+        self.speed = float(speed)
+        self._real_start = time_module.monotonic()
+        self._mono_start = self._real_start
+        self._wall_start = time_module.time()
+
+    def elapsed(self):
+        """已经过的虚拟秒数"""
+        return (time_module.monotonic() - self._real_start) * self.speed
+
+    def monotonic(self):
+        return self._mono_start + self.elapsed()
+
+    def time(self):
+        return self._wall_start + self.elapsed()
+
+    def wait(self, event, seconds):
+        return event.wait(max(0.0, seconds) / self.speed)
+
+class StartupTimer:
+    """
+    启动耗时统计：记录每个构建步骤的耗时和到首次空闲 (可交互) 的总耗时
     """
-    # 自动计算APRS验证码（如果未提供）
-    if aprs_word is None:
-        try:
-            aprs_word = str(calculate_aprs_verification_code(callsign))
-        except Exception as e:
-            aprs_word = "13023"  # 默认值
-            return {"rs": "err", "message": f"验证码计算错误: {str(e)}", "aprs_word": aprs_word}
-    
-    # 构建APRS数据包内容 - 使用标准位置报告格式
-    # 格式: /时间h纬度/经度e速度/方向/A=海拔 附加信息
-    now = datetime.utcnow()
-    timestamp = now.strftime("%H%M%S")
-    
-    # 构建位置报告部分
-    aprs_data = f"{callsign}>APRSTV,{path}:/{timestamp}h{latitude}{symbol_table}{longitude}e"
-    
-    # 添加速度和方向（如果提供）
-    if speed is not None and course is not None:
-        # 速度格式为三位数字 (000-999)
-        speed_str = f"{int(float(speed)):03d}"
-        # 方向格式为三位数字 (000-360)
-        course_str = f"{int(float(course)):03d}"
-        aprs_data += f"{speed_str}/{course_str}"
-    else:
-        aprs_data += "   /   "  # 空值
-    
-    # 添加海拔（如果提供）
-    if altitude is not None:
-        # 海拔转换为英尺并格式化为六位数字
-        altitude_ft = float(altitude) * 3.28084
-        aprs_data += f"/A={int(altitude_ft):06d}"
-    
-    # 构建状态信息部分（功率、天线高度、增益等）
-    status_info = []
-    
-    # 添加功率信息（如果提供）
-    if power is not None:
-        status_info.append(f"功率{power}W")
-    
-    # 添加天线高度信息（如果提供）
-    if antenna_height is not None:
-        status_info.append(f"天线高度{antenna_height}m")
-    
-    # 添加增益信息（如果提供）
-    if gain is not None:
-        status_info.append(f"增益{gain}dB")
-    
-    # 添加设备信息（如果提供）
-    if device_info:
-        status_info.append(device_info)
-    
-    # 添加软件信息（如果提供）
-    if software_info:
-        status_info.append(software_info)
-    
-    # 将状态信息组合成字符串
-    status_str = " ".join(status_info)
-    
-    # 添加注释和附加信息
-    if status_str:
-        full_comment = status_str + " " + comment
-    else:
-        full_comment = comment
-        
-    aprs_data += f" {full_comment}"
-    
-    # 准备POST数据
-    post_data = {
-        "aprs": aprs_data,
-        "isword": aprs_word
-    }
-    
-    # 设置请求头 (模拟浏览器请求)
-    headers = {
-        "authority": "aprs.tv",
-        "accept": "application/json, text/javascript, */*; q=0.01",
-        "accept-encoding": "gzip, deflate, br, zstd",
-        "accept-language": "zh-CN,zh;q=0.9,en;q=0.8,en-GB;q=0.7,en-US;q=0.6",
-        "content-type": "application/x-www-form-urlencoded; charset=UTF-8",
-        "dnt": "1",
-        "origin": "https://aprs.tv",
-        "priority": "u=1, i",
-        "referer": "https://aprs.tv/makeaprs",
-        "sec-ch-ua": '"Not)A;Brand";v="8", "Chromium";v="138", "Microsoft Edge";v="138"',
-        "sec-ch-ua-mobile": "?0",
-        "sec-ch-ua-platform": '"Windows"',
-        "sec-fetch-dest": "empty",
-        "sec-fetch-mode": "cors",
-        "sec-fetch-site": "same-origin",
-        "sec-gpc": "1",
-        "user-agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/138.0.0.0 Safari/537.36 Edg/138.0.0.0",
-        "x-requested-with": "XMLHttpRequest"
-    }
-    
-    try:
-        # 发送POST请求
-        response = requests.post(
-            "https://aprs.tv/makeaprs",
-            data=post_data,
-            headers=headers,
-            timeout=10
-        )
-        
-        # 尝试解析JSON响应
+
+    def __init__(self, clock=time_module.perf_counter):
+        self.clock = clock
+        self.start = clock()
+        self.steps = []                       # [(步骤名, 秒)]
+        self.total = None
+
+    def run(self, name, func, *args):
+        """执行一个步骤并记录耗时"""
+        start = self.clock()
         try:
-            result = response.json()
-        except:
-            result = {
-                "rs": "err",
-                "message": f"非JSON响应: {response.status_code} {response.text[:100]}",
-                "raw_response": response.text
-            }
-        
-        # 添加验证码信息
-        result["aprs_word"] = aprs_word
-        result["aprs_data"] = aprs_data  # 添加构建的数据包内容
-        return result
-    except Exception as e:
-        return {
-            "rs": "err",
-            "message": f"请求失败: {str(e)}",
-            "aprs_word": aprs_word,
-            "aprs_data": aprs_data  # 添加构建的数据包内容
+            return func(*args)
+        finally:
+            self.steps.append((name, self.clock() - start))
+
+    def finish(self, name="完成"):
+        """记录到当前为止的总耗时"""
+        self.total = self.clock() - self.start
+        self.steps.append((name, self.total - sum(seconds for _, seconds in self.steps)))
+        return self.report()
+
+    def report(self):
+        """耗时报告 {"total", "steps"}"""
+        return {"total": self.total, "steps": list(self.steps)}
+
+    def append_report(self, path):
+        """把本次启动耗时追加为一行 JSON（便于跨版本比较）"""
+        record = {
+            "time": datetime.now().isoformat(timespec="seconds"),
+            "total_ms": round(self.total * 1000, 1) if self.total is not None else None,
+            "steps_ms": {name: round(seconds * 1000, 1) for name, seconds in self.steps},
         }
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
 
 class APRSApp:
-    def __init__(self, root):
+    # 性能分析时记录耗时的 GUI 线程方法
+    PROFILED_GUI_EVENTS = (
+        "log_message", "_handle_send_result", "_handle_message_event", "update_dedupe_stats",
+        "update_gps_status", "update_endpoint_status", "redraw_icon_rows",
+    )
+    
+    # 日志区域最多保留的行数
+    LOG_MAX_LINES = 5000
+    
+    def __init__(self, root, startup_report=None, profiler=None, clock=None):
+        """
+        参数:
+        root           - Tk 根窗口
+        startup_report - 可选: 启动耗时报告文件 (每次启动追加一行 JSON)
+        profiler       - 可选: 已启动的 ProfilerHooks (命令行 --profile)
+        clock          - 可选: 定时发送使用的时钟 (默认 SystemClock，测试时可用 VirtualClock)
+        """
+        self.startup_timer = StartupTimer()
+        self.startup_report = startup_report
+        self.profiler = profiler or ProfilerHooks()
+        self.clock = clock or SystemClock()
+        
         self.root = root
         self.root.title("APRS数据包发送工具 - BG5FNL")
-        self.root.state('zoomed')  # 启动时最大化窗口
+        self.maximize_window()  # 启动时最大化窗口
         self.root.minsize(1000, 700)  # 设置最小尺寸
         
-        # 创建图标目录
-        self.icon_dir = "aprs_icons"
-        if not os.path.exists(self.icon_dir):
-            os.makedirs(self.icon_dir)
-        
-        # 加载图标配置（修正后的符号表）
+        # 加载图标配置（完整符号表，惰性只读）
         self.symbols = self.load_symbol_config()
         
         # 定时发送控制变量
         self.scheduled_enabled = False
         self.schedule_thread = None
+        self.schedule_stop = threading.Event()
+        self.schedule_state = None  # (配置快照, KISS输出)
+        
+        # 数据包模板（表单修改后常量参数变化，自动使用新模板）
+        self.packet_templates = PacketTemplateCache(size=16)
+        
+        # 发送历史（首次使用时才打开数据库）
+        self.history = None
+        self.history_lock = threading.Lock()
+        
+        # 地图控件（面板可见或首次使用时才创建）
+        self.map_widget = None
+        self.marker = None
         
         # 创建主框架（左右分栏）
-        self.create_main_frames()
+        self.startup_timer.run("主框架", self.create_main_frames)
         
         # 创建输入字段
-        self.create_input_fields()
+        self.startup_timer.run("输入字段", self.create_input_fields)
         
         # 创建按钮区域
-        self.create_button_area()
+        self.startup_timer.run("按钮区域", self.create_button_area)
         
         # 创建图标选择区域
-        self.create_icon_selector()
+        self.startup_timer.run("图标选择", self.create_icon_selector)
         
         # 创建日志区域
-        self.create_log_area()
+        self.startup_timer.run("日志区域", self.create_log_area)
         
         # 创建定时发送区域
-        self.create_schedule_area()
+        self.startup_timer.run("定时发送", self.create_schedule_area)
+        
+        # 创建提交服务器区域
+        self.startup_timer.run("提交服务器", self.create_endpoint_area)
+        
+        # 创建KISS输出区域
+        self.startup_timer.run("KISS输出", self.create_kiss_area)
+        
+        # 创建遥测区域
+        self.startup_timer.run("遥测", self.create_telemetry_area)
+        
+        # 创建气象站区域
+        self.startup_timer.run("气象站", self.create_weather_area)
+        
+        # 创建GPS区域
+        self.startup_timer.run("GPS", self.create_gps_area)
+        
+        # 创建消息区域
+        self.startup_timer.run("消息", self.create_message_area)
+        
+        # 创建批量对象区域
+        self.startup_timer.run("批量对象", self.create_object_area)
         
-        # 创建地图区域
-        self.create_map_area()
+        # 创建地图区域（只创建占位，地图控件延迟加载）
+        self.startup_timer.run("地图区域", self.create_map_area)
         
         # 创建APRS地图区域
-        self.create_aprs_map_area()
+        self.startup_timer.run("APRS地图", self.create_aprs_map_area)
         
         # 默认值
-        self.set_default_values()
+        self.startup_timer.run("默认值", self.set_default_values)
         
         # 加载图标
-        self.load_icons()
+        self.startup_timer.run("加载图标", self.load_icons)
         
         # 绑定全屏切换快捷键 (F11)
         self.root.bind("<F11>", self.toggle_fullscreen)
         
+        # 命令行已开启性能分析时记录GUI事件耗时
+        if self.profiler.active:
+            self.instrument_gui_events(True)
+            self.profile_button.config(text="停止分析并保存")
+        
+        # 窗口显示后第一次空闲即可交互，记录启动耗时
+        self.root.after_idle(self.on_startup_idle)
+        
     def create_main_frames(self):
         """创建主框架（左右分栏）"""
         # 创建主分栏
@@ -281,8 +4379,11 @@ class APRSApp:
         scrollbar = ttk.Scrollbar(self.left_frame, orient="vertical", command=self.canvas.yview)
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         
-        # 配置画布
-        self.canvas.configure(yscrollcommand=scrollbar.set)
+        # 配置画布（滚动或尺寸变化时检查地图面板是否进入可见区域）
+        def on_scroll(first, last):
+            scrollbar.set(first, last)
+            self.check_map_visible()
+        self.canvas.configure(yscrollcommand=on_scroll)
         self.canvas.bind('<Configure>', lambda e: self.canvas.configure(scrollregion=self.canvas.bbox("all")))
         
         # 创建内部框架（所有内容都放在这里）
@@ -301,117 +4402,171 @@ class APRSApp:
         """鼠标滚轮滚动"""
         self.canvas.yview_scroll(int(-1*(event.delta/120)), "units")
     
+    def on_startup_idle(self):
+        """启动完成（窗口已显示并进入事件循环），输出启动耗时报告"""
+        report = self.startup_timer.finish("首次空闲")
+        steps = ", ".join(f"{name} {seconds * 1000:.0f}ms" for name, seconds in report["steps"])
+        self.log_message(f"启动耗时 {report['total'] * 1000:.0f}ms ({steps})")
+        if self.startup_report:
+            try:
+                self.startup_timer.append_report(self.startup_report)
+            except OSError as e:
+                self.log_message(f"写入启动耗时报告失败: {str(e)}")
+    
+    def maximize_window(self):
+        """最大化窗口（Windows/macOS 使用 zoomed 状态，X11 使用 -zoomed 属性，都不支持时保持原大小）"""
+        try:
+            self.root.state('zoomed')
+        except tk.TclError:
+            try:
+                self.root.attributes('-zoomed', True)
+            except tk.TclError:
+                pass
+    
     def toggle_fullscreen(self, event=None):
         """切换全屏模式"""
         self.root.attributes("-fullscreen", not self.root.attributes("-fullscreen"))
     
     def load_symbol_config(self):
-        """加载图标配置（修正后的符号表）"""
-        symbols = {
-            "primary": {
-                "/": {
-                    ">": {"name": "汽车", "color": "red"},
-                    "<": {"name": "摩托车", "color": "blue"},
-                    "v": {"name": "面包车", "color": "green"},
-                    "^": {"name": "大型飞机", "color": "purple"},
-                    "L": {"name": "PC 用户", "color": "cyan"},
-                    "K": {"name": "学校", "color": "orange"},
-                    "H": {"name": "酒店", "color": "brown"},
-                    "h": {"name": "医院", "color": "pink"},
-                    "b": {"name": "自行车", "color": "navy"},
-                    "B": {"name": "BBS", "color": "teal"},
-                    "Y": {"name": "帆船", "color": "gray"},
-                    "O": {"name": "气球", "color": "magenta"},
-                    "C": {"name": "独木舟", "color": "darkred"}
-                }
-            },
-            "secondary": {
-                "\\": {
-                    ">": {"name": "红色汽车", "color": "red"},
-                    "<": {"name": "单个红色旗帜", "color": "blue"},
-                    "t": {"name": "龙卷风", "color": "green"},
-                    "^": {"name": "飞机", "color": "purple"},
-                    "L": {"name": "灯塔", "color": "cyan"},
-                    "N": {"name": "导航浮标", "color": "orange"},
-                    "H": {"name": "薄雾", "color": "brown"},
-                    "h": {"name": "商店", "color": "pink"},
-                    "b": {"name": "沙尘", "color": "navy"},
-                    "B": {"name": "吹雪", "color": "teal"},
-                    "S": {"name": "卫星", "color": "gray"},
-                    "O": {"name": "火箭", "color": "magenta"},
-                    "J": {"name": "闪电", "color": "darkred"}
-                }
-            }
-        }
-        
-        # 保存配置到文件
-        config_path = os.path.join(self.icon_dir, "symbols.json")
-        with open(config_path, "w") as f:
-            json.dump(symbols, f, indent=4)
-        
-        return symbols
+        """加载图标配置（完整符号表，首次使用时才读取数据文件）"""
+        return symbol_index
     
     def load_icons(self):
-        """加载图标到界面"""
-        # 清空当前图标
-        for widget in self.primary_frame.winfo_children():
-            widget.destroy()
-        for widget in self.secondary_frame.winfo_children():
-            widget.destroy()
-        
-        # 加载主表图标
-        ttk.Label(self.primary_frame, text="主符号表 (/):", font=("Arial", 10, "bold")).pack(anchor=tk.W, pady=5)
-        for code, info in self.symbols["primary"]["/"].items():
-            frame = ttk.Frame(self.primary_frame)
-            frame.pack(fill=tk.X, padx=5, pady=2)
-            
-            # 创建颜色方块
-            color_label = tk.Label(frame, bg=info["color"], width=3, height=1)
-            color_label.pack(side=tk.LEFT, padx=(0, 5))
-            
-            # 图标名称
-            name_label = ttk.Label(frame, text=f"{info['name']} ({code})", width=20)
-            name_label.pack(side=tk.LEFT, padx=5)
-            
-            # 选择按钮
-            btn = ttk.Button(
-                frame, 
-                text="选择", 
-                width=6,
-                command=lambda c=code, t="/", name=info["name"]: self.select_icon(c, t, name)
-            )
-            btn.pack(side=tk.RIGHT)
-        
-        # 加载副表图标
-        ttk.Label(self.secondary_frame, text="副符号表 (\\):", font=("Arial", 10, "bold")).pack(anchor=tk.W, pady=5)
-        for code, info in self.symbols["secondary"]["\\"].items():
-            frame = ttk.Frame(self.secondary_frame)
-            frame.pack(fill=tk.X, padx=5, pady=2)
-            
-            # 创建颜色方块
-            color_label = tk.Label(frame, bg=info["color"], width=3, height=1)
-            color_label.pack(side=tk.LEFT, padx=(0, 5))
-            
-            # 图标名称
-            name_label = ttk.Label(frame, text=f"{info['name']} ({code})", width=20)
-            name_label.pack(side=tk.LEFT, padx=5)
-            
-            # 选择按钮
-            btn = ttk.Button(
-                frame, 
-                text="选择", 
-                width=6,
-                command=lambda c=code, t="\\", name=info["name"]: self.select_icon(c, t, name)
-            )
-            btn.pack(side=tk.RIGHT)
+        """加载图标到界面（按搜索条件筛选后重绘可见行）"""
+        self.filter_icons()
+    
+    def filter_icons(self, *args):
+        """根据搜索内容和符号表筛选图标"""
+        selected = self.icon_table_var.get()
+        if selected.startswith("叠加 "):
+            # 叠加字符只作用于副表中可叠加的符号
+            items = self.symbols.search(self.icon_search_var.get(), overlay=selected[-1])
+            table_filter = None
+        else:
+            table_filter = {"主表 (/)": "/", "副表 (\\)": "\\"}.get(selected)
+            items = self.symbols.search(self.icon_search_var.get())
+        if table_filter:
+            items = [info for info in items if info["table"] == table_filter]
+        self.icon_items = items
+        self.icon_count_label.config(text=f"{len(items)} 个符号")
+        
+        # 清空已绘制的行，回到顶部
+        self.icon_canvas.delete("all")
+        self.icon_rows_drawn = {}
+        self.icon_canvas.yview_moveto(0)
+        self.redraw_icon_rows()
+    
+    def redraw_icon_rows(self, event=None):
+        """只绘制当前可见的图标行（虚拟化列表）"""
+        width = max(self.icon_canvas.winfo_width(), ICON_CELL_WIDTH)
+        columns = max(1, width // ICON_CELL_WIDTH)
+        if columns != self.icon_columns:
+            # 列数变化时全部重绘
+            self.icon_columns = columns
+            self.icon_canvas.delete("all")
+            self.icon_rows_drawn = {}
+        
+        total_rows = (len(self.icon_items) + columns - 1) // columns
+        self.icon_canvas.configure(scrollregion=(0, 0, columns * ICON_CELL_WIDTH, total_rows * ICON_CELL_HEIGHT))
+        
+        # 计算可见行范围（上下各多画一行）
+        top = self.icon_canvas.canvasy(0)
+        height = max(self.icon_canvas.winfo_height(), ICON_CELL_HEIGHT)
+        first_row = max(0, int(top // ICON_CELL_HEIGHT) - 1)
+        last_row = min(total_rows, int((top + height) // ICON_CELL_HEIGHT) + 2)
+        visible = set(range(first_row, last_row))
+        
+        # 删除不可见的行
+        for row in list(self.icon_rows_drawn):
+            if row not in visible:
+                self.icon_canvas.delete(f"row{row}")
+                del self.icon_rows_drawn[row]
+        
+        # 绘制新进入可见范围的行
+        for row in visible:
+            if row in self.icon_rows_drawn:
+                continue
+            self.icon_rows_drawn[row] = True
+            for column in range(columns):
+                index = row * columns + column
+                if index >= len(self.icon_items):
+                    break
+                self.draw_icon_cell(row, column, self.icon_items[index])
+    
+    def draw_icon_cell(self, row, column, info):
+        """在画布上绘制单个图标单元格"""
+        x = column * ICON_CELL_WIDTH
+        y = row * ICON_CELL_HEIGHT
+        tags = (f"row{row}", f"cell{info['table']}{info['code']}")
+        size = ICON_SPRITE_SIZE
+        top = y + (ICON_CELL_HEIGHT - size) // 2
+        
+        # 选中的图标加底色
+        if (info["table"], info["code"]) == (self.symbol_table_var.get(), self.symbol_code_var.get()):
+            self.icon_canvas.create_rectangle(x, y, x + ICON_CELL_WIDTH, y + ICON_CELL_HEIGHT, fill="#cce4ff", outline="", tags=tags)
+        
+        image = self.symbol_sprites.get(info["table"], info["code"])
+        if image is not None:
+            self.icon_canvas.create_image(x + 4, top, image=image, anchor=tk.NW, tags=tags)
+        else:
+            # 没有雪碧图时绘制颜色方块和符号代码
+            self.icon_canvas.create_rectangle(x + 4, top, x + 4 + size, top + size, fill=info["color"], outline="", tags=tags)
+            self.icon_canvas.create_text(x + 4 + size // 2, top + size // 2, text=info["code"], fill="white", font=("Arial", 10, "bold"), tags=tags)
+        
+        self.icon_canvas.create_text(
+            x + size + 10, y + ICON_CELL_HEIGHT // 2,
+            text=f"{info['name']} ({info['table']}{info['code']})",
+            anchor=tk.W,
+            width=ICON_CELL_WIDTH - size - 14,
+            tags=tags
+        )
+    
+    def on_icon_click(self, event):
+        """点击画布选择图标"""
+        x = self.icon_canvas.canvasx(event.x)
+        y = self.icon_canvas.canvasy(event.y)
+        column = int(x // ICON_CELL_WIDTH)
+        if column >= self.icon_columns:
+            return
+        index = int(y // ICON_CELL_HEIGHT) * self.icon_columns + column
+        if 0 <= index < len(self.icon_items):
+            info = self.icon_items[index]
+            self.select_icon(info["code"], info["table"], info["name"])
+    
+    def on_icon_search_return(self, event=None):
+        """搜索框回车：选择第一个匹配的图标"""
+        if self.icon_items:
+            info = self.icon_items[0]
+            self.select_icon(info["code"], info["table"], info["name"])
+    
+    def on_icon_mousewheel(self, event):
+        """图标画布滚轮滚动（不带动外层配置区域）"""
+        self.icon_canvas.yview_scroll(int(-1*(event.delta/120)), "units")
+        self.redraw_icon_rows()
+        return "break"
+    
+    def on_icon_scroll(self, *args):
+        """滚动条拖动"""
+        self.icon_canvas.yview(*args)
+        self.redraw_icon_rows()
     
     def select_icon(self, symbol_code, symbol_table, symbol_name):
         """选择图标"""
-        # 修正符号表值
-        actual_table = "/" if symbol_table == "/" else "\\"
+        # 修正符号表值（保留叠加字符）
+        if symbol_table in ("/", "\\") or is_overlay_table(symbol_table):
+            actual_table = symbol_table
+        else:
+            actual_table = "\\"
         self.symbol_table_var.set(actual_table)
         self.symbol_code_var.set(symbol_code)
         self.log_message(f"已选择图标: {symbol_name} ({actual_table}{symbol_code})")
+        
+        # 重绘可见行以更新选中状态
+        self.icon_canvas.delete("all")
+        self.icon_rows_drawn = {}
+        self.redraw_icon_rows()
+        
+        self.on_config_changed()
     
     def create_input_fields(self):
         """创建输入字段（添加速度、方向、海拔等扩展信息）"""
@@ -465,7 +4620,7 @@ class APRSApp:
         ttk.Label(grid_frame, text="符号表:").grid(row=row, column=0, sticky=tk.W, padx=5, pady=5)
         self.symbol_table_var = tk.StringVar()
         self.symbol_table_combobox = ttk.Combobox(grid_frame, width=5, textvariable=self.symbol_table_var, state="readonly")
-        self.symbol_table_combobox['values'] = ('/', '\\')
+        self.symbol_table_combobox['values'] = ('/', '\\') + tuple(SYMBOL_OVERLAY_CHARS)
         self.symbol_table_combobox.grid(row=row, column=1, sticky=tk.W, padx=5, pady=5)
         
         # 符号代码
@@ -519,6 +4674,17 @@ class APRSApp:
         ttk.Label(grid_frame, text="增益 (dB):").grid(row=row, column=0, sticky=tk.W, padx=5, pady=5)
         self.gain_entry = ttk.Entry(grid_frame, width=10)
         self.gain_entry.grid(row=row, column=1, sticky=tk.W, padx=5, pady=5)
+        
+        # 标准PHG编码
+        self.phg_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(grid_frame, text="使用标准PHG编码", variable=self.phg_var, command=self.on_config_changed).grid(row=row, column=2, columnspan=2, sticky=tk.W, padx=5, pady=5)
+        row += 1
+        
+        # 设备/软件信息字节上限
+        ttk.Label(grid_frame, text="信息字节上限:").grid(row=row, column=0, sticky=tk.W, padx=5, pady=5)
+        self.text_budget_entry = ttk.Entry(grid_frame, width=10)
+        self.text_budget_entry.grid(row=row, column=1, sticky=tk.W, padx=5, pady=5)
+        ttk.Label(grid_frame, text="留空不限制 (设备信息+软件信息, UTF-8字节)").grid(row=row, column=2, columnspan=3, sticky=tk.W, padx=5, pady=5)
         row += 1
         
         # 添加移动信息区域
@@ -546,21 +4712,62 @@ class APRSApp:
         self.status_entry = ttk.Entry(grid_frame, width=20)
         self.status_entry.grid(row=row, column=3, sticky=tk.W, padx=5, pady=5)
         row += 1
+        
+        # 修改完成后更新定时发送的配置快照
+        for widget in grid_frame.winfo_children():
+            if isinstance(widget, ttk.Entry):
+                widget.bind("<FocusOut>", self.on_config_changed, add="+")
+                widget.bind("<Return>", self.on_config_changed, add="+")
     
     def create_icon_selector(self):
-        """创建图标选择区域"""
+        """创建图标选择区域（画布网格，只绘制可见行）"""
         icon_frame = ttk.LabelFrame(self.main_frame, text="图标选择", padding="10")
         icon_frame.pack(fill=tk.X, pady=10, padx=10)
         
-        # 创建左右两个框架
-        columns_frame = ttk.Frame(icon_frame)
-        columns_frame.pack(fill=tk.X, padx=10, pady=5)
+        # 搜索栏
+        search_frame = ttk.Frame(icon_frame)
+        search_frame.pack(fill=tk.X, padx=5, pady=5)
+        
+        ttk.Label(search_frame, text="搜索 (名称/代码):").pack(side=tk.LEFT, padx=(0, 5))
+        self.icon_search_var = tk.StringVar()
+        self.icon_search_var.trace_add("write", self.filter_icons)
+        search_entry = ttk.Entry(search_frame, width=20, textvariable=self.icon_search_var)
+        search_entry.pack(side=tk.LEFT, padx=5)
+        search_entry.bind("<Return>", self.on_icon_search_return)
+        
+        self.icon_table_var = tk.StringVar(value="全部")
+        table_combobox = ttk.Combobox(
+            search_frame,
+            width=8,
+            textvariable=self.icon_table_var,
+            values=["全部", "主表 (/)", "副表 (\\)"] + [f"叠加 {c}" for c in SYMBOL_OVERLAY_CHARS],
+            state="readonly"
+        )
+        table_combobox.pack(side=tk.LEFT, padx=5)
+        table_combobox.bind("<<ComboboxSelected>>", self.filter_icons)
+        
+        self.icon_count_label = ttk.Label(search_frame, text="")
+        self.icon_count_label.pack(side=tk.RIGHT, padx=5)
+        
+        # 图标画布
+        grid_container = ttk.Frame(icon_frame)
+        grid_container.pack(fill=tk.X, padx=5, pady=5)
+        
+        self.icon_canvas = tk.Canvas(grid_container, height=ICON_CELL_HEIGHT * 8, highlightthickness=0, bg="white")
+        self.icon_canvas.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        
+        scrollbar = ttk.Scrollbar(grid_container, orient="vertical", command=self.on_icon_scroll)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.icon_canvas.configure(yscrollcommand=scrollbar.set, yscrollincrement=ICON_CELL_HEIGHT)
         
-        self.primary_frame = ttk.Frame(columns_frame)
-        self.primary_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=10)
+        self.icon_canvas.bind("<Configure>", self.redraw_icon_rows)
+        self.icon_canvas.bind("<Button-1>", self.on_icon_click)
+        self.icon_canvas.bind("<MouseWheel>", self.on_icon_mousewheel)
         
-        self.secondary_frame = ttk.Frame(columns_frame)
-        self.secondary_frame.pack(side=tk.RIGHT, fill=tk.BOTH, expand=True, padx=10)
+        self.symbol_sprites = SymbolSpriteSheet(self.root, size=ICON_SPRITE_SIZE)
+        self.icon_items = []
+        self.icon_rows_drawn = {}
+        self.icon_columns = 0
     
     def create_button_area(self):
         """创建按钮区域"""
@@ -579,6 +4786,10 @@ class APRSApp:
         self.clear_button = ttk.Button(button_frame, text="清空日志", command=self.clear_log, width=15)
         self.clear_button.pack(side=tk.LEFT, padx=10)
         
+        # 发送历史按钮
+        self.history_button = ttk.Button(button_frame, text="发送历史", command=self.open_history_window, width=15)
+        self.history_button.pack(side=tk.LEFT, padx=10)
+        
         # 退出全屏按钮
         self.fullscreen_button = ttk.Button(button_frame, text="退出全屏 (F11)", command=self.toggle_fullscreen, width=15)
         self.fullscreen_button.pack(side=tk.RIGHT, padx=10)
@@ -601,6 +4812,18 @@ class APRSApp:
         )
         self.show_json_switch.pack(side=tk.LEFT)
         
+        # 性能分析开关
+        self.profile_button = ttk.Button(switch_frame, text="开始性能分析", command=self.toggle_profiling, width=15)
+        self.profile_button.pack(side=tk.RIGHT)
+        self.profile_mode_var = tk.StringVar(value="cProfile")
+        ttk.Combobox(
+            switch_frame,
+            textvariable=self.profile_mode_var,
+            values=["cProfile", "采样"],
+            width=8,
+            state="readonly"
+        ).pack(side=tk.RIGHT, padx=5)
+        
         # 创建日志文本框容器（修复滚动条位置）
         log_container = ttk.Frame(log_frame)
         log_container.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
@@ -616,79 +4839,645 @@ class APRSApp:
         # 配置文本框
         self.log_text.config(yscrollcommand=scrollbar.set)
     
-    def toggle_json_display(self):
-        """切换JSON显示状态"""
-        state = "开启" if self.show_json_var.get() else "关闭"
-        self.log_message(f"完整JSON显示已{state}")
+    def toggle_profiling(self):
+        """开始/停止性能分析（cProfile 分析GUI主循环和发送线程，采样模式覆盖全部线程）"""
+        if not self.profiler.active:
+            mode = "sample" if self.profile_mode_var.get() == "采样" else "cprofile"
+            self.profiler.start(mode)
+            self.instrument_gui_events(True)
+            self.profile_button.config(text="停止分析并保存")
+            self.log_message(f"性能分析已开始 ({self.profile_mode_var.get()})")
+            return
+        
+        self.instrument_gui_events(False)
+        try:
+            paths = self.profiler.stop()
+        except OSError as e:
+            self.log_message(f"保存性能分析结果失败: {str(e)}")
+            paths = []
+        self.profile_button.config(text="开始性能分析")
+        for item in self.profiler.summary()[:10]:
+            self.log_message(
+                f"  {item['event']}: {item['count']} 次, 共 {item['total_ms']:.1f}ms, "
+                f"平均 {item['avg_ms']:.2f}ms, 最长 {item['max_ms']:.2f}ms"
+            )
+        for path in paths:
+            self.log_message(f"性能分析结果: {path}")
+    
+    def instrument_gui_events(self, enabled):
+        """为GUI线程方法安装/移除耗时记录包装（实例属性覆盖类方法）"""
+        for name in self.PROFILED_GUI_EVENTS:
+            if enabled:
+                setattr(self, name, self.profiler.timed(name, getattr(type(self), name).__get__(self)))
+            else:
+                self.__dict__.pop(name, None)
+    
+    def toggle_json_display(self):
+        """切换JSON显示状态"""
+        state = "开启" if self.show_json_var.get() else "关闭"
+        self.log_message(f"完整JSON显示已{state}")
+    
+    def create_schedule_area(self):
+        """创建定时发送区域"""
+        schedule_frame = ttk.LabelFrame(self.main_frame, text="定时发送", padding="10")
+        schedule_frame.pack(fill=tk.X, pady=10, padx=10)
+        
+        # 时间间隔选择
+        ttk.Label(schedule_frame, text="发送间隔:").grid(row=0, column=0, sticky=tk.W, padx=5, pady=5)
+        
+        self.interval_var = tk.IntVar(value=30)
+        self.interval_combobox = ttk.Combobox(
+            schedule_frame, 
+            width=5, 
+            textvariable=self.interval_var,
+            values=[5, 10, 15, 30, 60],
+            state="readonly"
+        )
+        self.interval_combobox.grid(row=0, column=1, sticky=tk.W, padx=5, pady=5)
+        ttk.Label(schedule_frame, text="分钟").grid(row=0, column=2, sticky=tk.W, padx=0, pady=5)
+        
+        # 定时开关
+        self.schedule_button = ttk.Button(
+            schedule_frame, 
+            text="启动定时发送", 
+            command=self.toggle_schedule,
+            width=15
+        )
+        self.schedule_button.grid(row=0, column=3, sticky=tk.E, padx=10, pady=5)
+        
+        # 状态标签
+        self.status_label = ttk.Label(schedule_frame, text="状态: 未启动")
+        self.status_label.grid(row=0, column=4, sticky=tk.W, padx=10, pady=5)
+        
+        # 去重窗口设置
+        ttk.Label(schedule_frame, text="去重窗口:").grid(row=1, column=0, sticky=tk.W, padx=5, pady=5)
+        
+        self.dedupe_window_var = tk.IntVar(value=packet_dedupe_cache.window)
+        self.dedupe_window_spinbox = ttk.Spinbox(
+            schedule_frame,
+            from_=0,
+            to=600,
+            width=5,
+            textvariable=self.dedupe_window_var,
+            command=self.update_dedupe_window
+        )
+        self.dedupe_window_spinbox.grid(row=1, column=1, sticky=tk.W, padx=5, pady=5)
+        self.dedupe_window_spinbox.bind("<FocusOut>", lambda e: self.update_dedupe_window())
+        self.dedupe_window_spinbox.bind("<Return>", lambda e: self.update_dedupe_window())
+        ttk.Label(schedule_frame, text="秒 (0=关闭)").grid(row=1, column=2, sticky=tk.W, padx=0, pady=5)
+        
+        # 去重统计标签
+        self.dedupe_stats_label = ttk.Label(schedule_frame, text="去重: 命中 0 / 未命中 0")
+        self.dedupe_stats_label.grid(row=1, column=3, columnspan=2, sticky=tk.W, padx=10, pady=5)
+        
+        # 地理围栏触发（需要GPS，发送间隔作为心跳间隔）
+        self.geofence_enabled_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            schedule_frame,
+            text="地理围栏触发",
+            variable=self.geofence_enabled_var
+        ).grid(row=2, column=0, sticky=tk.W, padx=5, pady=5)
+        
+        self.geofence_file_var = tk.StringVar()
+        ttk.Entry(schedule_frame, width=30, textvariable=self.geofence_file_var).grid(row=2, column=1, columnspan=3, sticky=tk.W, padx=5, pady=5)
+        ttk.Button(schedule_frame, text="浏览", command=self.browse_geofence_file, width=8).grid(row=2, column=4, sticky=tk.W, padx=10, pady=5)
+        ttk.Label(
+            schedule_frame,
+            text="GeoJSON 多边形/圆 (Point + radius)，进入/离开/停留时发送，发送间隔作为心跳"
+        ).grid(row=3, column=0, columnspan=5, sticky=tk.W, padx=5, pady=(0, 5))
+    
+    def browse_geofence_file(self):
+        """选择围栏文件"""
+        path = filedialog.askopenfilename(
+            title="选择围栏文件",
+            filetypes=[("GeoJSON", "*.json *.geojson"), ("所有文件", "*.*")]
+        )
+        if path:
+            self.geofence_file_var.set(path)
+    
+    def update_dedupe_window(self):
+        """更新去重窗口"""
+        try:
+            window = int(self.dedupe_window_var.get())
+        except (tk.TclError, ValueError):
+            self.dedupe_window_var.set(packet_dedupe_cache.window)
+            return
+        if window != packet_dedupe_cache.window:
+            packet_dedupe_cache.set_window(window)
+            self.log_message(f"去重窗口已设置为 {packet_dedupe_cache.window} 秒")
+        self.update_dedupe_stats()
+    
+    def update_dedupe_stats(self):
+        """刷新去重命中/未命中统计"""
+        stats = packet_dedupe_cache.stats()
+        self.dedupe_stats_label.config(
+            text=f"去重: 命中 {stats['hits']} / 未命中 {stats['misses']}"
+        )
+    
+    def create_endpoint_area(self):
+        """创建多服务器提交区域"""
+        endpoint_frame = ttk.LabelFrame(self.main_frame, text="提交服务器", padding="10")
+        endpoint_frame.pack(fill=tk.X, pady=10, padx=10)
+        
+        self.endpoint_enabled_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            endpoint_frame,
+            text="多服务器自动切换",
+            variable=self.endpoint_enabled_var,
+            command=self.toggle_endpoint_pool
+        ).grid(row=0, column=0, sticky=tk.W, padx=5, pady=5)
+        
+        self.endpoint_hedge_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(endpoint_frame, text="对冲请求", variable=self.endpoint_hedge_var,
+                        command=self.toggle_endpoint_pool).grid(row=0, column=1, sticky=tk.W, padx=5, pady=5)
+        
+        ttk.Label(endpoint_frame, text="服务器 (逗号分隔):").grid(row=1, column=0, sticky=tk.W, padx=5, pady=5)
+        self.endpoint_list_var = tk.StringVar(value=f"{APRS_SUBMIT_URL}, aprsis://rotate.aprs2.net:14580")
+        ttk.Entry(endpoint_frame, width=60, textvariable=self.endpoint_list_var).grid(row=1, column=1, columnspan=3, sticky=tk.W, padx=5, pady=5)
+        
+        self.endpoint_status_label = ttk.Label(endpoint_frame, text="使用默认服务器")
+        self.endpoint_status_label.grid(row=2, column=0, columnspan=4, sticky=tk.W, padx=5, pady=5)
+        
+        self.endpoint_pool = None
+        self.endpoint_status_job = None
+    
+    def toggle_endpoint_pool(self):
+        """启用/停用多服务器提交池（地址或对冲设置变化时重新创建）"""
+        if self.endpoint_pool is not None:
+            self.endpoint_pool.stop()
+            self.endpoint_pool = None
+        if self.endpoint_status_job is not None:
+            self.root.after_cancel(self.endpoint_status_job)
+            self.endpoint_status_job = None
+        
+        if not self.endpoint_enabled_var.get():
+            self.endpoint_status_label.config(text="使用默认服务器")
+            return
+        
+        addresses = [address.strip() for address in self.endpoint_list_var.get().split(",")]
+        try:
+            self.endpoint_pool = EndpointPool(
+                addresses,
+                hedge_after=2.0 if self.endpoint_hedge_var.get() else None
+            ).start()
+        except ValueError as e:
+            self.endpoint_enabled_var.set(False)
+            messagebox.showerror("错误", str(e))
+            return
+        self.log_message(f"多服务器提交已启用: {len(self.endpoint_pool.endpoints)} 个服务器")
+        self.update_endpoint_status()
+    
+    def update_endpoint_status(self):
+        """刷新服务器状态显示（启用期间每5秒一次）"""
+        pool = self.endpoint_pool
+        if pool is None:
+            return
+        parts = []
+        for stats in pool.stats():
+            latency = "--" if stats["ewma_ms"] is None else f"{stats['ewma_ms']:.0f}ms"
+            state = "" if stats["healthy"] else " 不可用"
+            parts.append(f"{stats['address'].split('://', 1)[-1].split('/', 1)[0]} {latency}{state}")
+        self.endpoint_status_label.config(text="  |  ".join(parts))
+        self.endpoint_status_job = self.root.after(5000, self.update_endpoint_status)
+    
+    def create_kiss_area(self):
+        """创建KISS TNC输出区域"""
+        kiss_frame = ttk.LabelFrame(self.main_frame, text="KISS TNC 输出", padding="10")
+        kiss_frame.pack(fill=tk.X, pady=10, padx=10)
+        
+        self.kiss_enabled_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            kiss_frame,
+            text="同时发送到本地TNC",
+            variable=self.kiss_enabled_var,
+            command=self.toggle_kiss_output
+        ).grid(row=0, column=0, sticky=tk.W, padx=5, pady=5)
+        
+        ttk.Label(kiss_frame, text="地址:").grid(row=0, column=1, sticky=tk.W, padx=5, pady=5)
+        self.kiss_address_var = tk.StringVar(value="127.0.0.1:8001")
+        ttk.Entry(kiss_frame, width=25, textvariable=self.kiss_address_var).grid(row=0, column=2, sticky=tk.W, padx=5, pady=5)
+        ttk.Label(kiss_frame, text="例如: 127.0.0.1:8001 或 /dev/ttyUSB0@9600").grid(row=0, column=3, sticky=tk.W, padx=5, pady=5)
+        
+        self.kiss_transport = None
+        self.kiss_settings = None
+    
+    def toggle_kiss_output(self):
+        """切换KISS输出状态"""
+        if not self.kiss_enabled_var.get() and self.kiss_transport is not None:
+            self.kiss_transport.close()
+            self.kiss_transport = None
+        state = "开启" if self.kiss_enabled_var.get() else "关闭"
+        self.log_message(f"KISS TNC输出已{state}")
+        self.on_config_changed()
+    
+    def get_kiss_transport(self):
+        """获取KISS输出（地址变化时重新创建），未开启时返回None"""
+        if not self.kiss_enabled_var.get():
+            return None
+        
+        address = self.kiss_address_var.get().strip()
+        if address.startswith("/") or address.upper().startswith("COM"):
+            # 串口可带波特率: /dev/ttyUSB0@9600
+            device, _, baudrate = address.partition("@")
+            settings = {"device": device, "baudrate": int(baudrate) if baudrate.isdigit() else 9600}
+        else:
+            host, _, port = address.rpartition(":")
+            try:
+                settings = {"host": host or "127.0.0.1", "port": int(port)}
+            except ValueError:
+                self.log_message(f"无效的KISS地址: {address}")
+                return None
+        
+        if self.kiss_transport is None or settings != self.kiss_settings:
+            if self.kiss_transport is not None:
+                self.kiss_transport.close()
+            self.kiss_transport = KissTransport(**settings)
+            self.kiss_settings = settings
+        return self.kiss_transport
+    
+    def create_telemetry_area(self):
+        """创建遥测区域"""
+        telemetry_frame = ttk.LabelFrame(self.main_frame, text="遥测", padding="10")
+        telemetry_frame.pack(fill=tk.X, pady=10, padx=10)
+        
+        self.telemetry_enabled_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            telemetry_frame,
+            text="启用遥测",
+            variable=self.telemetry_enabled_var,
+            command=self.toggle_telemetry
+        ).grid(row=0, column=0, sticky=tk.W, padx=5, pady=5)
+        
+        ttk.Label(telemetry_frame, text="格式:").grid(row=0, column=1, sticky=tk.W, padx=5, pady=5)
+        self.telemetry_mode_var = tk.StringVar(value="标准 T#")
+        ttk.Combobox(
+            telemetry_frame,
+            width=12,
+            textvariable=self.telemetry_mode_var,
+            values=["标准 T#", "base-91 压缩"],
+            state="readonly"
+        ).grid(row=0, column=2, sticky=tk.W, padx=5, pady=5)
+        
+        ttk.Label(telemetry_frame, text="数据源:").grid(row=1, column=0, sticky=tk.W, padx=5, pady=5)
+        self.telemetry_source_var = tk.StringVar(value="udp:9100")
+        ttk.Entry(telemetry_frame, width=30, textvariable=self.telemetry_source_var).grid(row=1, column=1, columnspan=2, sticky=tk.W, padx=5, pady=5)
+        ttk.Label(telemetry_frame, text="文件路径 或 udp:端口").grid(row=1, column=3, sticky=tk.W, padx=5, pady=5)
+        
+        self.telemetry_source = None
+        self.telemetry_encoder = None
+    
+    def toggle_telemetry(self):
+        """启动/停止遥测数据源"""
+        if self.telemetry_source is not None:
+            self.telemetry_source.stop()
+            self.telemetry_source = None
+            self.telemetry_encoder = None
+        
+        if not self.telemetry_enabled_var.get():
+            self.log_message("遥测已关闭")
+            return
+        
+        source = self.telemetry_source_var.get().strip()
+        mode = "base91" if self.telemetry_mode_var.get().startswith("base-91") else "standard"
+        aggregator = TelemetryAggregator()
+        try:
+            self.telemetry_source = create_sensor_source(source, aggregator).start()
+        except (OSError, ValueError) as e:
+            self.telemetry_enabled_var.set(False)
+            messagebox.showerror("错误", f"无法启动遥测数据源: {str(e)}")
+            return
+        
+        self.telemetry_encoder = TelemetryEncoder(aggregator, mode)
+        self.log_message(f"遥测已启动: 数据源 {source}, 格式 {self.telemetry_mode_var.get()}")
+    
+    def create_weather_area(self):
+        """创建气象站区域"""
+        weather_frame = ttk.LabelFrame(self.main_frame, text="气象站", padding="10")
+        weather_frame.pack(fill=tk.X, pady=10, padx=10)
+        
+        self.weather_enabled_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            weather_frame,
+            text="发送气象报告 (符号 _)",
+            variable=self.weather_enabled_var,
+            command=self.toggle_weather
+        ).grid(row=0, column=0, sticky=tk.W, padx=5, pady=5)
+        
+        ttk.Label(weather_frame, text="数据源:").grid(row=0, column=1, sticky=tk.W, padx=5, pady=5)
+        self.weather_source_var = tk.StringVar(value="udp:9101")
+        ttk.Entry(weather_frame, width=30, textvariable=self.weather_source_var).grid(row=0, column=2, sticky=tk.W, padx=5, pady=5)
+        ttk.Label(
+            weather_frame,
+            text="字段: wind_dir(°) wind_speed(m/s) temp(°C) rain(mm增量) humidity(%) pressure(hPa)"
+        ).grid(row=1, column=0, columnspan=4, sticky=tk.W, padx=5, pady=5)
+        
+        self.weather_source = None
+        self.weather_station = None
+    
+    def toggle_weather(self):
+        """启动/停止气象数据源"""
+        if self.weather_source is not None:
+            self.weather_source.stop()
+            self.weather_source = None
+            self.weather_station = None
+        
+        if not self.weather_enabled_var.get():
+            self.log_message("气象报告已关闭")
+            return
+        
+        source = self.weather_source_var.get().strip()
+        station = WeatherStation()
+        try:
+            self.weather_source = create_sensor_source(source, station).start()
+        except (OSError, ValueError) as e:
+            self.weather_enabled_var.set(False)
+            messagebox.showerror("错误", f"无法启动气象数据源: {str(e)}")
+            return
+        
+        self.weather_station = station
+        self.log_message(f"气象报告已启动: 数据源 {source}")
+    
+    def create_gps_area(self):
+        """创建GPS区域"""
+        gps_frame = ttk.LabelFrame(self.main_frame, text="GPS (NMEA)", padding="10")
+        gps_frame.pack(fill=tk.X, pady=10, padx=10)
+        
+        ttk.Label(gps_frame, text="设备:").grid(row=0, column=0, sticky=tk.W, padx=5, pady=5)
+        self.gps_device_var = tk.StringVar(value="/dev/ttyUSB0")
+        ttk.Entry(gps_frame, width=20, textvariable=self.gps_device_var).grid(row=0, column=1, sticky=tk.W, padx=5, pady=5)
+        
+        ttk.Label(gps_frame, text="波特率:").grid(row=0, column=2, sticky=tk.W, padx=5, pady=5)
+        self.gps_baudrate_var = tk.IntVar(value=9600)
+        ttk.Combobox(
+            gps_frame,
+            width=8,
+            textvariable=self.gps_baudrate_var,
+            values=[4800, 9600, 38400, 115200],
+            state="readonly"
+        ).grid(row=0, column=3, sticky=tk.W, padx=5, pady=5)
+        
+        self.gps_button = ttk.Button(gps_frame, text="启动GPS", command=self.toggle_gps, width=12)
+        self.gps_button.grid(row=0, column=4, sticky=tk.W, padx=10, pady=5)
+        
+        self.gps_use_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(gps_frame, text="发送时使用GPS位置/速度/方向/海拔", variable=self.gps_use_var, command=self.on_config_changed).grid(row=1, column=0, columnspan=3, sticky=tk.W, padx=5, pady=5)
+        
+        self.gps_status_label = ttk.Label(gps_frame, text="GPS: 未启动")
+        self.gps_status_label.grid(row=1, column=3, columnspan=2, sticky=tk.W, padx=5, pady=5)
+        
+        self.gps_source = None
+    
+    def toggle_gps(self):
+        """启动/停止GPS"""
+        if self.gps_source is not None:
+            self.gps_source.stop()
+            self.gps_source = None
+            self.gps_button.config(text="启动GPS")
+            self.gps_status_label.config(text="GPS: 未启动")
+            self.log_message("GPS已停止")
+            return
+        
+        device = self.gps_device_var.get().strip()
+        try:
+            self.gps_source = NMEAPositionSource(device, baudrate=self.gps_baudrate_var.get()).start()
+        except OSError as e:
+            messagebox.showerror("错误", f"无法打开GPS设备: {str(e)}")
+            return
+        
+        self.gps_button.config(text="停止GPS")
+        self.log_message(f"GPS已启动: {device}")
+        self.update_gps_status()
+    
+    def update_gps_status(self):
+        """定期刷新GPS状态（在GUI线程中读取最新定位）"""
+        if self.gps_source is None:
+            return
+        fix = self.gps_source.latest(max_age=5)
+        if self.gps_source.error:
+            text = f"GPS: 错误 {self.gps_source.error}"
+        elif fix is None:
+            text = "GPS: 等待定位..."
+        else:
+            text = (f"GPS: {fix['latitude']:.5f}, {fix['longitude']:.5f} "
+                    f"卫星 {fix['satellites'] or '-'} HDOP {fix['hdop'] or '-'}")
+        self.gps_status_label.config(text=text)
+        self.root.after(1000, self.update_gps_status)
+    
+    def apply_gps_fix(self, kwargs):
+        """用最新GPS定位覆盖发送参数，没有有效定位时保持不变（可在任意线程调用）"""
+        gps_source = self.gps_source
+        fix = gps_source.latest(max_age=10) if gps_source is not None else None
+        if fix is None:
+            return kwargs
+        kwargs = dict(kwargs)
+        kwargs["latitude"] = decimal_to_aprs_lat(fix["latitude"])
+        kwargs["longitude"] = decimal_to_aprs_lon(fix["longitude"])
+        if fix["speed"] is not None and fix["course"] is not None:
+            kwargs["speed"] = round(fix["speed"])
+            kwargs["course"] = round(fix["course"])
+        if fix["altitude"] is not None:
+            kwargs["altitude"] = fix["altitude"]
+        return kwargs
+    
+    def create_message_area(self):
+        """创建APRS消息区域"""
+        message_frame = ttk.LabelFrame(self.main_frame, text="APRS消息", padding="10")
+        message_frame.pack(fill=tk.X, pady=10, padx=10)
+        
+        ttk.Label(message_frame, text="目的呼号:").grid(row=0, column=0, sticky=tk.W, padx=5, pady=5)
+        self.message_to_entry = ttk.Entry(message_frame, width=12)
+        self.message_to_entry.grid(row=0, column=1, sticky=tk.W, padx=5, pady=5)
+        
+        ttk.Label(message_frame, text="内容:").grid(row=0, column=2, sticky=tk.W, padx=5, pady=5)
+        self.message_text_entry = ttk.Entry(message_frame, width=40)
+        self.message_text_entry.grid(row=0, column=3, sticky=tk.W, padx=5, pady=5)
+        self.message_text_entry.bind("<Return>", lambda e: self.send_message())
+        
+        ttk.Button(message_frame, text="发送消息", command=self.send_message, width=10).grid(row=0, column=4, sticky=tk.W, padx=5, pady=5)
+        
+        ttk.Label(message_frame, text="确认接收:").grid(row=1, column=0, sticky=tk.W, padx=5, pady=5)
+        self.message_feed_var = tk.StringVar(value="udp:9102")
+        ttk.Entry(message_frame, width=12, textvariable=self.message_feed_var).grid(row=1, column=1, sticky=tk.W, padx=5, pady=5)
+        ttk.Label(message_frame, text="接收 TNC2 数据包 (每行一个) 以匹配 ack/rej").grid(row=1, column=2, columnspan=2, sticky=tk.W, padx=5, pady=5)
+        
+        self.message_status_label = ttk.Label(message_frame, text="待确认: 0")
+        self.message_status_label.grid(row=1, column=4, sticky=tk.W, padx=5, pady=5)
+        
+        self.message_manager = None
+        self.message_feed = None
+    
+    def get_message_manager(self, callsign, path):
+        """获取消息管理器（呼号或路径变化时重新创建）"""
+        manager = self.message_manager
+        if manager is not None and (manager.callsign, manager.path) == (callsign.upper(), path):
+            return manager
+        if manager is not None:
+            manager.stop()
+        if self.message_feed is not None:
+            self.message_feed.stop()
+            self.message_feed = None
+        
+        aprs_word = str(calculate_aprs_verification_code(callsign))
+        
+        def send_func(packet):
+            result = post_aprs_data(packet, aprs_word, pool=self.endpoint_pool)
+            self.record_history(result, callsign)
+            return result
+        
+        def on_update(event, record):
+            self.root.after(0, lambda: self._handle_message_event(event, record))
+        
+        self.message_manager = MessageManager(callsign, path, send_func, on_update=on_update)
+        
+        # 启动确认接收源
+        feed = self.message_feed_var.get().strip()
+        if feed.lower().startswith("udp:"):
+            try:
+                self.message_feed = PacketFeedSource(self.message_manager, port=int(feed[4:])).start()
+            except (OSError, ValueError) as e:
+                self.log_message(f"无法启动消息接收源: {str(e)}")
+        return self.message_manager
+    
+    def send_message(self):
+        """发送APRS消息"""
+        try:
+            config = self.build_station_config()
+        except ValueError as e:
+            messagebox.showerror("错误", str(e))
+            return
+        
+        manager = self.get_message_manager(config.callsign, config.path)
+        addressee = self.message_to_entry.get()
+        text = self.message_text_entry.get()
+        try:
+            msgid = manager.send_message(addressee, text)
+        except ValueError as e:
+            messagebox.showerror("错误", str(e))
+            return
+        self.message_text_entry.delete(0, tk.END)
+        self.log_message(f"消息已排队: {addressee.strip().upper()} #{msgid}: {text}")
+        self.update_message_status()
+    
+    def _handle_message_event(self, event, record):
+        """处理消息状态变化（GUI线程）"""
+        if event == "sent":
+            result = record["result"]
+            self.log_message(f"消息 {record['addressee']} #{record['msgid']} 第 {record['attempts']} 次发送: {result.get('rs')}")
+        elif event == "acked":
+            self.log_message(f"消息 {record['addressee']} #{record['msgid']} 已确认")
+        elif event == "rejected":
+            self.log_message(f"消息 {record['addressee']} #{record['msgid']} 被拒绝")
+        elif event == "failed":
+            self.log_message(f"消息 {record['addressee']} #{record['msgid']} 未收到确认，已放弃")
+        elif event == "received":
+            self.log_message(f"收到消息 {record['source']}: {record['text']}")
+        self.update_message_status()
     
-    def create_schedule_area(self):
-        """创建定时发送区域"""
-        schedule_frame = ttk.LabelFrame(self.main_frame, text="定时发送", padding="10")
-        schedule_frame.pack(fill=tk.X, pady=10, padx=10)
+    def update_message_status(self):
+        """刷新待确认消息数"""
+        count = len(self.message_manager.outstanding()) if self.message_manager is not None else 0
+        self.message_status_label.config(text=f"待确认: {count}")
+    
+    def create_object_area(self):
+        """创建批量对象/物品区域"""
+        object_frame = ttk.LabelFrame(self.main_frame, text="批量对象/物品", padding="10")
+        object_frame.pack(fill=tk.X, pady=10, padx=10)
         
-        # 时间间隔选择
-        ttk.Label(schedule_frame, text="发送间隔:").grid(row=0, column=0, sticky=tk.W, padx=5, pady=5)
+        ttk.Label(object_frame, text="文件:").grid(row=0, column=0, sticky=tk.W, padx=5, pady=5)
+        self.object_file_var = tk.StringVar()
+        ttk.Entry(object_frame, width=40, textvariable=self.object_file_var).grid(row=0, column=1, columnspan=3, sticky=tk.W, padx=5, pady=5)
+        ttk.Button(object_frame, text="浏览", command=self.browse_object_file, width=8).grid(row=0, column=4, sticky=tk.W, padx=5, pady=5)
         
-        self.interval_var = tk.IntVar(value=30)
-        self.interval_combobox = ttk.Combobox(
-            schedule_frame, 
-            width=5, 
-            textvariable=self.interval_var,
-            values=[5, 10, 15, 30, 60],
-            state="readonly"
-        )
-        self.interval_combobox.grid(row=0, column=1, sticky=tk.W, padx=5, pady=5)
-        ttk.Label(schedule_frame, text="分钟").grid(row=0, column=2, sticky=tk.W, padx=0, pady=5)
+        ttk.Label(object_frame, text="速率(包/分钟):").grid(row=1, column=0, sticky=tk.W, padx=5, pady=5)
+        self.object_rate_var = tk.IntVar(value=30)
+        ttk.Spinbox(object_frame, from_=1, to=600, width=6, textvariable=self.object_rate_var).grid(row=1, column=1, sticky=tk.W, padx=5, pady=5)
         
-        # 定时开关
-        self.schedule_button = ttk.Button(
-            schedule_frame, 
-            text="启动定时发送", 
-            command=self.toggle_schedule,
-            width=15
-        )
-        self.schedule_button.grid(row=0, column=3, sticky=tk.E, padx=10, pady=5)
+        self.object_force_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(object_frame, text="全部重发", variable=self.object_force_var).grid(row=1, column=2, sticky=tk.W, padx=5, pady=5)
+        self.object_kill_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(object_frame, text="删除已移除对象", variable=self.object_kill_var).grid(row=1, column=3, sticky=tk.W, padx=5, pady=5)
         
-        # 状态标签
-        self.status_label = ttk.Label(schedule_frame, text="状态: 未启动")
-        self.status_label.grid(row=0, column=4, sticky=tk.W, padx=10, pady=5)
-    
-    def create_map_area(self):
-        """创建地图选点区域（使用鼠标中键选点）"""
-        map_frame = ttk.LabelFrame(self.main_frame, text="地图选点 (使用鼠标中键设置位置)", padding="10")
-        map_frame.pack(fill=tk.BOTH, expand=True, pady=10, padx=10)
+        self.object_button = ttk.Button(object_frame, text="导入并发送", command=self.toggle_object_batch, width=10)
+        self.object_button.grid(row=1, column=4, sticky=tk.W, padx=5, pady=5)
         
-        # 创建地图容器
-        map_container = ttk.Frame(map_frame)
-        map_container.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        self.object_status_label = ttk.Label(object_frame, text="未导入")
+        self.object_status_label.grid(row=2, column=0, columnspan=5, sticky=tk.W, padx=5, pady=5)
         
-        # 创建地图控件 - 使用高德地图
-        self.map_widget = TkinterMapView(
-            map_container, 
-            width=400, 
-            height=200,
-            corner_radius=0
+        self.object_sender = None
+        self.object_thread = None
+    
+    def browse_object_file(self):
+        """选择对象文件"""
+        path = filedialog.askopenfilename(
+            title="选择对象文件",
+            filetypes=[("CSV/GeoJSON", "*.csv *.json *.geojson"), ("所有文件", "*.*")]
         )
-        self.map_widget.pack(fill=tk.BOTH, expand=True)
+        if path:
+            self.object_file_var.set(path)
+    
+    def toggle_object_batch(self):
+        """导入并发送对象，发送过程中再次点击则停止"""
+        if self.object_thread is not None and self.object_thread.is_alive():
+            self.object_sender.stop()
+            return
         
-        # 设置高德矢量地图
-        self.map_widget.set_tile_server(
-            "https://webrd04.is.autonavi.com/appmaptile?lang=zh_cn&size=1&scale=1&style=7&x={x}&y={y}&z={z}",
-            max_zoom=19
-        )
+        try:
+            config = self.build_station_config()
+            objects = load_aprs_objects(self.object_file_var.get().strip())
+        except (ValueError, OSError) as e:
+            messagebox.showerror("错误", str(e))
+            return
         
-        # 设置初始位置（杭州）
-        self.map_widget.set_position(30.2741, 120.1551)
-        self.map_widget.set_zoom(12)
+        # 呼号或路径变化时重新开始增量记录
+        sender = self.object_sender
+        if sender is None or (sender.callsign, sender.path) != (config.callsign.upper(), config.path):
+            aprs_word = str(calculate_aprs_verification_code(config.callsign))
+            session = create_http_session(pool_size=1)
+            
+            def send_func(packet):
+                result = post_aprs_data(packet, aprs_word, session=session, pool=self.endpoint_pool)
+                self.record_history(result, config.callsign)
+                return result
+            
+            sender = self.object_sender = ObjectBatchSender(config.callsign, config.path, send_func)
+        sender.interval = 60.0 / max(1, self.object_rate_var.get())
         
-        # 添加标记
-        self.marker = None
+        force = self.object_force_var.get()
+        kill_removed = self.object_kill_var.get()
+        total = len(objects) if force else len(sender.pending(objects, kill_removed))
+        self.log_message(f"已导入 {len(objects)} 个对象，需要发送 {total} 个")
+        self.object_button.config(text="停止")
         
-        # 绑定地图滚轮事件（缩放）
-        self.map_widget.canvas.bind("<MouseWheel>", self.on_map_mousewheel)
+        def on_result(entry):
+            self.root.after(0, lambda: self.log_message(f"对象 {entry['name']}: {entry['rs']} {entry['message']}"))
         
-        # 绑定鼠标中键点击事件（选点）
-        self.map_widget.canvas.bind("<Button-2>", self.on_map_middle_click)
+        def worker():
+            results = sender.send(objects, force=force, kill_removed=kill_removed, on_result=on_result)
+            self.root.after(0, lambda: self._object_batch_done(results))
+        
+        self.object_thread = threading.Thread(target=worker, daemon=True)
+        self.object_thread.start()
+    
+    def _object_batch_done(self, results):
+        """批量发送结束（GUI线程）"""
+        counts = {}
+        for entry in results:
+            counts[entry["rs"]] = counts.get(entry["rs"], 0) + 1
+        summary = " ".join(f"{rs}: {count}" for rs, count in sorted(counts.items()))
+        self.object_status_label.config(text=f"上次发送 {datetime.now().strftime('%H:%M:%S')}  {summary}")
+        self.log_message(f"批量对象发送结束 {summary}")
+        self.object_button.config(text="导入并发送")
+    
+    def create_map_area(self):
+        """创建地图选点区域（使用鼠标中键选点），地图控件在面板可见或首次使用时才创建"""
+        map_frame = ttk.LabelFrame(self.main_frame, text="地图选点 (使用鼠标中键设置位置)", padding="10")
+        map_frame.pack(fill=tk.BOTH, expand=True, pady=10, padx=10)
+        
+        # 创建地图容器（地图加载前显示占位按钮）
+        self.map_container = ttk.Frame(map_frame, height=200)
+        self.map_container.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        self.map_placeholder = ttk.Button(self.map_container, text="加载地图", command=self.ensure_map_widget)
+        self.map_placeholder.place(relx=0.5, rely=0.5, anchor=tk.CENTER)
         
         # 按钮框架
         btn_frame = ttk.Frame(map_frame)
@@ -718,6 +5507,54 @@ class APRSApp:
             width=15
         ).pack(side=tk.RIGHT, padx=5)
     
+    def check_map_visible(self):
+        """地图面板滚动到可见区域时，在下一次空闲时创建地图控件"""
+        if self.map_widget is not None or getattr(self, "map_container", None) is None:
+            return
+        if not self.map_container.winfo_ismapped():
+            return
+        canvas_bottom = self.canvas.winfo_rooty() + self.canvas.winfo_height()
+        if self.map_container.winfo_rooty() < canvas_bottom:
+            self.root.after_idle(self.ensure_map_widget)
+    
+    def ensure_map_widget(self):
+        """创建地图控件并开始加载瓦片（只创建一次）"""
+        if self.map_widget is not None:
+            return self.map_widget
+        
+        start = time_module.perf_counter()
+        from tkintermapview import TkinterMapView
+        
+        self.map_placeholder.destroy()
+        
+        # 创建地图控件 - 使用高德地图
+        self.map_widget = TkinterMapView(
+            self.map_container, 
+            width=400, 
+            height=200,
+            corner_radius=0
+        )
+        self.map_widget.pack(fill=tk.BOTH, expand=True)
+        
+        # 设置高德矢量地图
+        self.map_widget.set_tile_server(
+            "https://webrd04.is.autonavi.com/appmaptile?lang=zh_cn&size=1&scale=1&style=7&x={x}&y={y}&z={z}",
+            max_zoom=19
+        )
+        
+        # 设置初始位置（杭州）
+        self.map_widget.set_position(30.2741, 120.1551)
+        self.map_widget.set_zoom(12)
+        
+        # 绑定地图滚轮事件（缩放）
+        self.map_widget.canvas.bind("<MouseWheel>", self.on_map_mousewheel)
+        
+        # 绑定鼠标中键点击事件（选点）
+        self.map_widget.canvas.bind("<Button-2>", self.on_map_middle_click)
+        
+        self.log_message(f"地图已加载 ({(time_module.perf_counter() - start) * 1000:.0f}ms)")
+        return self.map_widget
+    
     def on_map_mousewheel(self, event):
         """地图滚轮事件处理（缩放）"""
         # 计算新的缩放级别
@@ -864,27 +5701,23 @@ class APRSApp:
     
     def decimal_to_aprs_lat(self, decimal):
         """将十进制纬度转换为APRS格式 (ddmm.mmN/S)"""
-        direction = 'N' if decimal >= 0 else 'S'
-        decimal = abs(decimal)
-        degrees = int(decimal)
-        minutes = (decimal - degrees) * 60
-        return f"{degrees:02d}{minutes:05.2f}{direction}"
+        return decimal_to_aprs_lat(decimal)
     
     def decimal_to_aprs_lon(self, decimal):
         """将十进制经度转换为APRS格式 (dddmm.mmE/W)"""
-        direction = 'E' if decimal >= 0 else 'W'
-        decimal = abs(decimal)
-        degrees = int(decimal)
-        minutes = (decimal - degrees) * 60
-        return f"{degrees:03d}{minutes:05.2f}{direction}"
+        return decimal_to_aprs_lon(decimal)
     
     def get_current_location(self):
-        """获取当前位置（模拟）"""
-        # 在实际应用中，这里应该使用地理定位API
-        # 这里使用杭州的坐标作为示例
-        lat, lon = 30.2741, 120.1551
+        """获取当前位置（GPS已启动时使用实时定位，否则使用示例位置）"""
+        fix = self.gps_source.latest() if self.gps_source is not None else None
+        if fix is not None:
+            lat, lon = fix["latitude"], fix["longitude"]
+        else:
+            # 没有GPS定位时使用杭州的坐标作为示例
+            lat, lon = 30.2741, 120.1551
         
-        # 设置地图位置
+        # 设置地图位置（首次使用时创建地图）
+        self.ensure_map_widget()
         self.map_widget.set_position(lat, lon)
         self.map_widget.set_zoom(12)
         
@@ -977,6 +5810,10 @@ class APRSApp:
         
         self.log_text.config(state=tk.NORMAL)
         self.log_text.insert(tk.END, formatted_message + "\n")
+        # 超过上限时删除最早的日志，长时间运行时日志区域不会无限增长
+        excess = int(self.log_text.index("end-1c").split(".")[0]) - self.LOG_MAX_LINES
+        if excess > 0:
+            self.log_text.delete("1.0", f"{excess + 1}.0")
         self.log_text.see(tk.END)  # 滚动到最新消息
         self.log_text.config(state=tk.DISABLED)
     
@@ -1021,72 +5858,276 @@ class APRSApp:
             "antenna_height": self.antenna_height_entry.get(),
             "gain": self.gain_entry.get(),
             "device_info": self.device_info_entry.get(),
-            "software_info": self.software_info_entry.get()
+            "software_info": self.software_info_entry.get(),
+            "phg": self.phg_var.get(),
+            "text_budget": self.text_budget_entry.get()
         }
     
+    def build_station_config(self):
+        """
+        从表单构建台站配置快照（在GUI线程中调用）
+
+        返回:
+        StationConfig
+
+        异常:
+        ValueError - 输入无效
+        """
+        return StationConfig.from_inputs(self.get_user_inputs(), use_gps=self.gps_use_var.get())
+    
     def send_packet(self):
         """发送APRS数据包（包含扩展信息）"""
-        inputs = self.get_user_inputs()
-        
-        # 验证必填字段
-        if not all([inputs["callsign"], inputs["latitude"], inputs["longitude"]]):
-            messagebox.showerror("错误", "呼号、纬度和经度是必填字段！")
+        try:
+            config = self.build_station_config()
+        except ValueError as e:
+            messagebox.showerror("错误", str(e))
             return
         
         # 验证呼号格式
-        if '-' not in inputs["callsign"]:
+        if '-' not in config.callsign:
             messagebox.showwarning("警告", "呼号应包含标识（如N0CALL-1）")
         
         self.log_message("正在发送APRS数据包...")
         
-        # 组合消息内容
-        full_comment = inputs["comment"]
-        
-        # 添加状态信息
-        if inputs["status"]:
-            full_comment += " " + inputs["status"]
-        
         # 在后台线程中发送，避免阻塞GUI
         threading.Thread(
-            target=self._send_packet_thread, 
-            args=(inputs, full_comment), 
+            target=self.profiler.call, 
+            args=("_send_packet_thread", self._send_packet_thread, config, self.get_kiss_transport()), 
             daemon=True
         ).start()
     
-    def _send_packet_thread(self, inputs, full_comment):
-        """发送数据包的线程函数"""
+    def _send_packet_thread(self, config, kiss_transport=None):
+        """
+        发送数据包的线程函数
+
+        只使用配置快照和线程安全的数据源（GPS、气象、遥测），不读取任何 Tk 控件，
+        手动发送和定时发送共用。
+        """
         try:
+            kwargs = self.apply_gps_fix(config.send_kwargs()) if config.use_gps else config.send_kwargs()
+            
+            # 气象报告
+            weather_station = self.weather_station
+            if weather_station is not None:
+                kwargs["weather"] = weather_station.report()
+            
+            # 统计本周期遥测（压缩遥测附加在注释中，标准遥测单独发送）
+            telemetry = None
+            telemetry_encoder = self.telemetry_encoder
+            if telemetry_encoder is not None:
+                telemetry = telemetry_encoder.prepare(config.callsign, config.path)
+                # 遥测已上报的字段不再在设备信息中重复发送
+                kwargs["device_info"] = telemetry_encoder.strip_covered(kwargs["device_info"])
+                if telemetry["comment"]:
+                    kwargs["comment"] += " " + telemetry["comment"]
+            
             # 发送数据包
-            result = send_aprs_packet(
-                callsign=inputs["callsign"],
-                path=inputs["path"],
-                latitude=inputs["latitude"],
-                longitude=inputs["longitude"],
-                symbol_table=inputs["symbol_table"],
-                symbol_code=inputs["symbol_code"],
-                comment=full_comment,
-                speed=inputs["speed"] if inputs["speed"] else None,
-                course=inputs["course"] if inputs["course"] else None,
-                altitude=inputs["altitude"] if inputs["altitude"] else None,
-                power=inputs["power"] if inputs["power"] else None,
-                antenna_height=inputs["antenna_height"] if inputs["antenna_height"] else None,
-                gain=inputs["gain"] if inputs["gain"] else None,
-                device_info=inputs["device_info"] if inputs["device_info"] else None,
-                software_info=inputs["software_info"] if inputs["software_info"] else None
-            )
+            result = send_aprs_packet(pool=self.endpoint_pool, template_cache=self.packet_templates, **kwargs)
+            self.record_history(result, config.callsign, kwargs["latitude"], kwargs["longitude"])
             
             # 在GUI线程中更新日志
             self.root.after(0, lambda: self._handle_send_result(result))
+            
+            # 同时发送到本地TNC（重复包不再发送）
+            if kiss_transport is not None and result.get("aprs_data") and result.get("rs") != "dup":
+                try:
+                    size = kiss_transport.send(result["aprs_data"])
+                    self.root.after(0, lambda: self.log_message(f"已发送KISS帧到TNC: {size} 字节"))
+                except (OSError, ValueError) as e:
+                    error = str(e)
+                    self.root.after(0, lambda: self.log_message(f"KISS发送失败: {error}"))
+            
+            # 发送遥测数据包（位置数据包被去重跳过时遥测也不发送，采样留到下个周期）
+            if telemetry is not None and result.get("rs") != "dup":
+                telemetry_encoder.commit(telemetry)
+                aprs_word = result.get("aprs_word") or str(calculate_aprs_verification_code(config.callsign))
+                definitions_ok = True
+                for packet in telemetry["definitions"] + telemetry["packets"]:
+                    telemetry_result = post_aprs_data(packet, aprs_word, pool=self.endpoint_pool)
+                    if packet in telemetry["definitions"] and telemetry_result.get("rs") != "ok":
+                        definitions_ok = False
+                    self.record_history(telemetry_result, config.callsign)
+                    self.root.after(0, lambda r=telemetry_result: self._handle_send_result(r))
+                if telemetry["definitions"] and definitions_ok:
+                    telemetry_encoder.mark_definitions_sent()
         except Exception as e:
-            self.root.after(0, lambda: self.log_message(f"发送错误: {str(e)}"))
+            error = str(e)
+            self.root.after(0, lambda: self.log_message(f"发送错误: {error}"))
+    
+    def get_history(self):
+        """
+        获取发送历史（首次调用时打开数据库）
+
+        异常:
+        OSError / sqlite3.Error - 无法打开数据库
+        """
+        with self.history_lock:
+            if self.history is None:
+                self.history = PacketHistory()
+            return self.history
+    
+    def record_history(self, result, callsign, latitude=None, longitude=None):
+        """记录发送结果到历史（可在任意线程调用，失败只记录日志）"""
+        try:
+            self.get_history().record(result, callsign, latitude, longitude)
+        except (sqlite3.Error, OSError) as e:
+            error = str(e)
+            self.root.after(0, lambda: self.log_message(f"写入发送历史失败: {error}"))
+    
+    def open_history_window(self):
+        """打开发送历史窗口（分页加载）"""
+        window = tk.Toplevel(self.root)
+        window.title("发送历史")
+        window.geometry("900x500")
+        
+        # 筛选条件
+        filter_frame = ttk.Frame(window)
+        filter_frame.pack(fill=tk.X, padx=10, pady=5)
+        
+        ttk.Label(filter_frame, text="呼号:").pack(side=tk.LEFT, padx=(0, 5))
+        callsign_var = tk.StringVar()
+        ttk.Entry(filter_frame, width=12, textvariable=callsign_var).pack(side=tk.LEFT, padx=5)
+        
+        ttk.Label(filter_frame, text="开始:").pack(side=tk.LEFT, padx=(10, 5))
+        start_var = tk.StringVar()
+        ttk.Entry(filter_frame, width=17, textvariable=start_var).pack(side=tk.LEFT, padx=5)
+        
+        ttk.Label(filter_frame, text="结束:").pack(side=tk.LEFT, padx=(10, 5))
+        end_var = tk.StringVar()
+        ttk.Entry(filter_frame, width=17, textvariable=end_var).pack(side=tk.LEFT, padx=5)
+        ttk.Label(filter_frame, text="(YYYY-MM-DD HH:MM)").pack(side=tk.LEFT, padx=5)
+        
+        # 结果表格
+        table_frame = ttk.Frame(window)
+        table_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+        
+        columns = ("time", "callsign", "position", "status", "message", "aprs_data")
+        headings = ("时间", "呼号", "位置", "状态", "消息", "数据包")
+        tree = ttk.Treeview(table_frame, columns=columns, show="headings")
+        for column, heading, width in zip(columns, headings, (140, 90, 150, 50, 150, 400)):
+            tree.heading(column, text=heading)
+            tree.column(column, width=width, anchor=tk.W)
+        tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar = ttk.Scrollbar(table_frame, orient="vertical", command=tree.yview)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        tree.configure(yscrollcommand=scrollbar.set)
+        
+        # 分页控制
+        page_frame = ttk.Frame(window)
+        page_frame.pack(fill=tk.X, padx=10, pady=5)
+        page_label = ttk.Label(page_frame, text="")
+        page_label.pack(side=tk.LEFT, padx=5)
+        
+        page_size = 100
+        state = {"pages": [None], "filters": {}}  # 每页起点 (上一页最后一行)
+        
+        def parse_time(text):
+            text = text.strip()
+            if not text:
+                return None
+            for fmt in ("%Y-%m-%d %H:%M", "%Y-%m-%d"):
+                try:
+                    return datetime.strptime(text, fmt).timestamp()
+                except ValueError:
+                    continue
+            raise ValueError(f"时间格式错误: {text}")
+        
+        def show_error(error):
+            messagebox.showerror("错误", f"无法读取发送历史: {str(error)}", parent=window)
+        
+        def show_page():
+            try:
+                rows = self.get_history().query(limit=page_size, before=state["pages"][-1], **state["filters"])
+            except (sqlite3.Error, OSError) as e:
+                show_error(e)
+                return
+            tree.delete(*tree.get_children())
+            for row in rows:
+                position = ""
+                if row["latitude"] is not None and row["longitude"] is not None:
+                    position = f"{row['latitude']:.5f}, {row['longitude']:.5f}"
+                tree.insert("", tk.END, values=(
+                    datetime.fromtimestamp(row["sent_at"]).strftime("%Y-%m-%d %H:%M:%S"),
+                    row["callsign"], position, row["status"], row["message"] or "", row["aprs_data"] or ""
+                ))
+            state["last"] = (rows[-1]["sent_at"], rows[-1]["id"]) if len(rows) == page_size else None
+            page_label.config(text=f"第 {len(state['pages'])} 页，共 {state['total']} 条")
+        
+        def search():
+            try:
+                state["filters"] = {
+                    "callsign": callsign_var.get().strip() or None,
+                    "start": parse_time(start_var.get()),
+                    "end": parse_time(end_var.get())
+                }
+            except ValueError as e:
+                messagebox.showerror("错误", str(e), parent=window)
+                return
+            state["pages"] = [None]
+            try:
+                state["total"] = self.get_history().count(**state["filters"])
+            except (sqlite3.Error, OSError) as e:
+                show_error(e)
+                return
+            show_page()
+        
+        def next_page():
+            if state.get("last") is not None:
+                state["pages"].append(state["last"])
+                show_page()
+        
+        def previous_page():
+            if len(state["pages"]) > 1:
+                state["pages"].pop()
+                show_page()
+        
+        def export(kind):
+            extension = {"csv": ".csv", "gpx": ".gpx"}[kind]
+            path = filedialog.asksaveasfilename(
+                parent=window,
+                defaultextension=extension,
+                filetypes=[(kind.upper(), f"*{extension}")]
+            )
+            if not path:
+                return
+            filters = dict(state["filters"])
+            self.log_message(f"正在导出发送历史到: {path}")
+            
+            # 导出在后台线程中流式写出，大量记录时不阻塞界面
+            def run():
+                try:
+                    history = self.get_history()
+                    exporter = history.export_csv if kind == "csv" else history.export_gpx
+                    count = exporter(path, **filters)
+                except (sqlite3.Error, OSError) as e:
+                    error = str(e)
+                    self.root.after(0, lambda: self.log_message(f"导出发送历史失败: {error}"))
+                    return
+                self.root.after(0, lambda: self.log_message(f"已导出 {count} 条发送历史到: {path}"))
+            
+            threading.Thread(target=run, daemon=True).start()
+        
+        ttk.Button(filter_frame, text="查询", command=search, width=8).pack(side=tk.RIGHT, padx=5)
+        ttk.Button(page_frame, text="导出GPX", command=lambda: export("gpx"), width=10).pack(side=tk.RIGHT, padx=5)
+        ttk.Button(page_frame, text="导出CSV", command=lambda: export("csv"), width=10).pack(side=tk.RIGHT, padx=5)
+        ttk.Button(page_frame, text="下一页", command=next_page, width=8).pack(side=tk.RIGHT, padx=5)
+        ttk.Button(page_frame, text="上一页", command=previous_page, width=8).pack(side=tk.RIGHT, padx=5)
+        
+        search()
     
     def _handle_send_result(self, result):
         """处理发送结果"""
         # 显示构建的数据包内容
         self.log_message(f"构建的数据包内容: {result.get('aprs_data', '无')}")
         
+        # 刷新去重统计
+        self.update_dedupe_stats()
+        
         # 根据rs字段判断发送结果
-        if result.get("rs") == "ok":
+        if result.get("rs") == "dup":
+            self.log_message(f"已跳过重复数据包: {result.get('message', '')}")
+            return
+        elif result.get("rs") == "ok":
             self.log_message("发送成功! 状态: ok")
             self.log_message(f"消息: {result.get('msg', '无')}")
             self.log_message(f"使用的验证码: {result.get('aprs_word', '未知')}")
@@ -1115,6 +6156,7 @@ class APRSApp:
         if self.scheduled_enabled:
             # 停止定时发送
             self.scheduled_enabled = False
+            self.schedule_stop.set()
             self.schedule_button.config(text="启动定时发送")
             self.status_label.config(text="状态: 已停止")
             self.log_message("定时发送已停止")
@@ -1126,35 +6168,604 @@ class APRSApp:
                 
                 if interval <= 0:
                     raise ValueError("时间间隔必须大于0")
-                
-                self.scheduled_enabled = True
-                self.schedule_button.config(text="停止定时发送")
+            except (ValueError, tk.TclError) as e:
+                messagebox.showerror("错误", f"无效的时间间隔: {str(e)}")
+                return
+            
+            # 构建配置快照，定时发送只使用快照，不经过GUI线程
+            try:
+                config = self.build_station_config()
+            except ValueError as e:
+                messagebox.showerror("错误", f"配置无效，无法启动定时发送: {str(e)}")
+                return
+            
+            # 地理围栏触发：加载围栏，按GPS位置触发，发送间隔作为心跳
+            monitor = None
+            if self.geofence_enabled_var.get():
+                if self.gps_source is None:
+                    messagebox.showerror("错误", "地理围栏触发需要先启动GPS")
+                    return
+                try:
+                    index = load_geofences(self.geofence_file_var.get().strip())
+                except (ValueError, OSError) as e:
+                    messagebox.showerror("错误", f"无法加载围栏: {str(e)}")
+                    return
+                monitor = GeofenceMonitor(index, heartbeat=interval * 60)
+            
+            self.schedule_state = (config, self.get_kiss_transport())
+            
+            self.scheduled_enabled = True
+            self.schedule_button.config(text="停止定时发送")
+            self.schedule_stop = threading.Event()
+            if monitor is not None:
+                self.status_label.config(text=f"状态: 围栏触发 - 心跳 {interval} 分钟")
+                self.log_message(f"地理围栏触发已启动: {len(monitor.index)} 个围栏，心跳每 {interval} 分钟")
+                target, args = self.geofence_loop, (monitor, self.gps_source, self.schedule_stop)
+            else:
                 self.status_label.config(text=f"状态: 已启动 - 每 {interval} 分钟")
                 self.log_message(f"定时发送已启动，每 {interval} 分钟发送一次")
-                
-                # 启动定时线程
-                self.schedule_thread = threading.Thread(target=self.schedule_loop, daemon=True)
-                self.schedule_thread.start()
-            except ValueError as e:
-                messagebox.showerror("错误", f"无效的时间间隔: {str(e)}")
-    
-    def schedule_loop(self):
-        """定时发送循环"""
-        interval = self.interval_var.get() * 60  # 转换为秒
-        
-        while self.scheduled_enabled:
-            # 发送数据包
-            self.root.after(0, self.send_packet)
+                target, args = self.schedule_loop, (interval * 60, self.schedule_stop)
             
-            # 等待指定间隔
-            time_module.sleep(interval)
+            # 启动定时线程
+            self.schedule_thread = threading.Thread(target=target, args=args, daemon=True)
+            self.schedule_thread.start()
+    
+    def on_config_changed(self, event=None):
+        """表单修改后更新定时发送的配置快照（无效时继续使用上一次的快照）"""
+        if not self.scheduled_enabled:
+            return
+        try:
+            config = self.build_station_config()
+        except ValueError as e:
+            self.log_message(f"配置无效，定时发送继续使用上一次的配置: {str(e)}")
+            return
+        state = (config, self.get_kiss_transport())
+        if state != self.schedule_state:
+            self.schedule_state = state
+            self.log_message("定时发送配置已更新")
+    
+    def schedule_loop(self, interval, stop_event):
+        """
+        定时发送循环（在定时线程中直接构建和发送）
+
+        参数:
+        interval   - 发送间隔 (秒)
+        stop_event - 停止事件
+        """
+        next_time = self.clock.monotonic()
+        while not stop_event.is_set():
+            # 使用最新的配置快照发送
+            config, kiss_transport = self.schedule_state
+            self.profiler.call("schedule_loop", self._send_packet_thread, config, kiss_transport)
             
-            # 检查是否继续定时发送
-            if not self.scheduled_enabled:
-                break
+            # 按固定节拍等待，发送耗时不累积到间隔中
+            next_time += interval
+            self.clock.wait(stop_event, max(0, next_time - self.clock.monotonic()))
+    
+    def geofence_loop(self, monitor, gps_source, stop_event):
+        """
+        地理围栏触发发送循环：每个GPS定位都检查围栏，进入/离开/停留时立即发送，
+        长时间没有事件时按心跳间隔发送
 
-# 启动GUI
-if __name__ == "__main__":
+        参数:
+        monitor    - GeofenceMonitor
+        gps_source - NMEAPositionSource
+        stop_event - 停止事件
+        """
+        event_names = {"enter": "进入", "exit": "离开", "dwell": "停留"}
+        fixes = queue.Queue(maxsize=100)
+        
+        def on_fix(fix):
+            try:
+                fixes.put_nowait(fix)
+            except queue.Full:
+                pass
+        
+        gps_source.subscribe(on_fix)
+        try:
+            while not stop_event.is_set():
+                try:
+                    fix = fixes.get(timeout=min(1.0, max(0.05, monitor.next_heartbeat())))
+                    events = monitor.update(fix["latitude"], fix["longitude"])
+                except queue.Empty:
+                    events = []
+                if not events and monitor.next_heartbeat() > 0:
+                    continue
+                
+                # 围栏事件写入注释
+                config, kiss_transport = self.schedule_state
+                if events:
+                    description = " ".join(f"{event_names[event]}{name}" for event, name in events)
+                    config = config._replace(comment=f"{config.comment} {description}")
+                    self.root.after(0, lambda text=description: self.log_message(f"围栏事件: {text}"))
+                monitor.mark_sent()
+                self.profiler.call("geofence_loop", self._send_packet_thread, config, kiss_transport)
+        finally:
+            gps_source.unsubscribe(on_fix)
+
+# 长时间运行测试
+def process_rss_mb():
+    """
+    当前进程常驻内存 (MB)
+
+    Linux 读取 /proc/self/statm，Windows 读取工作集大小，其他系统 (macOS) 调用 ps；
+    都无法获取时返回 None。
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1048576
+    except (OSError, ValueError, AttributeError):
+        pass
+    if os.name == "nt" and ctypes is not None:
+        class ProcessMemoryCounters(ctypes.Structure):
+            _fields_ = [
+                ("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD),
+                ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+                ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t), ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t),
+            ]
+        try:
+            kernel32 = ctypes.WinDLL("kernel32")
+            kernel32.GetCurrentProcess.restype = wintypes.HANDLE
+            psapi = ctypes.WinDLL("psapi")
+            psapi.GetProcessMemoryInfo.argtypes = [wintypes.HANDLE, ctypes.POINTER(ProcessMemoryCounters), wintypes.DWORD]
+            counters = ProcessMemoryCounters()
+            counters.cb = ctypes.sizeof(counters)
+            if psapi.GetProcessMemoryInfo(kernel32.GetCurrentProcess(), ctypes.byref(counters), counters.cb):
+                return counters.WorkingSetSize / 1048576
+        except (OSError, AttributeError):
+            pass
+        return None
+    try:
+        output = subprocess.run(["ps", "-o", "rss=", "-p", str(os.getpid())], capture_output=True,
+                                text=True, timeout=5).stdout
+        return int(output.strip()) / 1024  # ps 输出单位为 KB
+    except (OSError, ValueError, subprocess.SubprocessError):
+        return None
+
+def process_socket_count():
+    """
+    当前进程打开的套接字数（遍历 /dev/fd，Linux 和 macOS 可用；Windows 返回 None）
+    """
+    try:
+        names = os.listdir("/dev/fd")
+    except OSError:
+        return None
+    sockets = 0
+    for name in names:
+        try:
+            if stat.S_ISSOCK(os.fstat(int(name)).st_mode):
+                sockets += 1
+        except (OSError, ValueError):
+            pass  # 列目录本身使用的描述符已关闭
+    return sockets
+
+def process_metrics():
+    """
+    当前进程资源占用（无法获取的项为 None）
+
+    返回:
+    dict - {"rss_mb", "threads", "sockets"}
+    """
+    return {"rss_mb": process_rss_mb(), "threads": threading.active_count(), "sockets": process_socket_count()}
+
+def start_mock_endpoint(host="127.0.0.1", port=0, delay=0):
+    """
+    启动本地模拟提交服务器（总是返回 {"rs": "ok"}），用于测试
+
+    参数:
+    delay - 可选: 每个请求的模拟服务器耗时 (秒)
+
+    返回:
+    (server, url) - server.shutdown() 停止
+    """
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True  # 头部和正文分两次写出，避免长连接上的延迟确认等待
+        
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            if delay:
+                time_module.sleep(delay)
+            body = b'{"rs": "ok", "msg": "mock"}'
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        
+        def log_message(self, format, *args):
+            pass
+    
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}/makeaprs"
+
+class SoakMonitor:
+    """
+    长时间运行指标采样与增长判定
+
+    丢弃预热阶段的样本后，比较最后 1/4 与最前 1/4 样本的平均值，
+    增长超过容差的指标判定为无界增长。
+    """
+
+    # 各指标允许的增长量
+    TOLERANCES = {"rss_mb": 8.0, "threads": 2, "sockets": 2, "log_lines": 50, "after_queue": 5}
+
+    def __init__(self, warmup=0.2, tolerances=None):
+        self.warmup = warmup
+        self.tolerances = dict(self.TOLERANCES, **(tolerances or {}))
+        self.samples = []                     # [{"virtual_hours", 指标...}]
+
+    def sample(self, virtual_seconds, **extra):
+        """记录一次采样（进程指标 + 额外指标，例如日志行数、after 队列深度）"""
+        record = {"virtual_hours": round(virtual_seconds / 3600, 2)}
+        record.update(process_metrics())
+        record.update(extra)
+        self.samples.append(record)
+        return record
+
+    def verdict(self):
+        """
+        判定各指标是否无界增长
+
+        返回:
+        dict - {指标: {"start", "end", "growth", "limit", "ok"}}，样本不足时为空；
+               未采集到的指标 (任一样本为 None 或缺失) 各值为 None，ok 为 None
+        """
+        samples = self.samples[int(len(self.samples) * self.warmup):]
+        if len(samples) < 8:
+            return {}
+        quarter = max(1, len(samples) // 4)
+        result = {}
+        for metric, limit in self.tolerances.items():
+            values = [sample.get(metric) for sample in samples]
+            if any(value is None for value in values):
+                result[metric] = {"start": None, "end": None, "growth": None, "limit": limit, "ok": None}
+                continue
+            start = sum(values[:quarter]) / quarter
+            end = sum(values[-quarter:]) / quarter
+            result[metric] = {"start": start, "end": end, "growth": end - start, "limit": limit,
+                              "ok": end - start <= limit}
+        return result
+
+    def missing(self):
+        """未采集到的指标列表"""
+        return [metric for metric, item in self.verdict().items() if item["ok"] is None]
+
+    def passed(self):
+        """采集到的指标都没有增长，且至少采集到一个指标"""
+        checked = [item["ok"] for item in self.verdict().values() if item["ok"] is not None]
+        return bool(checked) and all(checked)
+
+    def write_csv(self, path):
+        """写出全部样本"""
+        fields = ["virtual_hours", "rss_mb", "threads", "sockets", "log_lines", "after_queue", "sent"]
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=fields, extrasaction="ignore")
+            writer.writeheader()
+            writer.writerows(self.samples)
+
+def _soak_gui(clock, url, interval_minutes, duration, sample_interval, monitor, history_path):
+    """在 GUI 中运行定时发送，采样日志行数和 Tk after 队列深度"""
     root = tk.Tk()
-    app = APRSApp(root)
+    try:
+        app = APRSApp(root, clock=clock)
+    except Exception:
+        root.destroy()
+        raise
+    app.history = PacketHistory(history_path)
+    app.dedupe_window_var.set(0)
+    # 缩小日志上限，预热阶段内即达到上限，之后日志行数应保持不变
+    app.LOG_MAX_LINES = 200
+    app.endpoint_list_var.set(url)
+    app.endpoint_enabled_var.set(True)
+    app.toggle_endpoint_pool()
+    app.interval_var.set(interval_minutes)
+    app.toggle_schedule()
+    
+    real_start = time_module.monotonic()
+    
+    def sample():
+        monitor.sample(
+            clock.elapsed(),
+            log_lines=int(app.log_text.index("end-1c").split(".")[0]),
+            after_queue=len(root.tk.splitlist(root.tk.call("after", "info"))),
+            sent=app.get_history().count()
+        )
+        if time_module.monotonic() - real_start >= duration:
+            app.toggle_schedule()
+            if app.endpoint_pool is not None:
+                app.endpoint_pool.stop()
+            root.quit()
+        else:
+            root.after(int(sample_interval * 1000), sample)
+    
+    root.after(int(sample_interval * 1000), sample)
     root.mainloop()
+    root.destroy()
+    app.history.close()
+
+def _soak_headless(clock, url, interval_minutes, duration, sample_interval, monitor):
+    """没有图形界面时只测试定时发送路径（模板、连接池、提交）"""
+    config = StationConfig.from_spec({"callsign": "N0CALL-1", "latitude": "2947.76N", "longitude": "11941.12E",
+                                      "comment": "SOAK TEST"})
+    pool = EndpointPool([url], probe_interval=0)
+    templates = PacketTemplateCache(size=16)
+    stop_event = threading.Event()
+    sent = [0]
+    
+    def loop():
+        next_time = clock.monotonic()
+        while not stop_event.is_set():
+            send_aprs_packet(pool=pool, template_cache=templates, dedupe_cache=None, **config.send_kwargs())
+            sent[0] += 1
+            next_time += interval_minutes * 60
+            clock.wait(stop_event, next_time - clock.monotonic())
+    
+    thread = threading.Thread(target=loop, daemon=True)
+    thread.start()
+    real_start = time_module.monotonic()
+    try:
+        while time_module.monotonic() - real_start < duration:
+            time_module.sleep(sample_interval)
+            monitor.sample(clock.elapsed(), sent=sent[0])
+    finally:
+        stop_event.set()
+        thread.join()
+        pool.stop()
+
+def run_soak(args):
+    """命令行: 加速时钟长时间运行测试，指标无界增长时以非零状态退出"""
+    clock = VirtualClock(args.soak_speed)
+    duration = args.soak_days * 86400 / args.soak_speed
+    server, url = start_mock_endpoint()
+    monitor = SoakMonitor()
+    print(f"模拟 {args.soak_days} 天，每 {args.soak_interval} 分钟发送一次，加速 {args.soak_speed:g} 倍，"
+          f"实际约 {duration:.0f} 秒")
+    
+    # 关闭去重（去重窗口按实际时间计算，加速后相同位置的数据包都会被跳过）
+    dedupe_window = packet_dedupe_cache.window
+    packet_dedupe_cache.set_window(0)
+    try:
+        try:
+            with tempfile.TemporaryDirectory() as tmp:
+                _soak_gui(clock, url, args.soak_interval, duration, args.soak_sample, monitor,
+                          os.path.join(tmp, "soak_history.db"))
+        except tk.TclError as e:
+            print(f"无法启动图形界面 ({str(e)})，只测试发送路径")
+            _soak_headless(clock, url, args.soak_interval, duration, args.soak_sample, monitor)
+    finally:
+        packet_dedupe_cache.set_window(dedupe_window)
+        server.shutdown()
+        server.server_close()
+    
+    if args.soak_report:
+        monitor.write_csv(args.soak_report)
+    last = monitor.samples[-1] if monitor.samples else {}
+    print(f"虚拟时长 {last.get('virtual_hours', 0)} 小时，发送 {last.get('sent', 0)} 个数据包")
+    verdict = monitor.verdict()
+    for metric, item in verdict.items():
+        if item["ok"] is None:
+            print(f"  {metric}: 未采集")
+            continue
+        state = "正常" if item["ok"] else "持续增长"
+        print(f"  {metric}: {item['start']:.1f} -> {item['end']:.1f} (增长 {item['growth']:+.1f}，容差 {item['limit']}) {state}")
+    missing = monitor.missing()
+    if missing:
+        print(f"警告: 本平台/模式无法采集 {', '.join(missing)}，这些指标未参与判定")
+    if not monitor.passed():
+        raise SystemExit("长时间运行测试未通过" if verdict else "样本不足，无法判定")
+    print("长时间运行测试通过")
+
+def parse_endpoints(value):
+    """解析逗号分隔的服务器地址列表，未提供时返回 None"""
+    if not value:
+        return None
+    return [address.strip() for address in value.split(",") if address.strip()]
+
+def run_fleet(args, profiler=None):
+    """命令行: 多进程分片发送车队数据包（指定 --interval 时按时隙循环发送）"""
+    with open(args.fleet, encoding="utf-8") as f:
+        station_specs = json.load(f)
+    
+    if args.interval:
+        run_fleet_slots(args, station_specs, profiler)
+        return
+    
+    output = send_packets_sharded(
+        station_specs,
+        processes=args.processes,
+        url=args.url,
+        dedupe_window=args.dedupe_window,
+        endpoints=parse_endpoints(args.endpoints),
+        profiler=profiler
+    )
+    metrics = output["metrics"]
+    for shard in metrics["shards"]:
+        print(f"分片 {shard['shard']} (PID {shard['pid']}): 发送 {shard['sent']} 成功 {shard['ok']} "
+              f"失败 {shard['err']} 重复 {shard['dup']} 耗时 {shard['busy']:.2f}s")
+    print(f"共 {metrics['sent']} 个数据包，{metrics['processes']} 个进程，"
+          f"耗时 {metrics['elapsed']:.2f}s，{metrics['rate']:.1f} 包/秒")
+
+def run_fleet_slots(args, station_specs, profiler=None):
+    """命令行: 车队按时隙循环发送（可只预览负载或重新均衡）"""
+    if args.slots:
+        planner = BeaconSlotPlanner.load_file(args.slots, args.interval, args.capacity)
+    else:
+        planner = BeaconSlotPlanner(args.interval, args.capacity)
+    callsigns = [spec["callsign"] for spec in station_specs]
+    before = len(planner.slots)
+    if args.rebalance:
+        planner.rebalance(callsigns)
+    else:
+        planner.assign(callsigns)
+    if args.slots:
+        planner.save(args.slots)
+    
+    print(planner.preview())
+    if not args.rebalance:
+        added = len(planner.slots) - before
+        if args.capacity and max(planner.load()) > args.capacity:
+            print("提示: 部分时隙超过容量，可使用 --rebalance 重新均匀分配")
+        elif before and added > 0:
+            print(f"提示: 新增 {added} 个台站，可使用 --rebalance 重新均匀分配")
+    if args.preview:
+        return
+    
+    def on_result(callsign, result):
+        print(f"{datetime.now().strftime('%H:%M:%S')} {callsign:<10} {result.get('rs')}")
+    
+    try:
+        totals = run_fleet_schedule(
+            station_specs,
+            planner,
+            rounds=args.rounds,
+            workers=args.workers,
+            url=args.url,
+            endpoints=parse_endpoints(args.endpoints),
+            dedupe_window=args.dedupe_window,
+            on_result=on_result,
+            profiler=profiler
+        )
+    except KeyboardInterrupt:
+        return
+    print(f"共发送 {totals['sent']} 个数据包，成功 {totals['ok']} 失败 {totals['err']} 重复 {totals['dup']}")
+
+def run_gateway(args, profiler=None):
+    """命令行: 运行本地接入网关，每10秒输出一次统计，Ctrl+C 退出"""
+    if not any((args.gateway_udp, args.gateway_tcp, args.gateway_http)):
+        raise SystemExit("网关至少需要 --gateway-udp / --gateway-tcp / --gateway-http 之一")
+    gateway = PacketGateway(
+        url=args.url,
+        endpoints=parse_endpoints(args.endpoints),
+        rate=args.rate,
+        queue_size=args.gateway_queue,
+        dedupe_window=args.dedupe_window,
+        profiler=profiler
+    ).start()
+    if args.gateway_udp:
+        print(f"UDP 监听 {args.gateway_host}:{gateway.serve_udp(args.gateway_udp, args.gateway_host)}")
+    if args.gateway_tcp:
+        print(f"TCP 监听 {args.gateway_host}:{gateway.serve_tcp(args.gateway_tcp, args.gateway_host)}")
+    if args.gateway_http:
+        print(f"HTTP 监听 {args.gateway_host}:{gateway.serve_http(args.gateway_http, args.gateway_host)}")
+    
+    try:
+        while True:
+            time_module.sleep(10)
+            stats = gateway.stats()
+            uplink = stats["uplink"]
+            print(f"{datetime.now().strftime('%H:%M:%S')} 队列 {stats['queue']}/{stats['queue_size']} "
+                  f"上行 成功 {uplink['ok']} 失败 {uplink['err']} 延迟 {uplink['latency_ms']}ms")
+            for client, counts in stats["clients"].items():
+                print(f"  {client}: 收到 {counts['received']} 排队 {counts['queued']} 重复 {counts['dup']} "
+                      f"无效 {counts['invalid']} 丢弃 {counts['dropped']} 成功 {counts['ok']} 失败 {counts['err']}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        gateway.stop()
+
+def run_objects(args):
+    """命令行: 批量发送对象/物品"""
+    if not args.callsign:
+        raise SystemExit("发送对象需要 --callsign")
+    try:
+        objects = load_aprs_objects(args.objects)
+    except ValueError as e:
+        raise SystemExit(f"对象文件校验失败:\n{str(e)}")
+    
+    aprs_word = str(calculate_aprs_verification_code(args.callsign))
+    session = create_http_session(pool_size=1)
+    endpoints = parse_endpoints(args.endpoints)
+    pool = EndpointPool(endpoints, probe_interval=0) if endpoints else None
+    sender = ObjectBatchSender(
+        args.callsign,
+        args.path,
+        lambda packet: post_aprs_data(packet, aprs_word, session=session, url=args.url, pool=pool),
+        rate=args.rate
+    )
+    if args.object_state:
+        sender.load_state(args.object_state)
+    
+    try:
+        results = sender.send(
+            objects,
+            force=args.force,
+            kill_removed=args.kill_removed,
+            on_result=lambda entry: print(f"{entry['name']:<9} {entry['rs']} {entry['message']}")
+        )
+    finally:
+        session.close()
+        if pool is not None:
+            pool.stop()
+        if args.object_state:
+            sender.save_state(args.object_state)
+    skipped = sum(1 for entry in results if entry["rs"] == "skip")
+    failed = sum(1 for entry in results if entry["rs"] not in ("ok", "skip"))
+    print(f"共 {len(objects)} 个对象，发送 {len(results) - skipped}，未变化 {skipped}，失败 {failed}")
+
+def main():
+    """程序入口：无参数时启动GUI"""
+    parser = argparse.ArgumentParser(description="APRS数据包发送工具 - BG5FNL")
+    parser.add_argument("--fleet", help="车队数据包参数 JSON 文件 (send_aprs_packet 参数列表)，多进程分片发送后退出")
+    parser.add_argument("--processes", type=int, default=None, help="分片发送的工作进程数 (默认: CPU 核心数)")
+    parser.add_argument("--url", default=APRS_SUBMIT_URL, help="数据包提交地址")
+    parser.add_argument("--interval", type=int, help="车队循环发送间隔 (秒)，按时隙分散各台站的发送时刻")
+    parser.add_argument("--capacity", type=int, help="时隙分配的每秒最大台站数")
+    parser.add_argument("--slots", help="时隙分配文件，保存后新增台站不影响已有台站的相位")
+    parser.add_argument("--rebalance", action="store_true", help="重新均匀分配全部台站的时隙")
+    parser.add_argument("--preview", action="store_true", help="只显示每秒负载预览，不发送")
+    parser.add_argument("--rounds", type=int, help="循环发送的轮数 (默认一直运行)")
+    parser.add_argument("--workers", type=int, default=8, help="循环发送的线程数")
+    parser.add_argument("--endpoints", help="逗号分隔的服务器地址 (https://... 或 aprsis://host:port)，按延迟自动选择并故障切换")
+    parser.add_argument("--startup-report", help="启动耗时报告文件 (每次启动追加一行 JSON)")
+    parser.add_argument("--profile", choices=["cprofile", "sample"], help="运行期间进行性能分析，退出时保存结果")
+    parser.add_argument("--profile-dir", default=PROFILE_DIR, help="性能分析结果目录")
+    parser.add_argument("--dedupe-window", type=int, default=30, help="去重窗口 (秒, 0=关闭)")
+    parser.add_argument("--gateway", action="store_true", help="运行本地接入网关，接收其他程序的数据包统一发送")
+    parser.add_argument("--gateway-host", default="127.0.0.1", help="网关监听地址")
+    parser.add_argument("--gateway-udp", type=int, help="网关 UDP 端口")
+    parser.add_argument("--gateway-tcp", type=int, help="网关 TCP 端口")
+    parser.add_argument("--gateway-http", type=int, help="网关 HTTP 端口 (POST 提交，GET /stats 统计)")
+    parser.add_argument("--gateway-queue", type=int, default=1000, help="网关上行队列长度")
+    parser.add_argument("--soak", action="store_true", help="加速时钟长时间运行测试 (本地模拟服务器)，指标持续增长时失败")
+    parser.add_argument("--soak-days", type=float, default=7, help="模拟运行天数")
+    parser.add_argument("--soak-speed", type=float, default=3600, help="时钟加速倍数")
+    parser.add_argument("--soak-interval", type=int, default=5, help="模拟发送间隔 (分钟)")
+    parser.add_argument("--soak-sample", type=float, default=1.0, help="采样间隔 (实际秒)")
+    parser.add_argument("--soak-report", help="采样结果 CSV 文件")
+    parser.add_argument("--objects", help="对象/物品 CSV 或 GeoJSON 文件，校验后限速发送并退出")
+    parser.add_argument("--callsign", help="发送对象使用的呼号")
+    parser.add_argument("--path", default="WIDE1-1", help="发送对象使用的路径")
+    parser.add_argument("--rate", type=float, default=1.0, help="对象发送 / 网关上行速率 (包/秒)")
+    parser.add_argument("--object-state", help="对象发送记录文件，用于多次运行之间只重发变化的对象")
+    parser.add_argument("--force", action="store_true", help="忽略发送记录，全部重发")
+    parser.add_argument("--kill-removed", action="store_true", help="为发送记录中已移除的对象发送删除报文")
+    args = parser.parse_args()
+    
+    profiler = ProfilerHooks()
+    if args.profile:
+        profiler.start(args.profile)
+    try:
+        if args.fleet:
+            run_fleet(args, profiler)
+        elif args.objects:
+            run_objects(args)
+        elif args.gateway:
+            run_gateway(args, profiler)
+        elif args.soak:
+            run_soak(args)
+        else:
+            # 启动GUI
+            root = tk.Tk()
+            app = APRSApp(root, startup_report=args.startup_report, profiler=profiler)
+            root.mainloop()
+    finally:
+        for path in profiler.stop(args.profile_dir):
+            print(f"性能分析结果: {path}")
+
+if __name__ == "__main__":
+    main()
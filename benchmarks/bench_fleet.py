@@ -0,0 +1,62 @@
+"""
+分片车队发送吞吐量基准
+
+本地模拟服务器 (每个请求固定耗时) 上按不同进程数调用 send_packets_sharded，
+输出每秒发送数和相对单进程的加速比。
+
+用法:
+python benchmarks/bench_fleet.py [--stations 400] [--delay 0.005] [--processes 1 2 4 8]
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import APRS
+
+
+def fleet_specs(count):
+    """生成 count 个不同呼号、不同位置的台站"""
+    return [
+        {
+            "callsign": f"BG{index:04d}-9",
+            "latitude": f"{29 + index % 60 // 10:02d}{index % 60:02d}.{index % 100:02d}N",
+            "longitude": "11941.12E",
+            "speed": index % 120,
+            "course": index % 360,
+            "comment": "bench",
+        }
+        for index in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="分片车队发送吞吐量基准")
+    parser.add_argument("--stations", type=int, default=400, help="台站数")
+    parser.add_argument("--delay", type=float, default=0.005, help="模拟服务器每个请求的耗时 (秒)")
+    parser.add_argument("--processes", type=int, nargs="+", default=[1, 2, 4, 8], help="要测试的进程数")
+    args = parser.parse_args()
+    
+    server, url = APRS.start_mock_endpoint(delay=args.delay)
+    specs = fleet_specs(args.stations)
+    print(f"CPU 核心数 {os.cpu_count()}，{args.stations} 个台站，模拟服务器耗时 {args.delay * 1000:.1f} ms")
+    print(f"{'进程数':>6} {'耗时(s)':>8} {'包/秒':>8} {'加速比':>6}")
+    baseline = None
+    try:
+        for processes in args.processes:
+            metrics = APRS.send_packets_sharded(specs, processes=processes, url=url)["metrics"]
+            if metrics["ok"] != args.stations:
+                print(f"{processes:>6} 发送失败: {metrics}")
+                continue
+            baseline = baseline or metrics["rate"]
+            print(f"{metrics['processes']:>6} {metrics['elapsed']:>8.2f} {metrics['rate']:>8.0f} "
+                  f"{metrics['rate'] / baseline:>6.2f}")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+单次信标构建耗时基准：每次新建 PacketTemplate 与复用 PacketTemplateCache 对比
+
+提交请求被替换为立即返回的假会话，只测量构建和发送路径本身的开销。
+
+用法:
+python benchmarks/bench_template.py [--beacons 20000] [--repeat 5]
+"""
+
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import APRS
+
+
+class NullResponse:
+    status_code = 200
+    text = ""
+
+    def json(self):
+        return {"rs": "ok"}
+
+
+class NullSession:
+    def post(self, *args, **kwargs):
+        return NullResponse()
+
+
+STATION = {
+    "callsign": "BG5XXX-9",
+    "path": "WIDE1-1,WIDE2-1",
+    "comment": "APRS.TV 车队基准测试",
+    "power": 25,
+    "antenna_height": 10,
+    "gain": 6,
+    "device_info": "FT-7900",
+    "software_info": "APRS.py",
+    "phg": True,
+}
+
+
+def run(beacons, template_cache):
+    """发送 beacons 个信标 (位置和速度逐个变化)，返回秒数"""
+    session = NullSession()
+    start = timeit.default_timer()
+    for index in range(beacons):
+        APRS.send_aprs_packet(
+            latitude=f"29{index % 60:02d}.{index % 100:02d}N",
+            speed=index % 120,
+            course=index % 360,
+            dedupe_cache=None,
+            session=session,
+            template_cache=template_cache,
+            **STATION
+        )
+    return timeit.default_timer() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="单次信标构建耗时基准")
+    parser.add_argument("--beacons", type=int, default=20000, help="每轮信标数")
+    parser.add_argument("--repeat", type=int, default=5, help="轮数 (取最快一轮)")
+    args = parser.parse_args()
+    
+    uncached = min(run(args.beacons, None) for _ in range(args.repeat))
+    cached = min(run(args.beacons, APRS.PacketTemplateCache()) for _ in range(args.repeat))
+    print(f"每次新建模板: {uncached / args.beacons * 1e6:7.2f} µs/信标")
+    print(f"复用模板缓存: {cached / args.beacons * 1e6:7.2f} µs/信标")
+    print(f"比例: {cached / uncached:.2f}")
+
+
+if __name__ == "__main__":
+    main()
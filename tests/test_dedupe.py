@@ -0,0 +1,73 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import APRS
+
+
+def test_duplicate_inside_window_is_skipped():
+    cache = APRS.PacketDedupeCache(window=30)
+    assert cache.check_and_add("a") is False
+    assert cache.check_and_add("a") is True
+    assert cache.check_and_add("b") is False
+    assert cache.stats() == {"window": 30, "hits": 1, "misses": 2, "size": 2}
+
+
+def test_entries_expire_after_window(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(APRS.time_module, "monotonic", lambda: now[0])
+    cache = APRS.PacketDedupeCache(window=30)
+    cache.check_and_add("a")
+    now[0] += 29
+    assert cache.check_and_add("a") is True
+    now[0] += 2
+    assert cache.check_and_add("a") is False
+
+
+def test_zero_window_disables():
+    cache = APRS.PacketDedupeCache(window=0)
+    assert not cache.check_and_add("a")
+    assert not cache.check_and_add("a")
+
+
+def test_discard_allows_retry():
+    cache = APRS.PacketDedupeCache()
+    cache.check_and_add("a")
+    cache.discard("a")
+    assert cache.check_and_add("a") is False
+
+
+@pytest.fixture
+def endpoint():
+    """本地提交服务器，依次返回 replies 中的结果"""
+    replies = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            body = json.dumps(replies.pop(0)).encode()
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/", replies
+    server.shutdown()
+    server.server_close()
+
+
+def test_rejected_packet_can_be_retried(endpoint):
+    url, replies = endpoint
+    replies.extend([{"rs": "err", "message": "throttled"}, {"rs": "ok"}])
+    cache = APRS.PacketDedupeCache()
+    kwargs = dict(callsign="N0CALL-1", dedupe_cache=cache, url=url)
+    assert APRS.send_aprs_packet(**kwargs)["rs"] == "err"
+    assert APRS.send_aprs_packet(**kwargs)["rs"] == "ok"
+    assert APRS.send_aprs_packet(**kwargs)["rs"] == "dup"
@@ -0,0 +1,150 @@
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import APRS
+
+
+@pytest.fixture
+def mock():
+    """启动任意个模拟服务器: mock(delay) -> 地址"""
+    servers = []
+
+    def start(delay=0):
+        server, url = APRS.start_mock_endpoint(delay=delay)
+        servers.append(server)
+        return url
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def broken():
+    """接受 TCP 连接但总是返回 503 的服务器"""
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            self.send_error(503)
+
+        def do_HEAD(self):
+            self.send_error(503)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/makeaprs"
+    server.shutdown()
+    server.server_close()
+
+
+def closed_port_url():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return f"http://127.0.0.1:{sock.getsockname()[1]}/makeaprs"
+
+
+def test_ewma_ranks_fastest_first(mock):
+    slow, fast = mock(delay=0.05), mock()
+    pool = APRS.EndpointPool([slow, fast], probe_interval=0)
+    try:
+        for _ in range(4):
+            assert pool.submit("N0CALL-1>APRSTV:>test", "13023")["rs"] == "ok"
+        assert pool.best().address == fast
+        stats = {item["address"]: item for item in pool.stats()}
+        assert stats[slow]["ewma_ms"] > stats[fast]["ewma_ms"]
+    finally:
+        pool.stop()
+
+
+def test_failover_to_next_endpoint(mock, broken):
+    good = mock()
+    dead = closed_port_url()
+    pool = APRS.EndpointPool([dead, broken, good], probe_interval=0)
+    try:
+        for _ in range(3):
+            assert pool.submit("N0CALL-1>APRSTV:>test", "13023")["endpoint"] == good
+        # 失败过的服务器排到后面，之后的提交不再先尝试它们
+        states = {endpoint.address: endpoint for endpoint in pool.endpoints}
+        assert states[dead].failures == states[broken].failures == 1
+        assert states[good].sent == 3
+        assert pool.best().address == good
+    finally:
+        pool.stop()
+
+
+def test_hedged_request_uses_faster_endpoint(mock):
+    slow, fast = mock(delay=1.0), mock()
+    pool = APRS.EndpointPool([slow, fast], hedge_after=0.05, probe_interval=0)
+    try:
+        start = time.perf_counter()
+        result = pool.submit("N0CALL-1>APRSTV:>test", "13023")
+        assert result["endpoint"] == fast
+        assert time.perf_counter() - start < 0.8
+    finally:
+        pool.stop()
+
+
+def test_timeout_backs_off_after_failures():
+    endpoint = APRS.SubmitEndpoint("http://127.0.0.1:1/", timeout=10, min_timeout=0.1, timeout_factor=4)
+    endpoint.observe(0.05, True)
+    assert endpoint.timeout() == pytest.approx(0.2)
+    timeouts = []
+    for _ in range(6):
+        endpoint.observe(endpoint.timeout(), False)
+        timeouts.append(endpoint.timeout())
+    assert timeouts == sorted(timeouts) and timeouts[-1] > 1.0
+    assert max(timeouts) <= 10
+
+
+def test_probe_does_not_revive_erroring_server(broken):
+    endpoint = APRS.SubmitEndpoint(broken, max_failures=1)
+    endpoint.observe(0.01, False)
+    assert not endpoint.healthy
+    assert endpoint.probe() is False
+    assert not endpoint.healthy
+
+
+def test_probe_restores_health_but_not_failure_count(mock):
+    endpoint = APRS.SubmitEndpoint(mock(), max_failures=2)
+    endpoint.observe(0.01, False)
+    endpoint.observe(0.01, False)
+    assert not endpoint.healthy
+    assert endpoint.probe() is True
+    assert endpoint.healthy and endpoint.failures == 2
+    # 恢复后第一次真实提交失败立即重新标记为不可用，成功才清零失败次数
+    endpoint.submit("N0CALL-1>APRSTV:>test", "13023")
+    assert endpoint.failures == 0
+    endpoint.close()
+
+
+def test_aprsis_probe_reads_banner():
+    server = socket.socket()
+    server.bind(("127.0.0.1", 0))
+    server.listen()
+    port = server.getsockname()[1]
+    replies = [b"# aprsc 2.1.14\r\n", b""]
+
+    def serve():
+        for reply in replies:
+            conn, _ = server.accept()
+            if reply:
+                conn.sendall(reply)
+            conn.close()
+
+    thread = threading.Thread(target=serve, daemon=True)
+    thread.start()
+    endpoint = APRS.SubmitEndpoint(f"aprsis://127.0.0.1:{port}", timeout=2)
+    try:
+        assert endpoint.probe() is True
+        assert endpoint.probe() is False
+    finally:
+        thread.join(timeout=2)
+        server.close()
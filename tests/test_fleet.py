@@ -0,0 +1,54 @@
+import pytest
+
+import APRS
+
+
+@pytest.fixture(scope="module")
+def endpoint():
+    server, url = APRS.start_mock_endpoint()
+    yield url
+    server.shutdown()
+    server.server_close()
+
+
+def spec(callsign, latitude="2947.76N", comment="fleet"):
+    return {"callsign": callsign, "latitude": latitude, "longitude": "11941.12E", "comment": comment}
+
+
+def test_shards_keep_input_order(endpoint):
+    specs = [spec(f"BG{index:03d}-9", comment=f"n{index}") for index in range(40)]
+    output = APRS.send_packets_sharded(specs, processes=4, url=endpoint)
+    metrics = output["metrics"]
+    assert metrics["processes"] == 4 and len(metrics["shards"]) == 4
+    assert metrics["sent"] == metrics["ok"] == 40
+    assert len({shard["pid"] for shard in metrics["shards"]}) == 4
+    for index, result in enumerate(output["results"]):
+        assert result["rs"] == "ok"
+        assert result["aprs_data"].startswith(f"BG{index:03d}-9>")
+        assert result["aprs_data"].endswith(f" n{index}")
+
+
+def test_each_callsign_stays_on_one_shard():
+    callsigns = [f"BG{index:03d}-9" for index in range(100)]
+    assert [APRS.station_shard(callsign, 4) for callsign in callsigns] == \
+        [APRS.station_shard(callsign.lower(), 4) for callsign in callsigns]
+    assert set(APRS.station_shard(callsign, 4) for callsign in callsigns) == {0, 1, 2, 3}
+
+
+def test_dedupe_inside_each_shard(endpoint):
+    # 同一呼号的重复数据包落在同一分片，在该分片的去重缓存中被跳过
+    specs = []
+    for index in range(12):
+        specs.append(spec(f"BG{index:03d}-9"))
+        specs.append(spec(f"BG{index:03d}-9"))
+        specs.append(spec(f"BG{index:03d}-9", latitude="2948.00N"))
+    output = APRS.send_packets_sharded(specs, processes=3, url=endpoint, dedupe_window=30)
+    statuses = [result["rs"] for result in output["results"]]
+    assert statuses == ["ok", "dup", "ok"] * 12
+    assert output["metrics"]["dup"] == 12 and output["metrics"]["ok"] == 24
+
+
+def test_single_shard_runs_in_process(endpoint):
+    output = APRS.send_packets_sharded([spec("BG001-9"), spec("BG001-9")], processes=4, url=endpoint)
+    assert output["metrics"]["processes"] == 1
+    assert [result["rs"] for result in output["results"]] == ["ok", "dup"]
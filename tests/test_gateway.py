@@ -0,0 +1,93 @@
+import json
+import time
+import urllib.request
+
+import pytest
+
+import APRS
+
+
+@pytest.fixture
+def gateway():
+    gateway = APRS.PacketGateway(dedupe_window=30)
+    yield gateway
+    gateway.session.close()
+
+
+def test_parse_tnc2(gateway):
+    aprs_data, word, key = gateway.parse("bg5fnl-7>aprs,wide1-1:!2947.76N/11941.12E>Test")
+    assert aprs_data == "BG5FNL-7>APRS,WIDE1-1:!2947.76N/11941.12E>Test"
+    assert word == str(APRS.calculate_aprs_verification_code("BG5FNL-7"))
+    assert key == aprs_data
+
+
+def test_parse_json_packet_keeps_given_word(gateway):
+    aprs_data, word, _ = gateway.parse('{"aprs": "N0CALL>APRS:>status", "isword": "12345"}')
+    assert (aprs_data, word) == ("N0CALL>APRS:>status", "12345")
+
+
+def test_parse_json_station_builds_packet(gateway):
+    aprs_data, _, key = gateway.parse('{"callsign": "N0CALL-9", "latitude": "2947.76N", "longitude": "11941.12E", '
+                                      '"symbol_code": ">", "comment": "hi"}')
+    assert aprs_data.startswith("N0CALL-9>APRSTV,WIDE1-1:/")
+    assert aprs_data.endswith("h2947.76N/11941.12E>   /    hi")
+    assert key == "N0CALL-9>APRSTV,WIDE1-1:/2947.76N/11941.12E>   /    hi"
+
+
+@pytest.mark.parametrize("line", [
+    "no header",
+    "N0CALL:missing destination",
+    "[]",
+    '{"comment": "no callsign"}',
+    "N0CALL>APRS:" + "x" * APRS.TNC2_MAX_LENGTH,
+])
+def test_parse_rejects_invalid(gateway, line):
+    with pytest.raises(ValueError):
+        gateway.parse(line)
+
+
+def test_submit_dedupes_and_counts_per_host(gateway):
+    assert gateway.submit("udp:127.0.0.1", "N0CALL>APRS:>hello")[0] == "queued"
+    assert gateway.submit("udp:127.0.0.1", "N0CALL>APRS:>hello")[0] == "dup"
+    assert gateway.submit("udp:127.0.0.1", "garbage")[0] == "invalid"
+    stats = gateway.stats()["clients"]["udp:127.0.0.1"]
+    assert (stats["received"], stats["queued"], stats["dup"], stats["invalid"]) == (3, 1, 1, 1)
+
+
+def test_client_stats_are_bounded(gateway):
+    for index in range(gateway.MAX_CLIENTS + 50):
+        gateway._count(f"udp:10.0.{index // 256}.{index % 256}", "received")
+    assert len(gateway.clients) == gateway.MAX_CLIENTS
+    assert "udp:10.0.0.0" not in gateway.clients
+
+
+def post(port, body):
+    request = urllib.request.Request(f"http://127.0.0.1:{port}/", data=body.encode("utf-8"), method="POST")
+    with urllib.request.urlopen(request, timeout=5) as response:
+        return json.loads(response.read())["results"]
+
+
+def test_http_accepts_ndjson_and_json_array(gateway):
+    port = gateway.serve_http(0)
+    try:
+        results = post(port, '{"aprs": "N0CALL>APRS:>one"}\n{"aprs": "N0CALL>APRS:>two"}\nN0CALL>APRS:>three\n')
+        assert [result["status"] for result in results] == ["queued"] * 3
+        results = post(port, '[{"aprs": "N0CALL>APRS:>four"}, "N0CALL>APRS:>five", {"aprs": "N0CALL>APRS:>one"}]')
+        assert [result["status"] for result in results] == ["queued", "queued", "dup"]
+    finally:
+        gateway.stop()
+
+
+def test_stop_releases_dedupe_keys_of_unsent_packets():
+    # 一个上行线程: 第一个数据包在等待令牌时停止，其余两个仍在队列中
+    gateway = APRS.PacketGateway(rate=0.001, burst=1, workers=1, dedupe_window=30)
+    gateway.limiter._tokens = 0               # 上行线程取出第一个数据包后等待令牌
+    gateway.start()
+    for index in range(3):
+        assert gateway.submit("tcp:127.0.0.1", f"N0CALL>APRS:>p{index}")[0] == "queued"
+    time.sleep(0.7)
+    gateway.stop()
+    assert gateway.queue.qsize() == 0
+    assert gateway.stats()["clients"]["tcp:127.0.0.1"]["dropped"] == 3
+    for index in range(3):
+        assert not gateway.dedupe_cache.check_and_add(f"N0CALL>APRS:>p{index}")
@@ -0,0 +1,67 @@
+import json
+
+import pytest
+
+import APRS
+
+SQUARE = [[(119.0, 29.0), (119.1, 29.0), (119.1, 29.1), (119.0, 29.1)]]
+HOLE = [(119.04, 29.04), (119.06, 29.04), (119.06, 29.06), (119.04, 29.06)]
+
+
+def test_polygon_with_hole():
+    fence = APRS.Geofence("square", rings=SQUARE + [HOLE])
+    assert fence.contains(29.02, 119.02)
+    assert not fence.contains(29.05, 119.05)
+    assert not fence.contains(29.2, 119.05)
+
+
+def test_circle():
+    fence = APRS.Geofence("circle", center=(29.0, 119.0), radius=500)
+    assert fence.contains(29.004, 119.0)
+    assert not fence.contains(29.005, 119.0)
+    with pytest.raises(ValueError):
+        APRS.Geofence("bad", center=(29.0, 119.0), radius=0)
+
+
+def test_index_matches_linear_scan():
+    fences = [APRS.Geofence(f"c{i}", center=(29.0 + i * 0.003, 119.0), radius=400) for i in range(50)]
+    fences.append(APRS.Geofence("large", rings=[[(110, 20), (130, 20), (130, 40), (110, 40)]]))
+    index = APRS.GeofenceIndex(fences, cell=0.01, max_cells=100)
+    assert index._large == [fences[-1]]
+    for step in range(200):
+        lat, lon = 28.99 + step * 0.001, 119.0 + (step % 7) * 0.001
+        expected = [fence.name for fence in fences if fence.contains(lat, lon)]
+        assert sorted(fence.name for fence in index.query(lat, lon)) == sorted(expected)
+
+
+def test_load_geofences(tmp_path):
+    path = tmp_path / "fences.geojson"
+    path.write_text(json.dumps({"type": "FeatureCollection", "features": [
+        {"properties": {"name": "yard", "dwell": 60}, "geometry": {"type": "Polygon", "coordinates": SQUARE}},
+        {"properties": {"name": "gate", "radius": 100}, "geometry": {"type": "Point", "coordinates": [119.2, 29.2]}},
+    ]}), encoding="utf-8")
+    index = APRS.load_geofences(path)
+    assert len(index) == 2
+    assert [fence.name for fence in index.query(29.05, 119.05)] == ["yard"]
+    assert index.query(29.05, 119.05)[0].dwell == 60
+
+
+def test_load_geofences_reports_every_bad_feature(tmp_path):
+    path = tmp_path / "bad.geojson"
+    path.write_text(json.dumps({"type": "FeatureCollection", "features": [
+        {"properties": {"name": "nopoint"}, "geometry": {"type": "Point", "coordinates": [119, 29]}},
+        {"properties": {}, "geometry": {"type": "LineString", "coordinates": []}},
+    ]}), encoding="utf-8")
+    with pytest.raises(ValueError) as error:
+        APRS.load_geofences(path)
+    assert "nopoint" in str(error.value) and "围栏2" in str(error.value)
+
+
+def test_monitor_events():
+    index = APRS.GeofenceIndex([APRS.Geofence("yard", rings=SQUARE)])
+    monitor = APRS.GeofenceMonitor(index, dwell=60, clock=lambda: 0)
+    assert monitor.update(29.05, 119.05, now=0) == [("enter", "yard")]
+    assert monitor.update(29.05, 119.05, now=30) == []
+    assert monitor.update(29.05, 119.05, now=60) == [("dwell", "yard")]
+    assert monitor.update(29.05, 119.05, now=90) == []
+    assert monitor.update(29.5, 119.05, now=100) == [("exit", "yard")]
@@ -0,0 +1,60 @@
+import csv
+import os
+
+import pytest
+
+import APRS
+
+
+@pytest.fixture
+def history(tmp_path):
+    history = APRS.PacketHistory(str(tmp_path / "data" / "history.db"))
+    for index in range(250):
+        history.record({"rs": "ok", "aprs_data": f"N0CALL>APRS:{index}"}, "n0call" if index % 2 else "bg5fnl",
+                       "2947.76N", "11941.12E", sent_at=1000 + index)
+    yield history
+    history.close()
+
+
+def test_creates_missing_directory(history, tmp_path):
+    assert os.path.exists(tmp_path / "data" / "history.db")
+
+
+def test_keyset_pagination(history):
+    first = history.query(limit=100)
+    second = history.query(limit=100, before=(first[-1]["sent_at"], first[-1]["id"]))
+    assert first[0]["sent_at"] == 1249
+    assert second[0]["sent_at"] == first[-1]["sent_at"] - 1
+    assert history.count() == 250
+    assert history.count(callsign="N0CALL", start=1100) == 75
+
+
+def test_export_csv(history, tmp_path):
+    path = tmp_path / "out.csv"
+    assert history.export_csv(str(path), callsign="BG5FNL") == 125
+    with open(path, encoding="utf-8-sig") as f:
+        rows = list(csv.reader(f))
+    assert rows[0][:3] == ["time", "callsign", "latitude"]
+    assert float(rows[1][2]) == pytest.approx(29 + 47.76 / 60)
+
+
+def test_export_gpx(history, tmp_path):
+    path = tmp_path / "out.gpx"
+    history.export_gpx(str(path))
+    text = path.read_text(encoding="utf-8")
+    assert text.count("<trk>") == 2
+    assert text.count("<trkpt") == 250
+
+
+def test_unwritable_location_raises_oserror(tmp_path):
+    blocker = tmp_path / "file"
+    blocker.write_text("")
+    with pytest.raises((OSError, APRS.sqlite3.Error)):
+        APRS.PacketHistory(str(blocker / "history.db"))
+
+
+def test_user_data_dir_respects_xdg(monkeypatch, tmp_path):
+    if os.name == "nt":
+        pytest.skip("Windows 使用 APPDATA")
+    monkeypatch.setenv("XDG_DATA_HOME", str(tmp_path))
+    assert APRS.user_data_dir() == os.path.join(str(tmp_path), "aprstool")
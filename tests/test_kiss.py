@@ -0,0 +1,86 @@
+import os
+import socket
+import threading
+
+import pytest
+
+import APRS
+
+
+def ax25_address(call, ssid=0, last=False, high_bit=False):
+    """按 AX.25 规范手工编码地址字段（high_bit: 目的地址的命令位 / 中继的已转发位）"""
+    field = bytes(ord(c) << 1 for c in call.ljust(6))
+    ssid_byte = 0x60 | (ssid << 1) | (0x80 if high_bit else 0) | (0x01 if last else 0)
+    return field + bytes([ssid_byte])
+
+
+def test_encode_ax25_matches_spec():
+    frame = bytes(APRS.AX25Encoder().encode_ax25("BG5FNL-7>APRS,WIDE1-1:!hello"))
+    expected = (
+        ax25_address("APRS", high_bit=True)
+        + ax25_address("BG5FNL", 7)
+        + ax25_address("WIDE1", 1, last=True)
+        + b"\x03\xf0!hello"
+    )
+    assert frame == expected
+
+
+def test_internet_path_is_dropped_for_rf():
+    source, destination, path, info = APRS.AX25Encoder.parse_tnc2("BG5FNL>APRS,WIDE1-1,TCPIP*,qAC,T2X:!x")
+    assert (source, destination, path, info) == ("BG5FNL", "APRS", ["WIDE1-1"], "!x")
+
+
+def test_kiss_escapes_special_bytes():
+    encoder = APRS.AX25Encoder()
+    frame = bytes(encoder.encode_ax25("N0CALL>APRS:À"))
+    kiss = bytes(encoder.encode_kiss("N0CALL>APRS:À"))
+    assert kiss[0] == kiss[-1] == APRS.KISS_FEND
+    assert APRS.KISS_FEND not in kiss[1:-1]
+    unescaped = kiss[2:-1].replace(bytes([APRS.KISS_FESC, APRS.KISS_TFEND]), bytes([APRS.KISS_FEND]))
+    unescaped = unescaped.replace(bytes([APRS.KISS_FESC, APRS.KISS_TFESC]), bytes([APRS.KISS_FESC]))
+    assert unescaped == frame
+
+
+def test_kiss_transport_tcp():
+    server = socket.socket()
+    server.bind(("127.0.0.1", 0))
+    server.listen(1)
+    received = []
+
+    def accept():
+        conn, _ = server.accept()
+        with conn:
+            while True:
+                data = conn.recv(4096)
+                if not data:
+                    break
+                received.append(data)
+
+    thread = threading.Thread(target=accept, daemon=True)
+    thread.start()
+    tnc2 = "BG5FNL-7>APRS,WIDE1-1:!hello"
+    expected = bytes(APRS.AX25Encoder().encode_kiss(tnc2))
+    with APRS.KissTransport(port=server.getsockname()[1]) as transport:
+        assert transport.send(tnc2) == len(expected)
+    thread.join(timeout=2)
+    server.close()
+    assert b"".join(received) == expected
+
+
+@pytest.mark.skipif(not hasattr(os, "openpty"), reason="需要 pty")
+def test_kiss_transport_pty_is_raw():
+    master, slave = os.openpty()
+    try:
+        # 信息字段含 \n，终端默认的 ONLCR 会把它改写为 \r\n
+        tnc2 = "BG5FNL-7>APRS:!a\nb"
+        expected = bytes(APRS.AX25Encoder().encode_kiss(tnc2))
+        transport = APRS.KissTransport(device=os.ttyname(slave))
+        transport.send(tnc2)
+        transport.close()
+        data = b""
+        while len(data) < len(expected):
+            data += os.read(master, 1024)
+        assert data == expected
+    finally:
+        os.close(master)
+        os.close(slave)
@@ -0,0 +1,85 @@
+import threading
+
+import pytest
+
+import APRS
+
+
+def message(body, source="BG5FNL-7", addressee="N0CALL"):
+    return f"{source}>APRS,WIDE1-1::{addressee:<9}:{body}"
+
+
+def test_parse_message_with_id():
+    parsed = APRS.parse_aprs_message(message("hello{12"))
+    assert parsed == {"kind": "message", "source": "BG5FNL-7", "addressee": "N0CALL", "text": "hello", "msgid": "12"}
+
+
+def test_parse_message_without_id():
+    assert APRS.parse_aprs_message(message("hello"))["msgid"] is None
+
+
+@pytest.mark.parametrize("body, kind, msgid", [
+    ("ack12", "ack", "12"),
+    ("rejAB3", "rej", "AB3"),
+    ("ack5}7", "ack", "5"),
+])
+def test_parse_ack_and_rej(body, kind, msgid):
+    parsed = APRS.parse_aprs_message(message(body))
+    assert (parsed["kind"], parsed["msgid"], parsed["text"]) == (kind, msgid, "")
+
+
+@pytest.mark.parametrize("body", ["ackOK{3", "acknowledged", "ack", "rej 1", "ack123456"])
+def test_text_starting_with_ack_is_a_message(body):
+    assert APRS.parse_aprs_message(message(body))["kind"] == "message"
+
+
+@pytest.mark.parametrize("tnc2", ["N0CALL>APRS:!position", "N0CALL>APRS::SHORT:x", "no colon"])
+def test_not_a_message(tnc2):
+    assert APRS.parse_aprs_message(tnc2) is None
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def wait_for(predicate, timeout=2.0):
+    event = threading.Event()
+    for _ in range(int(timeout / 0.01)):
+        if predicate():
+            return True
+        event.wait(0.01)
+    return predicate()
+
+
+def test_retries_stop_after_retry_intervals():
+    clock = FakeClock()
+    sent = []
+    events = []
+    manager = APRS.MessageManager("N0CALL", "WIDE1-1", lambda packet: sent.append(packet) or {"rs": "ok"},
+                                  retry_intervals=(1, 1, 1), clock=clock,
+                                  on_update=lambda event, record: events.append(event))
+    try:
+        manager.send_message("BG5FNL-7", "hi")
+        for step in range(6):
+            assert wait_for(lambda: len(sent) >= min(step + 1, 3))
+            clock.now += 1
+            with manager._condition:
+                manager._condition.notify()
+        assert wait_for(lambda: "failed" in events)
+        assert len(sent) == 3
+    finally:
+        manager.stop()
+
+
+def test_ack_clears_outstanding():
+    manager = APRS.MessageManager("N0CALL", "WIDE1-1", lambda packet: {"rs": "ok"}, retry_intervals=(60,))
+    try:
+        msgid = manager.send_message("BG5FNL-7", "hi")
+        manager.handle_packet(f"BG5FNL-7>APRS::N0CALL   :ack{msgid}")
+        assert manager.outstanding() == []
+    finally:
+        manager.stop()
@@ -0,0 +1,109 @@
+import os
+import threading
+
+import pytest
+
+import APRS
+
+LOG = os.path.join(os.path.dirname(__file__), "data", "nmea_outlier_start.log")
+
+
+def sentence(body):
+    checksum = 0
+    for char in body:
+        checksum ^= ord(char)
+    return f"${body}*{checksum:02X}\r\n".encode()
+
+
+def test_parse_rmc_and_gga():
+    parser = APRS.NMEAParser()
+    rmc, = parser.feed(sentence("GPRMC,080001.00,A,3016.4460,N,12009.3120,W,19.4,90.0,191026,,,A"))
+    assert rmc["type"] == "RMC"
+    assert rmc["latitude"] == pytest.approx(30.274100)
+    assert rmc["longitude"] == pytest.approx(-120.155200)
+    assert rmc["speed"] == pytest.approx(19.4 * 1.852)
+    gga, = parser.feed(sentence("GPGGA,080001.00,3016.4460,S,12009.3120,E,1,08,0.9,45.0,M,7.0,M,,"))
+    assert (gga["latitude"] < 0, gga["satellites"], gga["hdop"], gga["altitude"]) == (True, 8, 0.9, 45.0)
+
+
+def test_split_input_and_bad_sentences():
+    parser = APRS.NMEAParser()
+    data = sentence("GPRMC,080001.00,A,3016.4460,N,12009.3120,E,19.4,90.0,191026,,,A")
+    assert parser.feed(data[:20]) == []
+    assert len(parser.feed(data[20:])) == 1
+    assert parser.feed(data.replace(b"*", b"0*")) == []                      # 校验和错误
+    assert parser.feed(sentence("GPRMC,080001.00,V,,,,,,,191026,,,N")) == []   # 无效定位
+    assert parser.feed(b"x" * 500) == []                                     # 垃圾数据不撑大缓冲区
+    assert len(parser._buffer) <= parser.MAX_LINE
+
+
+@pytest.mark.skipif(not hasattr(os, "openpty"), reason="需要 pty")
+def test_recorded_log_recovers_from_outlier_first_fix():
+    master, slave = os.openpty()
+    source = APRS.NMEAPositionSource(os.ttyname(slave))
+    fixes = []
+    done = threading.Event()
+
+    def on_fix(fix):
+        fixes.append(fix)
+        if len(fixes) == 18:
+            done.set()
+
+    source.subscribe(on_fix)
+    source.start()
+    try:
+        with open(LOG, "rb") as f:
+            os.write(master, f.read())
+        assert done.wait(5)
+    finally:
+        source.stop()
+        os.close(master)
+        os.close(slave)
+    # 第一个定位是坏点；随后 3 个彼此一致的定位使其重新锚定，中途的单个跳点被丢弃
+    assert fixes[0]["latitude"] == pytest.approx(39.2741)
+    assert all(fix["latitude"] == pytest.approx(30.2741) for fix in fixes[1:])
+    assert source.dropped == 3
+    assert fixes[-1]["longitude"] == pytest.approx(120 + 9.426 / 60)
+
+
+def rmc(time, minutes="16.4460"):
+    return sentence(f"GPRMC,{time},A,30{minutes},N,12009.3120,E,19.4,90.0,191026,,,A")
+
+
+def gga(time, satellites="08", hdop="0.9", altitude="45.0"):
+    return sentence(f"GPGGA,{time},3016.4460,N,12009.3120,E,1,{satellites},{hdop},{altitude},M,7.0,M,,")
+
+
+def run(*chunks):
+    source = APRS.NMEAPositionSource("/dev/null")
+    fixes = []
+    source.subscribe(fixes.append)
+    for chunk in chunks:
+        for parsed in source.parser.feed(chunk):
+            source._handle(parsed)
+    return source, fixes
+
+
+def test_rmc_first_is_checked_against_its_own_gga():
+    source, fixes = run(
+        gga("080000.00"),                                       # 已知接收机会输出 GGA
+        rmc("080001.00"), gga("080001.00", altitude="41.0"),
+        rmc("080002.00"), gga("080002.00", hdop="9.9"),         # HDOP 过大
+        rmc("080003.00"), gga("080003.00", satellites="02"),    # 卫星不足
+        rmc("080004.00"), gga("080004.00", altitude="44.0"),
+    )
+    assert [fix["altitude"] for fix in fixes] == [41.0, 44.0]
+    assert source.dropped == 2
+
+
+def test_gga_first_is_checked_immediately():
+    source, fixes = run(gga("080001.00"), rmc("080001.00"), gga("080002.00", hdop="9.9"), rmc("080002.00"))
+    assert len(fixes) == 1 and source.dropped == 1
+
+
+def test_rmc_without_gga():
+    # 不输出 GGA 的接收机立即发布；GGA 丢失的时刻在下一条语句到达时不做质量检查发布
+    source, fixes = run(rmc("080001.00"), rmc("080002.00"))
+    assert len(fixes) == 2
+    source, fixes = run(rmc("080001.00"), gga("080001.00"), rmc("080002.00"), rmc("080003.00"))
+    assert len(fixes) == 2 and fixes[1]["altitude"] is None
@@ -0,0 +1,68 @@
+from datetime import datetime
+
+import pytest
+
+import APRS
+
+
+def obj(name, comment="", **kwargs):
+    return APRS.build_aprs_object(name, 29.79600, 119.68533, comment=comment, **kwargs)
+
+
+def test_object_and_item_info():
+    now = datetime(2026, 10, 19, 8, 5)
+    assert obj("HAMFEST").info(now) == ";HAMFEST  *190805z2947.76N/11941.12EE"
+    assert obj("HAMFEST").killed().info(now) == ";HAMFEST  _190805z2947.76N/11941.12EE"
+    assert obj("AID", kind="item").info() == ")AID!2947.76N/11941.12EE"
+
+
+@pytest.mark.parametrize("kwargs", [
+    {"name": ""},
+    {"name": "TOOLONGNAME"},
+    {"name": "AB", "kind": "item"},
+    {"name": "A!B", "kind": "item"},
+    {"name": "OK", "comment": "x" * (APRS.APRS_OBJECT_COMMENT_MAX + 1)},
+    {"name": "OK", "kind": "vehicle"},
+])
+def test_invalid_objects(kwargs):
+    with pytest.raises(ValueError):
+        obj(**kwargs)
+
+
+class Recorder:
+    def __init__(self):
+        self.packets = []
+
+    def __call__(self, packet):
+        self.packets.append(packet)
+        return {"rs": "ok"}
+
+
+def sender():
+    return APRS.ObjectBatchSender("N0CALL", "WIDE1-1", Recorder(), rate=0)
+
+
+def test_only_changed_objects_are_resent():
+    batch = sender()
+    batch.send([obj("A"), obj("B")])
+    results = batch.send([obj("A"), obj("B", "moved")])
+    assert [(entry["name"], entry["rs"]) for entry in results] == [("A", "skip"), ("B", "ok")]
+    assert len(batch.send_func.packets) == 3
+
+
+def test_force_still_kills_removed_objects_in_input_order():
+    batch = sender()
+    batch.send([obj("A"), obj("B"), obj("C")])
+    results = batch.send([obj("C"), obj("A")], force=True, kill_removed=True)
+    assert [(entry["name"], entry["rs"]) for entry in results] == [("C", "ok"), ("A", "ok"), ("B", "ok")]
+    assert results[2]["aprs_data"].startswith("N0CALL>APRSTV,WIDE1-1:;B        _")
+    assert set(batch.sent) == {"A", "C"}
+
+
+def test_state_round_trip(tmp_path):
+    batch = sender()
+    batch.send([obj("A")])
+    batch.save_state(str(tmp_path / "state.json"))
+    restored = sender()
+    restored.load_state(str(tmp_path / "state.json"))
+    assert restored.pending([obj("A")]) == []
@@ -0,0 +1,19 @@
+import pytest
+
+import APRS
+
+
+@pytest.mark.parametrize("args, expected", [
+    ((), "PHG0000"),
+    ((25, 24, 6, 90), "PHG5362"),
+    ((4, 2, 3, 0), "PHG2030"),
+    ((1000, 10000, 20, 360), "PHG9998"),
+])
+def test_encode_phg(args, expected):
+    assert APRS.encode_phg(*args) == expected
+
+
+def test_truncate_utf8_keeps_whole_characters():
+    assert APRS.truncate_utf8("abc", 10) == "abc"
+    assert APRS.truncate_utf8("中文abc", 4) == "中"
+    assert APRS.truncate_utf8("中文abc", 0) == ""
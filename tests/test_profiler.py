@@ -0,0 +1,51 @@
+import os
+import pstats
+
+import APRS
+
+
+def busy():
+    return sum(i * i for i in range(20000))
+
+
+def test_cprofile_merges_worker_export(tmp_path):
+    hooks = APRS.ProfilerHooks()
+    hooks.start("cprofile")
+    worker = APRS.ProfilerHooks()
+    hooks.call("parent_send", busy)
+    # 子进程侧的 start/export 在同一进程内模拟
+    hooks._main_profile.disable()
+    worker.start("cprofile")
+    busy()
+    exported = worker.export()
+    hooks._main_profile.enable()
+    hooks.merge(exported, "shard-0")
+    paths = hooks.stop(str(tmp_path))
+    assert not hooks.active
+    assert not os.path.exists(exported[1])
+    stats = pstats.Stats(paths[0])
+    assert any(func[2] == "busy" for func in stats.stats)
+    assert hooks.summary()[0]["event"] == "parent_send"
+
+
+def test_sample_merge_prefixes_worker_stacks(tmp_path):
+    hooks = APRS.ProfilerHooks()
+    hooks.start("sample")
+    hooks.merge(("sample", {"MainThread;run (x.py:1)": 3}), "shard-1")
+    paths = hooks.stop(str(tmp_path))
+    with open(paths[0], encoding="utf-8") as f:
+        assert "shard-1;MainThread;run (x.py:1) 3\n" in f.read()
+
+
+def test_stop_disables_profiler_even_if_output_fails(tmp_path):
+    blocker = tmp_path / "file"
+    blocker.write_text("")
+    hooks = APRS.ProfilerHooks()
+    hooks.start("sample")
+    sampler = hooks._sampler
+    try:
+        hooks.stop(str(blocker / "sub"))
+    except OSError:
+        pass
+    assert not hooks.active
+    assert sampler._thread is None
@@ -0,0 +1,47 @@
+import APRS
+
+
+def callsigns(count):
+    return [f"BG{index:04d}-9" for index in range(count)]
+
+
+def test_assignment_is_stable_and_case_insensitive():
+    first = APRS.BeaconSlotPlanner(60).assign(callsigns(100))
+    again = APRS.BeaconSlotPlanner(60).assign([callsign.lower() for callsign in callsigns(100)])
+    assert first == again
+    assert all(0 <= offset < 60 for offset in first.values())
+
+
+def test_capacity_spreads_load():
+    planner = APRS.BeaconSlotPlanner(60, capacity=2)
+    planner.assign(callsigns(120))
+    assert max(planner.load()) == 2
+    # 全部已满时仍然分配到负载最小的时隙
+    planner.assign(callsigns(121))
+    assert sum(planner.load()) == 121 and max(planner.load()) == 3
+
+
+def test_existing_slots_survive_fleet_changes():
+    planner = APRS.BeaconSlotPlanner(60, capacity=3)
+    before = planner.assign(callsigns(50))
+    after = planner.assign(callsigns(50)[10:] + callsigns(60)[50:])
+    assert all(after[callsign] == before[callsign] for callsign in callsigns(50)[10:])
+    assert not set(callsigns(10)) & set(after)
+
+
+def test_rebalance_is_even():
+    planner = APRS.BeaconSlotPlanner(60)
+    planner.assign(callsigns(120))
+    planner.rebalance()
+    assert planner.load() == [2] * 60
+
+
+def test_save_and_load(tmp_path):
+    path = tmp_path / "slots.json"
+    planner = APRS.BeaconSlotPlanner(30, capacity=1)
+    planner.assign(callsigns(20))
+    planner.save(path)
+    assert APRS.BeaconSlotPlanner.load_file(path, 30).slots == planner.slots
+    # 间隔改变时重新分配
+    assert APRS.BeaconSlotPlanner.load_file(path, 45).slots == {}
+    assert APRS.BeaconSlotPlanner.load_file(tmp_path / "missing.json", 30).slots == {}
@@ -0,0 +1,90 @@
+import socket
+import threading
+
+import pytest
+
+import APRS
+
+
+def monitor_with(values, **metrics):
+    """按 values 生成样本 (每个样本的 rss_mb / threads / sockets 相同)"""
+    monitor = APRS.SoakMonitor(warmup=0)
+    for index, value in enumerate(values):
+        sample = {"virtual_hours": index, "rss_mb": value, "threads": 4, "sockets": 2}
+        sample.update({metric: series[index] for metric, series in metrics.items()})
+        monitor.samples.append(sample)
+    return monitor
+
+
+def test_flat_metrics_pass():
+    monitor = monitor_with([50.0] * 16, log_lines=[200] * 16, after_queue=[3] * 16)
+    verdict = monitor.verdict()
+    assert set(verdict) == {"rss_mb", "threads", "sockets", "log_lines", "after_queue"}
+    assert monitor.passed() and monitor.missing() == []
+
+
+def test_unbounded_growth_fails():
+    monitor = monitor_with([50.0 + index * 2 for index in range(16)])
+    assert monitor.verdict()["rss_mb"]["ok"] is False
+    assert not monitor.passed()
+
+
+def test_warmup_growth_is_ignored():
+    monitor = monitor_with([10.0, 30.0] + [50.0] * 14)
+    monitor.warmup = 0.2
+    assert monitor.passed()
+
+
+def test_missing_metrics_are_reported_not_hidden():
+    monitor = monitor_with([50.0] * 16)
+    monitor.samples[5]["sockets"] = None
+    assert sorted(monitor.missing()) == ["after_queue", "log_lines", "sockets"]
+    assert monitor.verdict()["sockets"]["ok"] is None
+    assert monitor.passed()
+
+
+def test_too_few_samples_cannot_pass():
+    monitor = monitor_with([50.0] * 4)
+    assert monitor.verdict() == {}
+    assert not monitor.passed()
+
+
+def test_sample_includes_process_metrics():
+    monitor = APRS.SoakMonitor()
+    record = monitor.sample(7200, sent=3)
+    assert record["virtual_hours"] == 2 and record["sent"] == 3
+    assert record["threads"] >= 1
+    assert {"rss_mb", "sockets"} <= set(record)
+
+
+def test_socket_count_follows_open_sockets():
+    before = APRS.process_socket_count()
+    if before is None:
+        pytest.skip("本平台无法统计套接字")
+    sockets = [socket.socket() for _ in range(3)]
+    try:
+        assert APRS.process_socket_count() == before + 3
+    finally:
+        for sock in sockets:
+            sock.close()
+
+
+def test_virtual_clock_runs_faster(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(APRS.time_module, "monotonic", lambda: now[0])
+    clock = APRS.VirtualClock(speed=3600)
+    start_mono, start_wall = clock.monotonic(), clock.time()
+    now[0] += 0.5
+    assert clock.elapsed() == 1800
+    assert clock.monotonic() - start_mono == 1800
+    assert clock.time() - start_wall == 1800
+
+
+def test_virtual_clock_wait_is_scaled():
+    clock = APRS.VirtualClock(speed=3600)
+    event = threading.Event()
+    waits = []
+    event.wait = lambda timeout: waits.append(timeout) or False
+    clock.wait(event, 7200)
+    clock.wait(event, -5)
+    assert waits == [2.0, 0.0]
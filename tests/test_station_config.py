@@ -0,0 +1,100 @@
+import threading
+import types
+
+import pytest
+
+import APRS
+
+
+def form(**changes):
+    inputs = {
+        "callsign": "N0CALL-1", "path": "WIDE1-1", "latitude": "2947.76N", "longitude": "11941.12E",
+        "symbol_table": "/", "symbol_code": ">", "comment": "hi", "speed": "36", "course": "90",
+        "altitude": "", "status": "", "power": "5", "antenna_height": "", "gain": "",
+        "device_info": "", "software_info": "", "phg": False, "text_budget": ""
+    }
+    inputs.update(changes)
+    return inputs
+
+
+def test_snapshot_ignores_later_form_edits():
+    inputs = form()
+    config = APRS.StationConfig.from_inputs(inputs)
+    inputs.update(callsign="EDITED-9", latitude="0000.00S", symbol_code="L", speed="x")
+    assert config.callsign == "N0CALL-1" and config.latitude == "2947.76N" and config.symbol_code == ">"
+    assert config.speed == 36 and config.power == 5
+    with pytest.raises(AttributeError):
+        config.callsign = "EDITED-9"
+    assert config.send_kwargs()["callsign"] == "N0CALL-1"
+    assert "use_gps" not in config.send_kwargs()
+
+
+@pytest.mark.parametrize("changes", [
+    {"symbol_table": ""},
+    {"symbol_table": "AB"},
+    {"symbol_table": "a"},
+    {"symbol_code": ""},
+    {"symbol_code": "LL"},
+    {"symbol_code": " "},
+    {"symbol_table": "A", "symbol_code": "$"},   # 不可叠加的符号
+    {"latitude": "29.796"},
+    {"speed": "fast"},
+])
+def test_invalid_inputs_are_rejected(changes):
+    with pytest.raises(ValueError):
+        APRS.StationConfig.from_inputs(form(**changes))
+
+
+def test_overlay_symbol_is_accepted():
+    config = APRS.StationConfig.from_inputs(form(symbol_table="A", symbol_code="#"))
+    packet = APRS.PacketTemplate(config.callsign, config.path, config.symbol_table, config.symbol_code).build(
+        config.latitude, config.longitude, now=0)[0]
+    assert "2947.76NA11941.12E#" in packet
+
+
+def test_from_spec_rejects_unknown_fields():
+    with pytest.raises(ValueError):
+        APRS.StationConfig.from_spec({"callsign": "N0CALL-1", "latitude": "2947.76N",
+                                      "longitude": "11941.12E", "colour": "red"})
+
+
+class FakeClock:
+    """每次等待后调用 on_wait，两次发送后停止"""
+
+    def __init__(self, stop_event, on_wait):
+        self.stop_event = stop_event
+        self.on_wait = on_wait
+        self.waits = 0
+
+    def monotonic(self):
+        return 0.0
+
+    def wait(self, event, timeout):
+        self.waits += 1
+        self.on_wait()
+        if self.waits >= 2:
+            self.stop_event.set()
+
+
+def test_schedule_loop_sends_snapshots_and_keeps_last_valid_one():
+    stop_event = threading.Event()
+    sent = []
+    inputs = form()
+    app = types.SimpleNamespace(scheduled_enabled=True, log_message=lambda text: None,
+                                get_kiss_transport=lambda: None, _send_packet_thread=None)
+    app.build_station_config = lambda: APRS.StationConfig.from_inputs(inputs)
+    app.schedule_state = (app.build_station_config(), None)
+    app.profiler = types.SimpleNamespace(call=lambda label, func, config, kiss: sent.append(config))
+
+    def edit_form():
+        # 第一次: 有效修改，快照更新；第二次: 无效修改，继续使用上一次的快照
+        if app.clock.waits == 1:
+            inputs["comment"] = "edited"
+        else:
+            inputs["latitude"] = "bad"
+        APRS.APRSApp.on_config_changed(app)
+
+    app.clock = FakeClock(stop_event, edit_form)
+    APRS.APRSApp.schedule_loop(app, 60, stop_event)
+    assert [config.comment for config in sent] == ["hi", "edited"]
+    assert app.schedule_state[0].comment == "edited" and app.schedule_state[0].latitude == "2947.76N"
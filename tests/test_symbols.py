@@ -0,0 +1,49 @@
+import pytest
+
+import APRS
+
+
+@pytest.fixture(scope="module")
+def symbols():
+    return APRS.SymbolIndex()
+
+
+def test_get_primary_and_overlay(symbols):
+    assert symbols.get("/", "#")["name"] == "数字中继"
+    overlay = symbols.get("A", "#")
+    assert overlay["table"] == "A"
+    assert overlay["name"] == "数字中继 (绿星) [A]"
+    # 原始副表条目不被修改
+    assert symbols.get("\\", "#")["table"] == "\\"
+    # 不可叠加的符号没有叠加形式
+    assert symbols.get("A", "$") is None
+
+
+@pytest.mark.parametrize("table", ["", "AB", "a", "0A", None])
+def test_overlay_table_must_be_single_char(symbols, table):
+    assert not APRS.is_overlay_table(table)
+    assert symbols.get(table, "#") is None
+
+
+def test_table_items_lists_overlays(symbols):
+    items = symbols.table_items("7")
+    assert len(items) == sum(1 for _, info in symbols.table_items("\\") if info["overlay"])
+    assert all(info["table"] == "7" and info["overlay"] for _, info in items)
+    assert symbols.table_items("AB") == []
+
+
+def test_search_returns_overlays(symbols):
+    assert symbols.search("A#")[0] == symbols.get("A", "#")
+    assert symbols.search("a#")[0] == symbols.get("A", "#")
+    found = symbols.search("数字中继", overlay="5")
+    assert found and all(info["table"] == "5" for info in found)
+    assert len(symbols.search("", overlay="5")) == len(symbols.table_items("5"))
+    with pytest.raises(ValueError):
+        symbols.search("", overlay="AB")
+
+
+def test_object_rejects_multi_char_overlay():
+    APRS.build_aprs_object("OBJ", 29.796, 119.685, symbol_table="A", symbol_code="#")
+    for table in ("", "AB"):
+        with pytest.raises(ValueError):
+            APRS.build_aprs_object("OBJ", 29.796, 119.685, symbol_table=table, symbol_code="#")
@@ -0,0 +1,94 @@
+import pytest
+
+import APRS
+
+
+def test_parse_sensor_text():
+    assert APRS.parse_sensor_text("rssi:-56 sat=20 temp:42.5°C vol:4.2") == {
+        "rssi": -56.0, "sat": 20.0, "temp": 42.5, "vol": 4.2
+    }
+
+
+def test_encode_base91():
+    assert APRS.encode_base91(0, 2) == "!!"
+    assert APRS.encode_base91(90, 2) == "!{"
+    assert APRS.encode_base91(91, 2) == '"!'
+    assert APRS.encode_base91(8280, 2) == "{{"
+
+
+def aggregator():
+    return APRS.TelemetryAggregator(APRS.DEFAULT_TELEMETRY_CHANNELS, capacity=8)
+
+
+def test_snapshot_uses_channel_statistic():
+    agg = aggregator()
+    for rssi, sat in ((-60, 10), (-40, 6), (-50, 8)):
+        agg.add_sample({"RSSI": rssi, "sat": sat, "unknown": 1})
+    values, counts = agg.snapshot()
+    assert values[:2] == [-50, 6]
+    assert values[2:] == [None, None, None]
+    assert counts == [3, 3, 0, 0, 0]
+
+
+def test_consume_keeps_later_samples():
+    agg = aggregator()
+    agg.add_sample({"rssi": -60})
+    values, counts = agg.snapshot()
+    agg.add_sample({"rssi": -20})
+    agg.consume(counts)
+    values, counts = agg.snapshot()
+    assert (values[0], counts[0]) == (-20, 1)
+    agg.consume(counts)
+    values, counts = agg.snapshot()
+    assert (values[0], counts[0]) == (-20, 0)   # 无新采样时沿用最近值
+
+
+def test_standard_packets():
+    encoder = APRS.TelemetryEncoder(aggregator())
+    encoder.aggregator.add_sample({"rssi": -75, "sat": 25, "temp": 22.5, "vol": 15, "mileage": 50000})
+    telemetry = encoder.prepare("N0CALL-1", "WIDE1-1")
+    assert telemetry["comment"] == ""
+    assert telemetry["definitions"][0] == "N0CALL-1>APRSTV,WIDE1-1::N0CALL-1 :PARM.RSSI,Sat,Temp,Vol,Dist"
+    assert telemetry["packets"] == ["N0CALL-1>APRSTV,WIDE1-1:T#000,128,128,128,128,128,00000000"]
+
+
+def test_prepare_without_commit_repeats_sequence():
+    encoder = APRS.TelemetryEncoder(aggregator())
+    encoder.aggregator.add_sample({"rssi": -75})
+    first = encoder.prepare("N0CALL-1", "WIDE1-1")
+    assert encoder.prepare("N0CALL-1", "WIDE1-1") == first
+    encoder.commit(first)
+    second = encoder.prepare("N0CALL-1", "WIDE1-1")
+    assert second["sequence"] == 1
+    assert second["counts"][0] == 0
+    assert second["definitions"] == first["definitions"]   # 定义未确认发送前一直保留
+    encoder.mark_definitions_sent()
+    assert encoder.prepare("N0CALL-1", "WIDE1-1")["definitions"] == []
+
+
+def test_base91_comment():
+    encoder = APRS.TelemetryEncoder(aggregator(), mode="base91")
+    encoder.aggregator.add_sample({"rssi": 0, "sat": 0})
+    comment = encoder.prepare("N0CALL-1", "WIDE1-1")["comment"]
+    assert comment == "|!!{{!!!!!!!!|"
+
+
+def test_definition_label_limits():
+    for channel, limit in zip(APRS.DEFAULT_TELEMETRY_CHANNELS, APRS.TELEMETRY_LABEL_LIMITS):
+        assert len(channel.name) <= limit and len(channel.unit) <= limit
+    channels = list(APRS.DEFAULT_TELEMETRY_CHANNELS[:4]) + [APRS.TelemetryChannel("Mileage", "km", 0, 1)]
+    with pytest.raises(ValueError):
+        APRS.TelemetryEncoder(APRS.TelemetryAggregator(channels))
+
+
+def test_strip_covered_device_info():
+    encoder = APRS.TelemetryEncoder(aggregator())
+    text = "imei:*418 rssi:-56 sat:20/33 temp:42°C vol:4.2V mileage:1990.5km"
+    assert encoder.strip_covered(text) == "imei:*418"
+    assert encoder.strip_covered("rssi:-56 mileage=12") is None
+    assert encoder.strip_covered(None) is None
+
+
+def test_unknown_mode():
+    with pytest.raises(ValueError):
+        APRS.TelemetryEncoder(aggregator(), mode="binary")
@@ -0,0 +1,52 @@
+import threading
+
+import APRS
+
+
+def build(symbol_code, **kwargs):
+    template = APRS.PacketTemplate("N0CALL-1", "WIDE1-1", "/", symbol_code, "hi")
+    return template.build("2947.76N", "11941.12E", now=0, **kwargs)[0]
+
+
+def test_selected_symbol_is_transmitted():
+    assert build(">") == "N0CALL-1>APRSTV,WIDE1-1:/000000h2947.76N/11941.12E>   /    hi"
+    assert build("L") != build(">")
+
+
+def test_weather_uses_weather_station_symbol():
+    assert "/11941.12E_c000s000 hi" in build(">", weather="c000s000")
+
+
+def test_matches_uncached_send_format():
+    template = APRS.PacketTemplate("N0CALL-1", "WIDE1-1", "/", "L", "hi", power=5, phg=True)
+    packet, key = template.build("2947.76N", "11941.12E", altitude=100, now=3723)
+    assert packet == "N0CALL-1>APRSTV,WIDE1-1:/010203h2947.76N/11941.12ELPHG2000/A=000328 hi"
+    assert key == packet.replace("010203h", "")
+
+
+def test_phg_moves_to_comment_when_course_speed_present():
+    template = APRS.PacketTemplate("N0CALL-1", "WIDE1-1", "/", "L", "hi", power=5, phg=True)
+    packet = template.build("2947.76N", "11941.12E", speed=36, course=90, altitude=100, now=3723)[0]
+    # 只有一个数据扩展 (CSE/SPD)，PHG 以空格隔开放在注释中
+    assert packet.endswith("/11941.12EL036/090/A=000328 PHG2000 hi")
+    assert template.build("2947.76N", "11941.12E", speed=36, course=90, now=3723)[0].endswith(
+        "L036/090 PHG2000 hi")
+
+
+def test_shared_template_across_threads():
+    template = APRS.PacketTemplate("N0CALL-1", "WIDE1-1", "/", "L", "")
+    errors = []
+
+    def worker(index):
+        latitude = f"{index:02d}00.00N"
+        for speed in range(300):
+            packet = template.build(latitude, "11941.12E", speed=speed, course=index, now=speed)[0]
+            if latitude not in packet or f"{speed:03d}/{index:03d}" not in packet:
+                errors.append(packet)
+
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
@@ -0,0 +1,32 @@
+import APRS
+
+T0 = 1_000_000
+
+
+def test_empty_report_uses_placeholders():
+    assert APRS.WeatherStation(clock=lambda: T0).report() == ".../..."
+
+
+def test_report_fields_and_aliases():
+    station = APRS.WeatherStation(clock=lambda: T0)
+    station.add_sample({"wind_dir": 90, "wind": 5, "temp": 20, "rain": 1, "hum": 50, "baro": 1013.2}, now=T0)
+    station.add_sample({"wind_dir": 90, "wind": 10, "rain": 1.54}, now=T0 + 30)
+    # 平均 7.5 m/s = 17 mph，阵风 10 m/s = 22 mph，降雨 2.54 mm = 0.10 英寸
+    assert station.report(now=T0 + 40) == "090/017g022t068r010p010P010h50b10132"
+
+
+def test_rolling_windows_expire():
+    station = APRS.WeatherStation(clock=lambda: T0)
+    station.add_sample({"wind_dir": 180, "wind_speed": 5, "rain": 2.54}, now=T0)
+    report = station.report(now=T0 + 3700)
+    # 风速、阵风和1小时降雨窗口已过期，保留最近风向和24小时降雨
+    assert report.startswith("180/...")
+    assert "r000p010" in report
+    assert "g" not in report
+
+
+def test_vector_mean_wind_direction():
+    station = APRS.WeatherStation(clock=lambda: T0)
+    station.add_sample({"wind_dir": 350, "wind_speed": 5}, now=T0)
+    station.add_sample({"wind_dir": 10, "wind_speed": 5}, now=T0 + 1)
+    assert station.report(now=T0 + 2).startswith("360/")